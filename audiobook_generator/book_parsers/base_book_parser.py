@@ -1,8 +1,13 @@
-from typing import List, Tuple
+import logging
+import re
+from typing import Iterable, Iterator, List, Tuple
 
 from audiobook_generator.config.general_config import GeneralConfig
 
+logger = logging.getLogger(__name__)
+
 EPUB = "epub"
+TXT = "txt"
 
 
 class BaseBookParser:  # Base interface for books parsers
@@ -29,17 +34,105 @@ class BaseBookParser:  # Base interface for books parsers
     def get_chapters(self, break_string) -> List[Tuple[str, str]]:
         raise NotImplementedError
 
+    def iter_chapters(self, break_string) -> Iterator[Tuple[str, str]]:
+        # Parsers that can parse chapter by chapter override this, so the conversion starts
+        # while the rest of the book is still being parsed
+        yield from self.get_chapters(break_string)
+
+    def iter_chapter_range(self, break_string, chapter_start, chapter_end) -> Iterator[Tuple[int, str, str]]:
+        """
+        Yield (idx, title, text) of the chapters from chapter_start to chapter_end (-1 for the last chapter),
+        numbering the non-empty chapters from 1.
+
+        Parsers that can tell which documents hold non-empty chapters without parsing them override this, so
+        only the chapters in the range are parsed.
+        """
+        yield from select_chapters(self.iter_chapters(break_string), chapter_start, chapter_end)
+
 
 # Common support methods for all book parsers
 
+def check_chapter_range(chapter_start, chapter_end, chapter_count=None):
+    """Validate a chapter range, against the chapter count once it's known."""
+    if chapter_start < 1 or chapter_count is not None and chapter_start > chapter_count:
+        raise ValueError(f"Chapter start index {chapter_start} is out of range. Check your input.")
+    if chapter_end < -1 or chapter_count is not None and chapter_end > chapter_count:
+        raise ValueError(f"Chapter end index {chapter_end} is out of range. Check your input.")
+    if chapter_end != -1 and chapter_start > chapter_end:
+        raise ValueError(
+            f"Chapter start index {chapter_start} is larger than chapter end index {chapter_end}. Check your input."
+        )
+
+
+def select_chapters(chapters: Iterable[Tuple[str, str]], chapter_start: int,
+                    chapter_end: int) -> Iterator[Tuple[int, str, str]]:
+    """
+    Number the non-empty chapters from 1 and yield (idx, title, text) of those from chapter_start to chapter_end
+    (-1 for the last chapter), consuming the chapters lazily.
+
+    The range is validated as soon as it is known, a range beyond the last chapter only once all chapters are read.
+    """
+    check_chapter_range(chapter_start, chapter_end)
+
+    chapter_count = 0
+    # Filter out empty or very short chapters
+    for title, text in chapters:
+        if not text.strip():
+            continue
+        chapter_count += 1
+        if chapter_count < chapter_start:
+            continue
+        yield chapter_count, title, text
+        if chapter_count == chapter_end:
+            return
+
+    logger.info(f"Chapters count: {chapter_count}.")
+    check_chapter_range(chapter_start, chapter_end, chapter_count)
+
+
+def get_chapter_title(tag_title, cleaned_text, title_mode, break_string) -> str:
+    """
+    Sanitized title of a chapter for the title mode, from the title found in the chapter's markup (None if there is
+    none) or its cleaned text.
+    """
+    if title_mode == "auto":
+        title = tag_title or ""
+        if title.strip() == "" or re.match(r'^\d{1,3}$',title) is not None:
+            title = cleaned_text[:60]
+    elif title_mode == "tag_text":
+        title = tag_title or ""
+        if title.strip() == "":
+            title = "<blank>"
+    elif title_mode == "first_few":
+        title = cleaned_text[:60]
+    else:
+        raise ValueError("Unsupported title_mode")
+    logger.debug("Raw title: <%s>", title)
+    title = sanitize_title(title, break_string)
+    logger.debug("Sanitized title: <%s>", title)
+    return title
+
+
+def sanitize_title(title, break_string) -> str:
+    # replace MAGIC_BREAK_STRING with a blank space
+    # strip incase leading bank is missing
+    title = title.replace(break_string, " ")
+    sanitized_title = re.sub(r"[^\w\s]", "", title, flags=re.UNICODE)
+    sanitized_title = re.sub(r"\s+", "_", sanitized_title.strip())
+    return sanitized_title
+
+
 def get_supported_book_parsers() -> List[str]:
-    return [EPUB]
+    return [EPUB, TXT]
 
 
 def get_book_parser(config) -> BaseBookParser:
     if config.input_file.endswith(EPUB):
         from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
         return EpubBookParser(config)
+    elif config.input_file.endswith(TXT):
+        from audiobook_generator.book_parsers.text_book_parser import TextBookParser
+        return TextBookParser(config)
     # elif <- new book parser goes here
     else:
         raise NotImplementedError(f"Unsupported file format: {config.input_file}")
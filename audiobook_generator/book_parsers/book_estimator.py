@@ -0,0 +1,84 @@
+import dataclasses
+import html
+import logging
+import math
+import re
+from typing import List
+
+from audiobook_generator.book_parsers.base_book_parser import EPUB, TXT
+from audiobook_generator.book_parsers.epub_loader import EpubLoader
+from audiobook_generator.config.general_config import GeneralConfig
+from audiobook_generator.tts_providers.base_tts_provider import get_max_chunk_chars
+
+logger = logging.getLogger(__name__)
+
+# Markup of an XHTML document: comments, tags, processing instructions, doctype and CDATA markers
+MARKUP_PATTERN = re.compile(rb"<!--.*?-->|<[^>]*>", re.DOTALL)
+# Chunks are split at sentence ends, so they are on average this much shorter than the maximum
+# (measured with split_text on English and Chinese books)
+CHUNK_FILL_RATIO = 0.9
+
+
+def count_characters(text: str) -> int:
+    """Length of the text once its whitespace is collapsed, as the text cleaner does."""
+    words = text.split()
+    return sum(map(len, words)) + len(words) - 1 if words else 0
+
+
+def count_document_characters(content: bytes) -> int:
+    """Characters of the text of an XHTML document, stripping its markup without parsing it."""
+    text = MARKUP_PATTERN.sub(b"", content).decode("utf-8", errors="replace")
+    if "&" in text:
+        text = html.unescape(text)
+    return count_characters(text)
+
+
+@dataclasses.dataclass(frozen=True)
+class BookEstimate:
+    """
+    Size of a book estimated from its raw text, without parsing and cleaning its chapters.
+
+    Chapters are the documents with text, in book order, as numbered by the book parsers. Cleaning options
+    removing text (like search and replace rules) are ignored.
+    """
+    chapter_characters: List[int]
+
+    @property
+    def chapter_count(self) -> int:
+        return len(self.chapter_characters)
+
+    @property
+    def total_characters(self) -> int:
+        return sum(self.chapter_characters)
+
+    def select(self, chapter_start, chapter_end) -> "BookEstimate":
+        """Estimate of the chapters from chapter_start to chapter_end (-1 for the last chapter)."""
+        return BookEstimate(self.chapter_characters[chapter_start - 1:None if chapter_end == -1 else chapter_end])
+
+    def get_chunk_count(self, tts, language) -> int:
+        """Chunks the chapters are split into by a TTS provider, one per chapter for providers converting whole chapters."""
+        max_chars = get_max_chunk_chars(tts, language)
+        if max_chars is None:
+            return self.chapter_count
+        return sum(math.ceil(characters / (max_chars * CHUNK_FILL_RATIO)) for characters in self.chapter_characters)
+
+
+def estimate_book(config: GeneralConfig) -> BookEstimate:
+    """Estimate the size of the input book, in a fraction of the time parsing it takes."""
+    if config.input_file.endswith(EPUB):
+        loader = EpubLoader(config.input_file)
+        try:
+            characters = [
+                count_document_characters(loader.read_file(document.path)) for document in loader.get_documents()
+            ]
+        finally:
+            loader.close()
+    elif config.input_file.endswith(TXT):
+        from audiobook_generator.book_parsers.text_book_parser import TextBookParser
+
+        # Plain text is already read line by line, only the cleaning is skipped
+        parser = TextBookParser(config)
+        characters = [count_characters("\n".join(lines)) for _, lines in parser.iter_chapter_lines()]
+    else:
+        raise NotImplementedError(f"Unsupported file format: {config.input_file}")
+    return BookEstimate([count for count in characters if count])
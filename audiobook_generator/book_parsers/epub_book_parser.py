@@ -1,21 +1,46 @@
+import collections
 import logging
-import re
-from typing import List, Tuple
-
-import ebooklib
-from bs4 import BeautifulSoup
-from ebooklib import epub
-
-from audiobook_generator.book_parsers.base_book_parser import BaseBookParser
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from audiobook_generator.book_parsers.base_book_parser import (
+    BaseBookParser,
+    check_chapter_range,
+    get_chapter_title,
+    sanitize_title,
+    select_chapters,
+)
+from audiobook_generator.book_parsers.epub_loader import EpubLoader
+from audiobook_generator.book_parsers.search_and_replace import SearchAndReplaceRules, load_search_and_replace_rules
+from audiobook_generator.book_parsers.text_cleaner import TextCleaner
+from audiobook_generator.book_parsers.text_extractors import get_text_extractor, has_text
 from audiobook_generator.config.general_config import GeneralConfig
+from audiobook_generator.utils.log_handler import setup_logging
+from audiobook_generator.utils.parse_cache import get_parse_cache, get_parse_cache_key
 
 logger = logging.getLogger(__name__)
 
+# Config, text cleaner and break string of a parse worker process, set by init_parse_worker
+parse_worker_state = None
+
+# Books with at least this many documents are parsed by a process pool, below that starting the
+# processes takes longer than parsing
+PARALLEL_PARSE_MIN_DOCUMENTS = 200
+# Documents submitted to the pool per process ahead of the document being yielded
+PARALLEL_PARSE_DOCUMENTS_AHEAD = 4
+
 
 class EpubBookParser(BaseBookParser):
     def __init__(self, config: GeneralConfig):
         super().__init__(config)
-        self.book = epub.read_epub(self.config.input_file, {"ignore_ncx": True})
+        # Only the documents of the book are read, on demand
+        self.book = EpubLoader(self.config.input_file)
+        self.parse_cache = get_parse_cache(self.config)
+        self.parse_cache_keys = {}  # break string -> parse cache key
+        self.search_and_replace_rules = None  # compiled on first use
+        self.text_cleaner = None  # built on first use
 
     def __str__(self) -> str:
         return super().__str__()
@@ -25,6 +50,7 @@ class EpubBookParser(BaseBookParser):
             raise ValueError("Epub Parser: Input file cannot be empty")
         if not self.config.input_file.endswith(".epub"):
             raise ValueError(f"Epub Parser: Unsupported file format: {self.config.input_file}")
+        get_text_extractor(self.config.text_extractor)
 
     def get_book(self):
         return self.book
@@ -40,89 +66,178 @@ class EpubBookParser(BaseBookParser):
         return "Unknown"
 
     def get_chapters(self, break_string) -> List[Tuple[str, str]]:
-        chapters = []
-        search_and_replaces = self.get_search_and_replaces()
-        for item in self.book.get_items_of_type(ebooklib.ITEM_DOCUMENT):
-            content = item.get_content()
-            soup = BeautifulSoup(content, "lxml-xml")
-            raw = soup.get_text(strip=False)
-            logger.debug(f"Raw text: <{raw[:]}>")
-
-            # Replace excessive whitespaces and newline characters based on the mode
-            if self.config.newline_mode == "single":
-                cleaned_text = re.sub(r"[\n]+", break_string, raw.strip())
-            elif self.config.newline_mode == "double":
-                cleaned_text = re.sub(r"[\n]{2,}", break_string, raw.strip())
-            elif self.config.newline_mode == "none":
-                cleaned_text = re.sub(r"[\n]+", " ", raw.strip())
-            else:
-                raise ValueError(f"Invalid newline mode: {self.config.newline_mode}")
-
-            logger.debug(f"Cleaned text step 1: <{cleaned_text[:]}>")
-            cleaned_text = re.sub(r"\s+", " ", cleaned_text)
-            logger.debug(f"Cleaned text step 2: <{cleaned_text[:100]}>")
-
-            # Removes end-note numbers
-            if self.config.remove_endnotes:
-                cleaned_text = re.sub(r'(?<=[a-zA-Z.,!?;”")])\d+', "", cleaned_text)
-                logger.debug(f"Cleaned text step 4: <{cleaned_text[:100]}>")
-
-            # Removes references numbers like [1] or [2.3]
-            if self.config.remove_reference_numbers:
-                cleaned_text = re.sub(r'\[\d+(\.\d+)?\]', '', cleaned_text)
-                logger.debug(f"Cleaned text step 4.1 (removed brackets): <{cleaned_text[:100]}>")
-
-            # Does user defined search and replaces
-            for search_and_replace in search_and_replaces:
-                cleaned_text = re.sub(search_and_replace['search'], search_and_replace['replace'], cleaned_text)
-            logger.debug(f"Cleaned text step 5: <{cleaned_text[:100]}>")
-
-            # Get proper chapter title
-            if self.config.title_mode == "auto":
-                title = ""
-                title_levels = ['title', 'h1', 'h2', 'h3']
-                for level in title_levels:
-                    if soup.find(level):
-                        title = soup.find(level).text
-                        break
-                if title.strip() == "" or re.match(r'^\d{1,3}$',title) is not None:
-                    title = cleaned_text[:60]
-            elif self.config.title_mode == "tag_text":
-                title = ""
-                title_levels = ['title', 'h1', 'h2', 'h3']
-                for level in title_levels:
-                    if soup.find(level):
-                        title = soup.find(level).text
-                        break
-                if title.strip() == "":
-                    title = "<blank>"
-            elif self.config.title_mode == "first_few":
-                title = cleaned_text[:60]
-            else:
-                raise ValueError("Unsupported title_mode")
-            logger.debug(f"Raw title: <{title}>")
-            title = self._sanitize_title(title, break_string)
-            logger.debug(f"Sanitized title: <{title}>")
-
-            chapters.append((title, cleaned_text))
-            soup.decompose()
+        return list(self.iter_chapters(break_string))
+
+    def iter_chapters(self, break_string) -> Iterator[Tuple[str, str]]:
+        cached_chapters = self.get_cached_chapters(break_string)
+        if cached_chapters is not None:
+            yield from cached_chapters
+            return
+
+        items = self.book.get_documents()
+        text_cleaner = self.get_text_cleaner()
+        hits = collections.Counter()
+        parsed_chapters = []
+        for chapter in self._parse_documents(items, text_cleaner, break_string, hits):
+            if self.parse_cache is not None:
+                parsed_chapters.append(chapter)
+            yield chapter
+        if text_cleaner.search_and_replace_rules:
+            text_cleaner.search_and_replace_rules.log_hits(hits)
+        # Only a completely parsed book is cached
+        if self.parse_cache is not None:
+            self.parse_cache.put(self.get_parse_cache_key(break_string), parsed_chapters)
+
+    def iter_chapter_range(self, break_string, chapter_start, chapter_end) -> Iterator[Tuple[int, str, str]]:
+        check_chapter_range(chapter_start, chapter_end)
+        cached_chapters = self.get_cached_chapters(break_string)
+        if cached_chapters is not None:
+            yield from select_chapters(cached_chapters, chapter_start, chapter_end)
+            return
+        if chapter_start == 1 and chapter_end == -1:
+            # The whole book is parsed anyway, chapters are yielded as soon as they are parsed (and get cached)
+            yield from select_chapters(self.iter_chapters(break_string), chapter_start, chapter_end)
+            return
+
+        text_cleaner = self.get_text_cleaner()
+        # The index only needs to reach chapter_end, unless the range runs to the last chapter
+        items = self.get_chapter_items(text_cleaner, break_string, None if chapter_end == -1 else chapter_end)
+        if chapter_end == -1:
+            logger.info(f"Chapters count: {len(items)}.")
+        check_chapter_range(chapter_start, chapter_end, len(items))
+
+        selected_items = items[chapter_start - 1:None if chapter_end == -1 else chapter_end]
+        hits = collections.Counter()
+        chapters = self._parse_documents(selected_items, text_cleaner, break_string, hits)
+        for idx, (title, text) in enumerate(chapters, start=chapter_start):
+            yield idx, title, text
+        if text_cleaner.search_and_replace_rules:
+            text_cleaner.search_and_replace_rules.log_hits(hits)
+
+    def get_parse_cache_key(self, break_string):
+        if break_string not in self.parse_cache_keys:
+            self.parse_cache_keys[break_string] = get_parse_cache_key(self.config, break_string)
+        return self.parse_cache_keys[break_string]
+
+    def get_cached_chapters(self, break_string) -> Optional[List[Tuple[str, str]]]:
+        if self.parse_cache is None:
+            return None
+        chapters = self.parse_cache.get(self.get_parse_cache_key(break_string))
+        if chapters is not None:
+            logger.info(f"Using cached chapters of {self.config.input_file}")
         return chapters
 
-    def get_search_and_replaces(self):
-        search_and_replaces = []
-        if self.config.search_and_replace_file:
-            with open(self.config.search_and_replace_file) as fp:
-                search_and_replace_content = fp.readlines()
-                for search_and_replace in search_and_replace_content:
-                    if '==' in search_and_replace and not search_and_replace.startswith('==') and not search_and_replace.endswith('==') and not search_and_replace.startswith('#'):
-                        search_and_replaces = search_and_replaces + [ {'search': r"{}".format(search_and_replace.split('==')[0]), 'replace': r"{}".format(search_and_replace.split('==')[1][:-1])} ]
-        return search_and_replaces
+    def get_chapter_items(self, text_cleaner: TextCleaner, break_string, max_items: Optional[int] = None):
+        """
+        Chapter index of the book: the documents that make non-empty chapters, in book order, up to max_items.
+
+        A document is empty if it has no text. Only if the cleaning options may remove all of its text, the
+        document's text is cleaned to find out, its title is never needed.
+        """
+        items = []
+        for item in self.book.get_documents():
+            if max_items is not None and len(items) >= max_items:
+                break
+            content = item.get_content()
+            if not text_cleaner.may_remove_text:
+                if has_text(content):
+                    items.append(item)
+            elif parse_document_text(content, self.config, text_cleaner, break_string).strip():
+                items.append(item)
+        return items
+
+    def _parse_documents(self, items, text_cleaner, break_string, hits) -> Iterator[Tuple[str, str]]:
+        worker_count = self.config.parse_worker_count or os.cpu_count() or 1
+        if worker_count > 1 and len(items) >= PARALLEL_PARSE_MIN_DOCUMENTS:
+            yield from self._parse_documents_parallel(items, text_cleaner, break_string, hits, worker_count)
+            return
+        for item in items:
+            yield parse_document(item.get_content(), self.config, text_cleaner, break_string, hits)
+
+    def _parse_documents_parallel(self, items, text_cleaner, break_string, hits, worker_count):
+        """
+        Parse the documents in a process pool and yield them in book order.
+
+        Only a window of documents is submitted ahead of the one yielded, so a consumer that stops early (e.g. at
+        chapter_end) doesn't wait for the whole book.
+        """
+        logger.info(f"Parsing {len(items)} documents with {worker_count} processes")
+        # Spawned instead of forked, the book may be parsed in a thread next to running worker pools
+        executor = ProcessPoolExecutor(
+            max_workers=worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_parse_worker,
+            initargs=(self.config, text_cleaner.search_and_replace_rules.rules, break_string),
+        )
+        try:
+            pending = collections.deque()
+            for item in items:
+                pending.append(executor.submit(parse_document_in_worker, item.get_content()))
+                if len(pending) >= worker_count * PARALLEL_PARSE_DOCUMENTS_AHEAD:
+                    yield self._get_parsed_document(pending.popleft(), hits)
+            while pending:
+                yield self._get_parsed_document(pending.popleft(), hits)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _get_parsed_document(future, hits) -> Tuple[str, str]:
+        chapter, document_hits = future.result()
+        hits.update(document_hits)
+        return chapter
+
+    def get_search_and_replace_rules(self) -> SearchAndReplaceRules:
+        if self.search_and_replace_rules is None:
+            self.search_and_replace_rules = load_search_and_replace_rules(self.config.search_and_replace_file)
+        return self.search_and_replace_rules
+
+    def get_text_cleaner(self) -> TextCleaner:
+        if self.text_cleaner is None:
+            self.text_cleaner = TextCleaner(self.config, self.get_search_and_replace_rules())
+        return self.text_cleaner
 
     @staticmethod
     def _sanitize_title(title, break_string) -> str:
-        # replace MAGIC_BREAK_STRING with a blank space
-        # strip incase leading bank is missing
-        title = title.replace(break_string, " ")
-        sanitized_title = re.sub(r"[^\w\s]", "", title, flags=re.UNICODE)
-        sanitized_title = re.sub(r"\s+", "_", sanitized_title.strip())
-        return sanitized_title
+        return sanitize_title(title, break_string)
+
+
+def parse_document(
+    content: bytes, config: GeneralConfig, text_cleaner: TextCleaner, break_string, hits=None
+) -> Tuple[str, str]:
+    """Title and cleaned text of a single document of the book, a module function so it can run in a worker process."""
+    raw, tag_title = get_text_extractor(config.text_extractor)(content)
+    logger.debug("Raw text: <%s>", raw)
+    cleaned_text = text_cleaner.clean(raw, break_string, hits)
+    return get_chapter_title(tag_title, cleaned_text, config.title_mode, break_string), cleaned_text
+
+
+def parse_document_with_hits(
+    content: bytes, config: GeneralConfig, text_cleaner: TextCleaner, break_string
+) -> Tuple[Tuple[str, str], collections.Counter]:
+    """parse_document for a worker process, returning the search and replace hits of the document with its chapter."""
+    hits = collections.Counter()
+    return parse_document(content, config, text_cleaner, break_string, hits), hits
+
+
+def init_parse_worker(config: GeneralConfig, search_and_replace_rules: List[Tuple[str, str]], break_string):
+    """
+    Set up a parse worker process, the text cleaner and its search and replace rules are built once per worker.
+
+    The rules are sent as plain (search, replace) pairs and compiled here, the documents are then submitted alone.
+    """
+    global parse_worker_state
+    setup_logging(config.log, config.log_file, True)
+    text_cleaner = TextCleaner(config, SearchAndReplaceRules(search_and_replace_rules))
+    parse_worker_state = (config, text_cleaner, break_string)
+
+
+def parse_document_in_worker(content: bytes) -> Tuple[Tuple[str, str], collections.Counter]:
+    """parse_document_with_hits with the state set up by init_parse_worker."""
+    config, text_cleaner, break_string = parse_worker_state
+    return parse_document_with_hits(content, config, text_cleaner, break_string)
+
+
+def parse_document_text(content: bytes, config: GeneralConfig, text_cleaner: TextCleaner, break_string) -> str:
+    """Cleaned text of a single document of the book, without its title."""
+    raw, _ = get_text_extractor(config.text_extractor)(content)
+    return text_cleaner.clean(raw, break_string)
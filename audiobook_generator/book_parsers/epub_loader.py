@@ -0,0 +1,147 @@
+import posixpath
+import threading
+import zipfile
+from collections import defaultdict
+from typing import List
+from urllib.parse import unquote
+
+from ebooklib import epub
+from ebooklib.utils import parse_string
+from lxml import etree
+
+NAMESPACES = epub.NAMESPACES
+# Media type of the documents of a book, every other item (images, fonts, styles, ...) is never read
+DOCUMENT_MEDIA_TYPE = "application/xhtml+xml"
+
+
+class EpubDocument:
+    """
+    Handle of a document of an EPUB. The document is only inflated from the zip when its content is requested.
+
+    The content is rendered by the ebooklib item class the document would get from epub.read_epub, so it is
+    the same content as the one of the book's items with ebooklib.
+    """
+
+    def __init__(self, loader: "EpubLoader", item_id, file_name, path, properties):
+        self.loader = loader
+        self.id = item_id
+        self.file_name = file_name
+        self.path = path
+        self.properties = properties
+
+    def __repr__(self) -> str:
+        return f"EpubDocument(file_name={self.file_name})"
+
+    def get_name(self):
+        return self.file_name
+
+    def get_content(self) -> bytes:
+        if "nav" in self.properties:
+            item = epub.EpubNav(uid=self.id, file_name=self.file_name)
+        elif "cover" in self.properties:
+            item = epub.EpubCoverHtml()
+        else:
+            item = epub.EpubHtml()
+            item.id = self.id
+            item.file_name = self.file_name
+            item.media_type = DOCUMENT_MEDIA_TYPE
+            item.properties = self.properties
+        item.content = self.loader.read_file(self.path)
+        item.book = self.loader.template_book
+        return item.get_content()
+
+
+class EpubLoader:
+    """
+    Selective EPUB reader: reads the container and the OPF package of the book, and only the documents
+    on demand, one at a time. Unlike epub.read_epub, which inflates and keeps every item of the book,
+    images, fonts and other resources are never read.
+
+    Documents are listed in the order of the manifest, the same order as the documents of the book
+    read by epub.read_epub.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+        self.zip_file = None
+        # Book providing the templates ebooklib renders documents with
+        self.template_book = epub.EpubBook()
+
+        opf_file = self._get_opf_file()
+        package = parse_string(self.read_file(opf_file))
+        self.metadata = self._load_metadata(package)
+        self.documents = self._load_documents(package, posixpath.dirname(opf_file))
+
+    def __getstate__(self):
+        # The zip file is opened again on demand after unpickling
+        state = self.__dict__.copy()
+        state["zip_file"] = None
+        state["lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def get_metadata(self, namespace, name):
+        """Metadata values of the book as (value, attributes) tuples, like EpubBook.get_metadata."""
+        namespace = NAMESPACES.get(namespace, namespace)
+        return self.metadata[namespace].get(name, [])
+
+    def get_documents(self) -> List[EpubDocument]:
+        return self.documents
+
+    def read_file(self, name) -> bytes:
+        with self.lock:
+            if self.zip_file is None:
+                try:
+                    self.zip_file = zipfile.ZipFile(self.file_name, "r")
+                except zipfile.BadZipFile:
+                    raise epub.EpubException(0, "Bad Zip file")
+            return self.zip_file.read(posixpath.normpath(name))
+
+    def close(self):
+        with self.lock:
+            if self.zip_file is not None:
+                self.zip_file.close()
+                self.zip_file = None
+
+    def _get_opf_file(self):
+        container = parse_string(self.read_file("META-INF/container.xml"))
+        opf_file = None
+        for root_file in container.findall(
+                ".//xmlns:rootfile[@media-type]", namespaces={"xmlns": NAMESPACES["CONTAINERNS"]}):
+            if root_file.get("media-type") == "application/oebps-package+xml":
+                opf_file = root_file.get("full-path")
+        if opf_file is None:
+            raise epub.EpubException(-1, "Can not find container file")
+        return opf_file
+
+    @staticmethod
+    def _load_metadata(package):
+        metadata = defaultdict(dict)
+        element = package.find(f"{{{NAMESPACES['OPF']}}}metadata")
+        if element is None:
+            return metadata
+        for child in element:
+            if not etree.iselement(child) or not isinstance(child.tag, str) or child.tag == f"{{{NAMESPACES['OPF']}}}meta":
+                continue
+            name = etree.QName(child)
+            metadata[name.namespace].setdefault(name.localname, []).append((child.text, dict(child.items())))
+        return metadata
+
+    def _load_documents(self, package, opf_dir):
+        documents = []
+        manifest = package.find(f"{{{NAMESPACES['OPF']}}}manifest")
+        if manifest is None:
+            return documents
+        for item in manifest:
+            if item.tag != f"{{{NAMESPACES['OPF']}}}item" or item.get("media-type") != DOCUMENT_MEDIA_TYPE:
+                continue
+            href = item.get("href")
+            properties = item.get("properties", "").split(" ") if item.get("properties") else []
+            # ebooklib reads navigation documents from the quoted href
+            path = posixpath.join(opf_dir, href if "nav" in properties else unquote(href))
+            documents.append(EpubDocument(self, item.get("id"), unquote(href), path, properties))
+        return documents
@@ -0,0 +1,160 @@
+import logging
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Search of a literal word rule, e.g. \bCrusoe\b==Kruso, the kind of rule pronunciation lexicons consist of
+WORD_RULE = re.compile(r"\\b(\w+)\\b")
+WORD = re.compile(r"\w+")
+
+
+class _WordLexicon:
+    """
+    Consecutive literal word rules, applied in a single pass with one trie-shaped regex of all their words.
+
+    A word rule only matches whole words and its word is surrounded by non-word characters, so applying the rules
+    one after the other changes every word of the text independently of the rest of the text. The result of all
+    rules for each word of the lexicon, including words replaced again by later rules, is computed once up front.
+    """
+
+    def __init__(self, rules: List[Tuple[int, str, str]]):
+        # Indices of the rules of every word, in rule order, and the replacement of every rule
+        self.word_rules = defaultdict(list)
+        self.replaces = {}
+        for index, word, replace in rules:
+            self.word_rules[word].append(index)
+            self.replaces[index] = replace
+        self.expanded = {}
+        # Word -> (result of all rules, indices of the rules applied)
+        self.mapping = {word: self._expand_word(word, rule_indices[0]) for word, rule_indices in self.word_rules.items()}
+        self.pattern = re.compile(rf"\b{get_trie_pattern(self.mapping)}\b")
+
+    def apply(self, text: str, hits: Optional[Counter]) -> str:
+        if hits is None:
+            return self.pattern.sub(lambda match: self.mapping[match.group()][0], text)
+
+        def replace(match):
+            replacement, rule_indices = self.mapping[match.group()]
+            hits.update(rule_indices)
+            return replacement
+
+        return self.pattern.sub(replace, text)
+
+    def _expand_word(self, word, start) -> Tuple[str, Tuple[int, ...]]:
+        # Result of the rules from index start on for a whole word
+        key = (word, start)
+        if key not in self.expanded:
+            rule_indices = self.word_rules.get(word, [])
+            position = bisect_left(rule_indices, start)
+            if position == len(rule_indices):
+                self.expanded[key] = (word, ())
+            else:
+                index = rule_indices[position]
+                replacement, applied = self._expand_text(self.replaces[index], index + 1)
+                self.expanded[key] = (replacement, (index,) + applied)
+        return self.expanded[key]
+
+    def _expand_text(self, text, start) -> Tuple[str, Tuple[int, ...]]:
+        applied = []
+
+        def replace(match):
+            replacement, rule_indices = self._expand_word(match.group(), start)
+            applied.extend(rule_indices)
+            return replacement
+
+        return WORD.sub(replace, text), tuple(applied)
+
+
+class _RegexRule:
+    def __init__(self, index: int, search: str, replace: str):
+        self.index = index
+        self.pattern = re.compile(search)
+        self.replace = replace
+
+    def apply(self, text: str, hits: Optional[Counter]) -> str:
+        text, count = self.pattern.subn(self.replace, text)
+        if hits is not None and count:
+            hits[self.index] += count
+        return text
+
+
+def get_trie_pattern(words) -> str:
+    """Regex matching exactly the given words, with alternatives sharing their prefixes."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _get_node_pattern(trie)
+
+
+def _get_node_pattern(node: Dict[str, dict]) -> str:
+    branches = [re.escape(char) + _get_node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if "" in node:
+        return f"(?:{'|'.join(branches)})?"
+    if len(branches) == 1:
+        return branches[0]
+    return f"(?:{'|'.join(branches)})"
+
+
+class SearchAndReplaceRules:
+    """
+    User defined search and replace rules (<search>==<replace>), compiled once and applied in rule order.
+
+    Runs of literal word rules (\\bword\\b==replacement without backreferences) are merged into one word lexicon
+    applied in a single pass, every other rule is applied with its own precompiled regex. The result is the same
+    as applying every rule with re.sub one after the other.
+    """
+
+    def __init__(self, rules: List[Tuple[str, str]]):
+        self.rules = rules
+        self.stages = []
+        word_rules = []
+        for index, (search, replace) in enumerate(rules):
+            match = WORD_RULE.fullmatch(search)
+            if match and "\\" not in replace:
+                word_rules.append((index, match.group(1), replace))
+                continue
+            if word_rules:
+                self.stages.append(_WordLexicon(word_rules))
+                word_rules = []
+            self.stages.append(_RegexRule(index, search, replace))
+        if word_rules:
+            self.stages.append(_WordLexicon(word_rules))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __str__(self) -> str:
+        word_rule_count = sum(len(stage.replaces) for stage in self.stages if isinstance(stage, _WordLexicon))
+        return f"SearchAndReplaceRules(rules={len(self.rules)}, word_rules={word_rule_count}, stages={len(self.stages)})"
+
+    def apply(self, text: str, hits: Optional[Counter] = None) -> str:
+        """Apply all rules to the text, counting the replacements of every rule by rule index in hits if given."""
+        for stage in self.stages:
+            text = stage.apply(text, hits)
+        return text
+
+    def log_hits(self, hits: Counter):
+        logger.info(f"Search and replace: {sum(hits.values())} replacements by {len(hits)} of {len(self.rules)} rules")
+        for index, (search, replace) in enumerate(self.rules):
+            logger.debug(f"Search and replace rule {index + 1} <{search}> -> <{replace}>: {hits[index]} hits")
+
+
+def load_search_and_replace_rules(file_name) -> SearchAndReplaceRules:
+    rules = []
+    if file_name:
+        with open(file_name) as fp:
+            for line in fp.readlines():
+                if '==' in line and not line.startswith('==') and not line.endswith('==') and not line.startswith('#'):
+                    rules.append((line.split('==')[0], line.split('==')[1][:-1]))
+    rules = SearchAndReplaceRules(rules)
+    if rules:
+        logger.info(f"Loaded {rules} from {file_name}")
+    return rules
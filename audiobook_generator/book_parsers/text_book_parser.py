@@ -0,0 +1,159 @@
+import logging
+import os
+import re
+from collections import Counter
+from typing import Iterator, List, Tuple
+
+from audiobook_generator.book_parsers.base_book_parser import BaseBookParser, get_chapter_title
+from audiobook_generator.book_parsers.search_and_replace import SearchAndReplaceRules, load_search_and_replace_rules
+from audiobook_generator.book_parsers.text_cleaner import TextCleaner
+from audiobook_generator.config.general_config import GeneralConfig
+
+logger = logging.getLogger(__name__)
+
+# Project Gutenberg header and footer markers, the content of the book is between them
+GUTENBERG_START_MARKERS = ("*** START OF", "***START OF")
+GUTENBERG_END_MARKERS = ("*** END OF", "***END OF")
+# Fields of the Project Gutenberg header
+GUTENBERG_HEADER_FIELD = re.compile(r"^(Title|Author):\s*(.*\S)")
+# Chapter headings, the same as GutenbergUtils._split_text_into_chapters detects
+CHAPTER_HEADING = re.compile(r'^\s*(CHAPTER|Chapter|KAPITTEL)\s*([IVX]+|\d+)')
+# Texts without chapter headings are split into about this many chapters, of at least MIN_WORDS_PER_CHAPTER words
+CHAPTERS_WITHOUT_HEADINGS = 10
+MIN_WORDS_PER_CHAPTER = 2000
+
+
+class TextBookParser(BaseBookParser):
+    """
+    Parser for plain text books (.txt), e.g. from Project Gutenberg, streaming the file line by line.
+
+    The content of the book is found like GutenbergUtils.clean_gutenberg_text does: between the Project Gutenberg
+    header and footer, or from the first line mentioning a chapter. It is split into chapters at the chapter headings
+    GutenbergUtils._split_text_into_chapters detects, or by length if there are none. Only the lines of the chapter
+    being parsed are held in memory.
+    """
+
+    def __init__(self, config: GeneralConfig):
+        super().__init__(config)
+        self.metadata = {}  # Project Gutenberg header fields
+        self.content_start, self.content_end = self._find_content()
+        self.search_and_replace_rules = None  # compiled on first use
+        self.text_cleaner = None  # built on first use
+
+    def __str__(self) -> str:
+        return super().__str__()
+
+    def validate_config(self):
+        if self.config.input_file is None:
+            raise ValueError("Text Parser: Input file cannot be empty")
+        if not self.config.input_file.endswith(".txt"):
+            raise ValueError(f"Text Parser: Unsupported file format: {self.config.input_file}")
+
+    def get_book(self):
+        return self.config.input_file
+
+    def get_book_title(self) -> str:
+        if self.metadata.get("Title"):
+            return self.metadata["Title"]
+        return os.path.splitext(os.path.basename(self.config.input_file))[0]
+
+    def get_book_author(self) -> str:
+        if self.metadata.get("Author"):
+            return self.metadata["Author"]
+        return "Unknown"
+
+    def get_chapters(self, break_string) -> List[Tuple[str, str]]:
+        return list(self.iter_chapters(break_string))
+
+    def iter_chapters(self, break_string) -> Iterator[Tuple[str, str]]:
+        text_cleaner = self.get_text_cleaner()
+        hits = Counter()
+        for heading, lines in self.iter_chapter_lines():
+            cleaned_text = text_cleaner.clean("\n".join(lines), break_string, hits)
+            yield get_chapter_title(heading, cleaned_text, self.config.title_mode, break_string), cleaned_text
+        if text_cleaner.search_and_replace_rules:
+            text_cleaner.search_and_replace_rules.log_hits(hits)
+
+    def get_search_and_replace_rules(self) -> SearchAndReplaceRules:
+        if self.search_and_replace_rules is None:
+            self.search_and_replace_rules = load_search_and_replace_rules(self.config.search_and_replace_file)
+        return self.search_and_replace_rules
+
+    def get_text_cleaner(self) -> TextCleaner:
+        if self.text_cleaner is None:
+            self.text_cleaner = TextCleaner(self.config, self.get_search_and_replace_rules())
+        return self.text_cleaner
+
+    def _open(self):
+        return open(self.config.input_file, encoding="utf-8-sig", errors="replace")
+
+    def _find_content(self) -> Tuple[int, int]:
+        """Line range of the content of the book, reading the fields of the Project Gutenberg header on the way."""
+        start = None
+        end = None
+        line_count = 0
+        header = {}
+        with self._open() as f:
+            for line_number, line in enumerate(f):
+                line_count += 1
+                upper_line = line.upper()
+                if start is None:
+                    if any(marker in upper_line for marker in GUTENBERG_START_MARKERS):
+                        start = line_number + 1
+                    elif "CHAPTER" in upper_line:
+                        start = line_number
+                    elif match := GUTENBERG_HEADER_FIELD.match(line):
+                        header.setdefault(match.group(1), match.group(2))
+                # The footer starts at the last end marker
+                if any(marker in upper_line for marker in GUTENBERG_END_MARKERS):
+                    end = line_number
+        if start is None:
+            # No header, the whole text is the content
+            return 0, line_count if end is None else end
+        self.metadata = header
+        return start, line_count if end is None else end
+
+    def _iter_content_lines(self) -> Iterator[str]:
+        with self._open() as f:
+            for line_number, line in enumerate(f):
+                if line_number >= self.content_end:
+                    return
+                if line_number >= self.content_start:
+                    yield line.rstrip("\n")
+
+    def iter_chapter_lines(self) -> Iterator[Tuple[str, List[str]]]:
+        """Heading and lines of every chapter, the text before the first chapter heading is left out."""
+        heading = None
+        lines = None
+        word_count = 0
+        for line in self._iter_content_lines():
+            match = CHAPTER_HEADING.match(line)
+            if match:
+                if lines is not None:
+                    yield heading, lines
+                heading = match.group(0).strip()
+                lines = [line]
+            elif lines is not None:
+                lines.append(line)
+            else:
+                word_count += len(line.split())
+        if lines is not None:
+            yield heading, lines
+            return
+
+        # No chapter headings, the content is read again and split by length at the end of a line
+        words_per_chapter = max(MIN_WORDS_PER_CHAPTER, word_count // CHAPTERS_WITHOUT_HEADINGS)
+        logger.info(f"No chapter headings found, splitting {word_count} words into chapters of {words_per_chapter} words")
+        chapter_count = 0
+        lines = []
+        chapter_words = 0
+        for line in self._iter_content_lines():
+            lines.append(line)
+            chapter_words += len(line.split())
+            if chapter_words >= words_per_chapter:
+                chapter_count += 1
+                yield f"Chapter {chapter_count}", lines
+                lines = []
+                chapter_words = 0
+        if chapter_words:
+            yield f"Chapter {chapter_count + 1}", lines
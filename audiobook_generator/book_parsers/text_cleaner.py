@@ -0,0 +1,70 @@
+import logging
+import re
+from collections import Counter
+from typing import Optional
+
+from audiobook_generator.book_parsers.search_and_replace import SearchAndReplaceRules
+from audiobook_generator.config.general_config import GeneralConfig
+
+logger = logging.getLogger(__name__)
+
+NEWLINE_PATTERNS = {
+    "single": re.compile(r"\n+"),
+    "double": re.compile(r"\n\n+"),
+    # Newlines are collapsed with all other whitespace
+    "none": None,
+}
+# End-note numbers: digits directly after a letter or punctuation. Same matches as
+# (?<=[a-zA-Z.,!?;”")])\d+, but starting with the digit lets the regex engine skip to the digits of the text
+# instead of testing the lookbehind at every position.
+ENDNOTE_PATTERN = re.compile(r'\d(?<=[a-zA-Z.,!?;”")]\d)\d*')
+# References numbers like [1] or [2.3]
+REFERENCE_NUMBER_PATTERN = re.compile(r'\[\d+(\.\d+)?\]')
+
+
+class TextCleaner:
+    """
+    Cleaning of the text of the documents of a book, built once per parser with the patterns of its options
+    precompiled.
+
+    Whitespace is collapsed in the same pass as newlines in "none" newline mode, and with str.split instead of
+    a regex in the other modes. Debug logging of the text only formats it if debug logging is enabled.
+    """
+
+    def __init__(self, config: GeneralConfig, search_and_replace_rules: SearchAndReplaceRules):
+        if config.newline_mode not in NEWLINE_PATTERNS:
+            raise ValueError(f"Invalid newline mode: {config.newline_mode}")
+        self.newline_pattern = NEWLINE_PATTERNS[config.newline_mode]
+        self.remove_endnotes = config.remove_endnotes
+        self.remove_reference_numbers = config.remove_reference_numbers
+        self.search_and_replace_rules = search_and_replace_rules
+
+    @property
+    def may_remove_text(self) -> bool:
+        """Whether cleaning may remove all the text of a document that has text."""
+        return bool(self.remove_endnotes or self.remove_reference_numbers or len(self.search_and_replace_rules) > 0)
+
+    def clean(self, raw: str, break_string, hits: Optional[Counter] = None) -> str:
+        # Replace excessive whitespaces and newline characters based on the mode
+        cleaned_text = raw.strip()
+        if self.newline_pattern is not None:
+            cleaned_text = self.newline_pattern.sub(break_string, cleaned_text)
+            logger.debug("Cleaned text step 1: <%s>", cleaned_text)
+        # Same as re.sub(r"\s+", " ", ...) (both use str.isspace), the text has no leading or trailing whitespace left
+        cleaned_text = " ".join(cleaned_text.split())
+        logger.debug("Cleaned text step 2: <%s>", cleaned_text[:100])
+
+        # Removes end-note numbers
+        if self.remove_endnotes:
+            cleaned_text = ENDNOTE_PATTERN.sub("", cleaned_text)
+            logger.debug("Cleaned text step 4: <%s>", cleaned_text[:100])
+
+        # Removes references numbers like [1] or [2.3]
+        if self.remove_reference_numbers:
+            cleaned_text = REFERENCE_NUMBER_PATTERN.sub("", cleaned_text)
+            logger.debug("Cleaned text step 4.1 (removed brackets): <%s>", cleaned_text[:100])
+
+        # Does user defined search and replaces
+        cleaned_text = self.search_and_replace_rules.apply(cleaned_text, hits)
+        logger.debug("Cleaned text step 5: <%s>", cleaned_text[:100])
+        return cleaned_text
@@ -0,0 +1,148 @@
+from typing import Callable, Dict, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+# Text extractors for the documents of a book, selected by the text_extractor option
+TEXT_EXTRACTOR_BS4 = "bs4"
+TEXT_EXTRACTOR_LXML = "lxml"
+
+# Tags holding the title of a document, in order of preference
+TITLE_TAGS = ("title", "h1", "h2", "h3")
+# Whitespace-only strings of these characters are collapsed, same as BeautifulSoup does
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+def extract_text_bs4(content: bytes) -> Tuple[str, Optional[str]]:
+    """
+    Text of an XHTML document and the text of its title tag (the first of TITLE_TAGS found, None if there is none),
+    using a BeautifulSoup tree.
+    """
+    soup = BeautifulSoup(content, "lxml-xml")
+    text = soup.get_text(strip=False)
+    title = None
+    for level in TITLE_TAGS:
+        tag = soup.find(level)
+        if tag:
+            title = tag.text
+            break
+    soup.decompose()
+    return text, title
+
+
+class _TextCollector:
+    """
+    Parser target for lxml collecting the text of a document in one pass, without building a tree.
+
+    Mirrors how BeautifulSoup builds its strings with the lxml-xml parser: the character data between two
+    tags, comments or processing instructions forms one string, a whitespace-only string is collapsed to
+    a newline or space, and comments, processing instructions and doctypes are left out.
+    """
+
+    def __init__(self):
+        self.strings = []
+        # Character data of the string being read
+        self.pending = []
+        # Strings of the first tag of each of TITLE_TAGS, and the nesting depth of those still open
+        self.titles = {}
+        self.open_titles = {}
+
+    def _end_string(self):
+        if not self.pending:
+            return
+        string = "".join(self.pending)
+        self.pending = []
+        if not string.strip(ASCII_SPACES):
+            string = "\n" if "\n" in string else " "
+        self.strings.append(string)
+        for level in self.open_titles:
+            self.titles[level].append(string)
+
+    def start(self, tag, attrib):
+        self._end_string()
+        name = tag.rpartition("}")[2]
+        if name in self.open_titles:
+            self.open_titles[name] += 1
+        elif name in TITLE_TAGS and name not in self.titles:
+            self.titles[name] = []
+            self.open_titles[name] = 1
+
+    def end(self, tag):
+        self._end_string()
+        name = tag.rpartition("}")[2]
+        if name in self.open_titles:
+            self.open_titles[name] -= 1
+            if self.open_titles[name] == 0:
+                del self.open_titles[name]
+
+    def data(self, data):
+        self.pending.append(data)
+
+    def comment(self, text):
+        self._end_string()
+
+    def pi(self, target, data=None):
+        self._end_string()
+
+    def doctype(self, name, pubid, system):
+        self._end_string()
+
+    def close(self):
+        self._end_string()
+        title = next(("".join(self.titles[level]) for level in TITLE_TAGS if level in self.titles), None)
+        return "".join(self.strings), title
+
+
+def extract_text_lxml(content: bytes) -> Tuple[str, Optional[str]]:
+    """
+    Same as extract_text_bs4, streaming the document through the lxml parser instead of building a tree.
+
+    Falls back to extract_text_bs4 for documents lxml can't decode, which BeautifulSoup retries with other encodings.
+    """
+    parser = etree.XMLParser(target=_TextCollector(), recover=True)
+    try:
+        parser.feed(content)
+        return parser.close()
+    except (UnicodeDecodeError, LookupError, etree.ParserError, etree.XMLSyntaxError):
+        return extract_text_bs4(content)
+
+
+class _TextFound(Exception):
+    pass
+
+
+class _TextDetector(_TextCollector):
+    """Parser target stopping at the first string that isn't whitespace."""
+
+    def data(self, data):
+        if data.strip():
+            raise _TextFound()
+
+
+def has_text(content: bytes) -> bool:
+    """Whether the text of a document (as extracted by extract_text_bs4) isn't blank, reading only up to its first text."""
+    parser = etree.XMLParser(target=_TextDetector(), recover=True)
+    try:
+        parser.feed(content)
+        parser.close()
+        return False
+    except _TextFound:
+        return True
+    except (UnicodeDecodeError, LookupError, etree.ParserError, etree.XMLSyntaxError):
+        return bool(extract_text_bs4(content)[0].strip())
+
+
+TEXT_EXTRACTORS: Dict[str, Callable[[bytes], Tuple[str, Optional[str]]]] = {
+    TEXT_EXTRACTOR_BS4: extract_text_bs4,
+    TEXT_EXTRACTOR_LXML: extract_text_lxml,
+}
+
+
+def get_supported_text_extractors():
+    return list(TEXT_EXTRACTORS)
+
+
+def get_text_extractor(name) -> Callable[[bytes], Tuple[str, Optional[str]]]:
+    if name not in TEXT_EXTRACTORS:
+        raise ValueError(f"Unsupported text extractor: {name}")
+    return TEXT_EXTRACTORS[name]
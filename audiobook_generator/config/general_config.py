@@ -9,8 +9,16 @@ class GeneralConfig:
         self.log_file = None
         self.no_prompt = getattr(args, 'no_prompt', None)
         self.worker_count = getattr(args, 'worker_count', None)
+        self.chunk_concurrency = getattr(args, 'chunk_concurrency', 1)
+        self.engine = getattr(args, 'engine', 'process')
+        self.async_concurrency = getattr(args, 'async_concurrency', 64)
+        self.max_requests_per_second = getattr(args, 'max_requests_per_second', None)
+        self.max_chars_per_second = getattr(args, 'max_chars_per_second', None)
         self.use_pydub_merge = getattr(args, 'use_pydub_merge', None)
         self.one_file_output = getattr(args, 'one_file_output', False)
+        self.resume = getattr(args, 'resume', None)
+        self.tts_cache_dir = getattr(args, 'tts_cache_dir', None)
+        self.tts_cache_max_size = getattr(args, 'tts_cache_max_size', 2048)
 
         # Book parser specific arguments
         self.title_mode = getattr(args, 'title_mode', None)
@@ -20,6 +28,9 @@ class GeneralConfig:
         self.remove_endnotes = getattr(args, 'remove_endnotes', None)
         self.remove_reference_numbers = getattr(args, 'remove_reference_numbers', None)
         self.search_and_replace_file = getattr(args, 'search_and_replace_file', None)
+        self.text_extractor = getattr(args, 'text_extractor', 'bs4')
+        self.parse_worker_count = getattr(args, 'parse_worker_count', None)
+        self.parse_cache_dir = getattr(args, 'parse_cache_dir', None)
 
         # TTS provider: common arguments
         self.tts = getattr(args, 'tts', None)
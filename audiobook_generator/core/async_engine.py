@@ -0,0 +1,72 @@
+import asyncio
+import logging
+
+from audiobook_generator.core.audiobook_generator import get_chunk_file
+from audiobook_generator.core.synthesis_job import ChunkJob
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEngine:
+    """
+    Synthesizes chunk jobs on a single event loop, with the async client of the TTS provider.
+
+    Network TTS providers spend nearly all their time waiting for responses, so one process with many requests
+    in flight replaces a pool of worker processes. A semaphore limits the number of concurrent requests.
+    """
+
+    def __init__(self, config, tts_provider, tts_cache, concurrency: int):
+        self.config = config
+        self.tts_provider = tts_provider
+        self.tts_cache = tts_cache
+        self.concurrency = concurrency
+        self.semaphore = None  # created inside the running event loop
+        self.tasks = set()
+
+    def __str__(self) -> str:
+        return f"AsyncEngine(tts_provider={self.tts_provider.config.tts}, concurrency={self.concurrency})"
+
+    async def process_chunk(self, job: ChunkJob):
+        """Synthesize a single chunk and write it to the chunks folder, same as process_chunk of the worker pool."""
+        async with self.semaphore:
+            try:
+                synthesis_params = self.tts_provider.get_synthesis_params()
+                text = job.get_text()
+
+                audio_segment = self.tts_cache.get(text, synthesis_params) if self.tts_cache else None
+                cache_hit = audio_segment is not None
+                if cache_hit:
+                    logger.info(f"Using cached audio for {job.chunk_id}")
+                else:
+                    audio_segment = await self.tts_provider.synthesize_chunk_async(text, job.chunk_id)
+                    if self.tts_cache:
+                        self.tts_cache.put(text, synthesis_params, audio_segment)
+
+                chunk_file = get_chunk_file(self.config, job.idx, job.chunk_number, self.tts_provider)
+                with open(chunk_file, "wb") as f:
+                    f.write(audio_segment.getbuffer())
+                logger.debug(f"Chunk {job.chunk_id} written to {chunk_file}")
+
+                return job.idx, job.chunk_number, True, cache_hit
+            except Exception as e:
+                logger.exception(f"Error processing chunk {job.chunk_number} of chapter {job.idx}, error: {e}")
+                return job.idx, job.chunk_number, False, False
+
+    def submit(self, job: ChunkJob, callback) -> asyncio.Task:
+        """
+        Start synthesizing a chunk job on the running event loop, callback receives its
+        (chapter idx, chunk number, success, cache hit) result once it finishes.
+        """
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+        task = asyncio.create_task(self.process_chunk(job))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        task.add_done_callback(lambda done: done.cancelled() or callback(done.result()))
+        return task
+
+    async def close(self):
+        """Cancel the unfinished jobs, only left on errors or cancellation, and close the client of the provider."""
+        for task in list(self.tasks):
+            task.cancel()
+        await self.tts_provider.close_async()
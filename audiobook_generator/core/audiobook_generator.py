@@ -1,17 +1,44 @@
+import asyncio
+import collections
+import copy
+import io
 import logging
 import multiprocessing
 import os
 import glob
-from pydub import AudioSegment
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+from audiobook_generator.book_parsers.base_book_parser import check_chapter_range, get_book_parser
+from audiobook_generator.book_parsers.book_estimator import estimate_book
 from audiobook_generator.config.general_config import GeneralConfig
 from audiobook_generator.core.audio_tags import AudioTags
-from audiobook_generator.tts_providers.base_tts_provider import get_tts_provider
+from audiobook_generator.core.chapter_store import ChapterStore, get_text
+from audiobook_generator.core.pipeline import ChapterProducer, ParsedChapter, END_OF_CHAPTERS
+from audiobook_generator.core.manifest import ConversionManifest, hash_text, STATUS_DONE, STATUS_FAILED
+from audiobook_generator.core.synthesis_job import ChapterJob, ChunkJob, ChunkBatchJob, MergeJob
+from audiobook_generator.tts_providers.base_tts_provider import get_tts_provider, get_chunk_id
+from audiobook_generator.utils.audio_concat import concat_audio_files
 from audiobook_generator.utils.log_handler import setup_logging
+from audiobook_generator.utils.rate_limiter import get_rate_limiter
+from audiobook_generator.utils.tts_cache import get_tts_cache
 
 logger = logging.getLogger(__name__)
 
+# Sub folder of the output folder holding synthesized chunks until their chapter is assembled
+CHUNKS_FOLDER = ".chunks"
+
+# Execution engines: a pool of worker processes, or a single event loop driving the async clients
+# of network TTS providers
+ENGINE_PROCESS = "process"
+ENGINE_ASYNC = "async"
+
+# TTS provider and TTS cache of the current worker process, created once and reused for all of its tasks
+_worker_tts_provider = None
+_worker_tts_cache = None
+# Rate limiter shared by all worker processes, handed over by the pool initializer
+_worker_rate_limiter = None
+
 
 def confirm_conversion():
     logger.info("Do you want to continue? (y/n)")
@@ -21,57 +48,422 @@ def confirm_conversion():
         exit(0)
 
 
-def get_total_chars(chapters):
-    total_characters = 0
-    for title, text in chapters:
-        total_characters += len(text)
-    return total_characters
+def init_worker(log_level, log_file, rate_limiter):
+    global _worker_rate_limiter
+    setup_logging(log_level, log_file, True)
+    _worker_rate_limiter = rate_limiter
+
+
+def get_worker_tts_provider(config):
+    global _worker_tts_provider
+    if _worker_tts_provider is None:
+        _worker_tts_provider = get_tts_provider(config)
+        if _worker_rate_limiter is not None:
+            _worker_tts_provider.set_rate_limiter(_worker_rate_limiter)
+    return _worker_tts_provider
+
+
+def get_worker_tts_cache(config, tts_provider):
+    global _worker_tts_cache
+    if _worker_tts_cache is None:
+        _worker_tts_cache = get_tts_cache(config, tts_provider)
+    return _worker_tts_cache
+
+
+def get_chapter_output_file(config, idx, title, tts_provider):
+    return os.path.join(
+        config.output_folder,
+        f"{idx:04d}_{title}.{tts_provider.get_output_file_extension()}",
+    )
+
+
+def get_chunk_file(config, idx, chunk_number, tts_provider):
+    return os.path.join(
+        config.output_folder,
+        CHUNKS_FOLDER,
+        f"{idx:04d}_{chunk_number:04d}.{tts_provider.get_output_file_extension()}",
+    )
+
+
+def process_chapter(job: ChapterJob):
+    """Convert a whole chapter to audio, used for providers that don't support chunk level synthesis."""
+    try:
+        logger.info(f"Processing chapter {job.idx}: {job.title}")
+        tts_provider = get_worker_tts_provider(job.config)
+
+        # Generate audio file
+        output_file = get_chapter_output_file(job.config, job.idx, job.title, tts_provider)
+        tts_provider.text_to_speech(job.get_text(), output_file, job.get_audio_tags())
+
+        logger.info(f"✅ Converted chapter {job.idx}: {job.title}, output file: {output_file}")
+
+        return True
+    except Exception as e:
+        logger.exception(f"Error processing chapter {job.idx}, error: {e}")
+        return False
+
+
+def process_chunk(job: ChunkJob):
+    """
+    Synthesize a single chunk of a chapter and write it to the chunks folder.
+
+    Returns whether the chunk succeeded and whether it was served from the TTS cache.
+    """
+    try:
+        tts_provider = get_worker_tts_provider(job.config)
+        tts_cache = get_worker_tts_cache(job.config, tts_provider)
+        synthesis_params = tts_provider.get_synthesis_params()
+        text = job.get_text()
+
+        audio_segment = tts_cache.get(text, synthesis_params) if tts_cache else None
+        cache_hit = audio_segment is not None
+        if cache_hit:
+            logger.info(f"Using cached audio for {job.chunk_id}")
+        else:
+            audio_segment = tts_provider.synthesize_chunk(text, job.chunk_id)
+            if tts_cache:
+                tts_cache.put(text, synthesis_params, audio_segment)
+
+        chunk_file = get_chunk_file(job.config, job.idx, job.chunk_number, tts_provider)
+        with open(chunk_file, "wb") as f:
+            f.write(audio_segment.getbuffer())
+        logger.debug(f"Chunk {job.chunk_id} written to {chunk_file}")
+
+        return True, cache_hit
+    except Exception as e:
+        logger.exception(f"Error processing chunk {job.chunk_number} of chapter {job.idx}, error: {e}")
+        return False, False
+
+
+def process_chunk_batch(job: ChunkBatchJob):
+    """Synthesize the chunks of a batch concurrently, the requests are network bound so threads suffice."""
+    with ThreadPoolExecutor(max_workers=len(job.jobs)) as executor:
+        return list(executor.map(process_chunk, job.jobs))
+
+
+def merge_chapter(job: MergeJob, tts_provider=None) -> bool:
+    """
+    Merge the synthesized chunks of a chapter into the chapter output file and remove the chunk files.
+
+    Runs in a worker of the process pool, or in a merge worker of the async engine (both use their own TTS provider).
+    """
+    try:
+        tts_provider = tts_provider or get_worker_tts_provider(job.config)
+        output_file = get_chapter_output_file(job.config, job.idx, job.title, tts_provider)
+
+        audio_segments = []
+        chunk_ids = []
+        for chunk_number in range(1, job.chunk_count + 1):
+            chunk_file = get_chunk_file(job.config, job.idx, chunk_number, tts_provider)
+            with open(chunk_file, "rb") as f:
+                audio_segments.append(io.BytesIO(f.read()))
+            chunk_ids.append(get_chunk_id(job.idx, job.title, chunk_number, job.chunk_count))
+
+        tts_provider.merge_chunks(audio_segments, output_file, job.get_audio_tags(), chunk_ids)
+
+        for chunk_number in range(1, job.chunk_count + 1):
+            os.remove(get_chunk_file(job.config, job.idx, chunk_number, tts_provider))
+
+        logger.info(f"✅ Converted chapter {job.idx}: {job.title}, output file: {output_file}")
+        return True
+    except Exception as e:
+        logger.exception(f"Error assembling chapter {job.idx}, error: {e}")
+        return False
+
+
+def process_job(job):
+    """
+    Worker entry point, chunk jobs and whole chapter jobs share one work queue.
+
+    Returns a list of (chapter idx, chunk number or None for a whole chapter, success, cache hit) results.
+    """
+    if isinstance(job, ChunkBatchJob):
+        return [
+            (chunk_job.idx, chunk_job.chunk_number, *result)
+            for chunk_job, result in zip(job.jobs, process_chunk_batch(job))
+        ]
+    if isinstance(job, ChunkJob):
+        return [(job.idx, job.chunk_number, *process_chunk(job))]
+    return [(job.idx, None, process_chapter(job), False)]
 
 
 class AudiobookGenerator:
     def __init__(self, config: GeneralConfig):
         self.config = config
+        self.manifest = None
+        # Bookkeeping of the chapters in the pipeline
+        self.chapter_hashes = {}  # chapter idx -> (title, text hash)
+        self.chunk_hashes = {}  # (chapter idx, chunk number) -> chunk text hash, while the chunk is pending
+        self.chunk_counts = {}  # chapter idx -> total chunk count, for chapters converted by chunks
+        self.pending_chunks = {}  # chapter idx -> number of chunks still being synthesized
+        self.failed_chapters = []
+        self.failed_chunk_chapters = set()
+        self.chunk_job_count = 0
+        self.cache_hits = 0
 
     def __str__(self) -> str:
         return f"{self.config}"
 
-    def process_chapter(self, idx, title, text, book_parser):
-        """Process a single chapter: write text (if needed) and convert to audio."""
-        try:
-            logger.info(f"Processing chapter {idx}: {title}")
-            tts_provider = get_tts_provider(self.config)
-
-            # Save chapter text if required
-            if self.config.output_text:
-                text_file = os.path.join(self.config.output_folder, f"{idx:04d}_{title}.txt")
-                with open(text_file, "w", encoding="utf-8") as f:
-                    f.write(text)
-
-            # Skip audio generation in preview mode
-            if self.config.preview:
-                return True
-
-            # Generate audio file
-            output_file = os.path.join(
-                self.config.output_folder,
-                f"{idx:04d}_{title}.{tts_provider.get_output_file_extension()}",
+    async def assemble_chapter_async(self, job: MergeJob, tts_provider, merge_pool):
+        """Merge the synthesized chunks of a chapter in the merge pool, without blocking the event loop."""
+        success = await asyncio.get_running_loop().run_in_executor(merge_pool, merge_chapter, job)
+        self.record_chapter(job, tts_provider, success)
+        return success
+
+    def record_chapter(self, job: MergeJob, tts_provider, success):
+        output_file = get_chapter_output_file(self.config, job.idx, job.title, tts_provider)
+        status = STATUS_DONE if success else STATUS_FAILED
+        self.manifest.update_chapter(job.idx, job.title, job.text_hash, job.chunk_count, output_file, status)
+        if not success:
+            self.failed_chapters.append((job.idx, job.title))
+
+    def is_chapter_done(self, idx, title, text_hash):
+        """In resume mode, whether the manifest records the chapter as done (with an intact output file)."""
+        if self.config.resume and self.manifest is not None and self.manifest.is_chapter_done(idx, text_hash):
+            logger.info(f"Skipping chapter {idx}: {title}, it was already converted")
+            return True
+        return False
+
+    def create_chapter_jobs(self, idx, title, text, text_chunks, book_author, book_title, tts_provider, config,
+                            chunk_hashes=None):
+        """
+        Create the jobs of a chapter for the workers: chunk jobs for the text_chunks of providers that support
+        chunking, else a single job converting the whole chapter.
+
+        In resume mode, chunks the manifest records as done (with an intact chunk file) get no job, their
+        chunk_hashes are computed from the text_chunks if not given. If the
+        provider supports concurrent requests, the chunks of a chapter are grouped into batches of
+        chunk_concurrency chunks.
+        """
+        resume = self.config.resume and self.manifest is not None
+        if text_chunks is None:
+            return [ChapterJob(idx, title, book_author, book_title, text, config)]
+
+        if resume and chunk_hashes is None:
+            chunk_hashes = [hash_text(chunk) for chunk in text_chunks]
+        chunk_jobs = []
+        for chunk_number, chunk in enumerate(text_chunks, 1):
+            if resume and self.manifest.is_chunk_done(idx, chunk_number, chunk_hashes[chunk_number - 1]):
+                logger.debug(f"Skipping chunk {chunk_number} of chapter {idx}, it was already converted")
+                continue
+            chunk_jobs.append(
+                ChunkJob(idx, title, book_author, book_title, chunk_number, len(text_chunks), chunk, config)
             )
-            audio_tags = AudioTags(
-                title, book_parser.get_book_author(), book_parser.get_book_title(), idx
+        chunk_concurrency = tts_provider.get_chunk_concurrency()
+        if chunk_concurrency > 1:
+            return [
+                ChunkBatchJob(tuple(chunk_jobs[i:i + chunk_concurrency]))
+                for i in range(0, len(chunk_jobs), chunk_concurrency)
+            ]
+        return chunk_jobs
+
+    def start_chapter(self, chapter: ParsedChapter, book_author, book_title, tts_provider, config):
+        """
+        Take a parsed chapter into the pipeline: save its text if required and create its jobs.
+
+        Returns the jobs, and the merge job of a chapter whose chunks were all converted by a previous run.
+        """
+        # Save chapter text if required
+        if self.config.output_text:
+            text_file = os.path.join(self.config.output_folder, f"{chapter.idx:04d}_{chapter.title}.txt")
+            with open(text_file, "w", encoding="utf-8") as f:
+                f.write(get_text(chapter.text))
+
+        # Skip audio generation in preview mode
+        if self.config.preview or self.is_chapter_done(chapter.idx, chapter.title, chapter.text_hash):
+            return [], None
+
+        jobs = self.create_chapter_jobs(
+            chapter.idx, chapter.title, chapter.text, chapter.text_chunks, book_author, book_title, tts_provider, config,
+            chapter.chunk_hashes
+        )
+        self.chapter_hashes[chapter.idx] = (chapter.title, chapter.text_hash)
+        if chapter.text_chunks is None:
+            return jobs, None
+
+        self.chunk_counts[chapter.idx] = len(chapter.text_chunks)
+        chunk_jobs = [chunk_job for job in jobs for chunk_job in getattr(job, "jobs", (job,))]
+        for chunk_job in chunk_jobs:
+            self.chunk_hashes[(chunk_job.idx, chunk_job.chunk_number)] = chapter.chunk_hashes[chunk_job.chunk_number - 1]
+        self.pending_chunks[chapter.idx] = len(chunk_jobs)
+        self.chunk_job_count += len(chunk_jobs)
+
+        # Chapters whose chunks were all converted by a previous run only need to be assembled
+        if not chunk_jobs:
+            return jobs, self.get_merge_job(chapter.idx, book_author, book_title, config)
+        return jobs, None
+
+    def get_merge_job(self, idx, book_author, book_title, config):
+        """Merge job of a chapter whose chunks all finished, None if any of them failed."""
+        # The chapter leaves the pipeline bookkeeping
+        title, text_hash = self.chapter_hashes.pop(idx)
+        chunk_count = self.chunk_counts.pop(idx)
+        self.pending_chunks.pop(idx)
+        if idx in self.failed_chunk_chapters:
+            self.failed_chapters.append((idx, title))
+            return None
+        return MergeJob(idx, title, book_author, book_title, chunk_count, text_hash, config)
+
+    def handle_result(self, result, book_author, book_title, tts_provider, config):
+        """Record the result of a job, returns the merge job of a chapter once its last chunk finished."""
+        idx, chunk_number, success, cache_hit = result
+        title, text_hash = self.chapter_hashes[idx]
+        status = STATUS_DONE if success else STATUS_FAILED
+        if chunk_number is None:
+            del self.chapter_hashes[idx]
+            output_file = get_chapter_output_file(self.config, idx, title, tts_provider)
+            self.manifest.update_chapter(idx, title, text_hash, None, output_file, status)
+            if not success:
+                self.failed_chapters.append((idx, title))
+            return None
+
+        if cache_hit:
+            self.cache_hits += 1
+        chunk_file = get_chunk_file(self.config, idx, chunk_number, tts_provider)
+        chunk_hash = self.chunk_hashes.pop((idx, chunk_number))
+        self.manifest.update_chunk(idx, chunk_number, chunk_hash, chunk_file, status)
+        if not success:
+            self.failed_chunk_chapters.add(idx)
+        self.pending_chunks[idx] -= 1
+        if self.pending_chunks[idx] == 0:
+            return self.get_merge_job(idx, book_author, book_title, config)
+        return None
+
+    def run_process_engine(self, chapters, book_author, book_title, tts_provider, rate_limiter, chapter_store=None):
+        """
+        Run the pipeline with a pool of worker processes.
+
+        Chapters are parsed and split by a ChapterProducer thread while the workers synthesize the jobs of the
+        chapters before, and a chapter is merged by a worker as soon as its last chunk finishes. Only a window of
+        jobs is submitted to the pool at a time, so the producer is held back by the bounded chapter handoff.
+        """
+        # Parsed chapters from the producer, job results, (merge job, success) of merges and errors from the pool
+        events = queue.Queue()
+        producer = ChapterProducer(chapters, tts_provider, events.put, chapter_store=chapter_store)
+        config = copy.copy(self.config)
+        max_pending_jobs = 2 * self.config.worker_count
+        waiting_jobs = collections.deque()  # (job, whether it's the last job of its chapter)
+        pending_jobs = 0
+        pending_merges = 0
+        producing = True
+
+        def submit_merge(merge_job: MergeJob):
+            # Merged by a worker, so result handling and the dispatch of chunk jobs go on meanwhile
+            nonlocal pending_merges
+            pool.apply_async(
+                merge_chapter, (merge_job,), callback=lambda success: events.put((merge_job, success)),
+                error_callback=events.put,
             )
-            tts_provider.text_to_speech(text, output_file, audio_tags)
-
-            logger.info(f"✅ Converted chapter {idx}: {title}, output file: {output_file}")
-
-            return True
-        except Exception as e:
-            logger.exception(f"Error processing chapter {idx}, error: {e}")
-            return False
-
-    def process_chapter_wrapper(self, args):
-        """Wrapper for process_chapter to handle unpacking args for imap."""
-        idx, title, text, book_parser = args
-        return idx, self.process_chapter(idx, title, text, book_parser)
+            pending_merges += 1
+
+        # Use multiprocessing to process chunks in parallel
+        with multiprocessing.Pool(
+            processes=self.config.worker_count,
+            initializer=init_worker,
+            initargs=(self.config.log, self.config.log_file, rate_limiter)
+        ) as pool:
+            producer.start()
+            while producing or waiting_jobs or pending_jobs or pending_merges:
+                while waiting_jobs and pending_jobs < max_pending_jobs:
+                    job, last_of_chapter = waiting_jobs.popleft()
+                    pool.apply_async(process_job, (job,), callback=events.put, error_callback=events.put)
+                    pending_jobs += 1
+                    if last_of_chapter:
+                        producer.release_chapter()
+
+                event = events.get()
+                if event is END_OF_CHAPTERS:
+                    producing = False
+                    producer.raise_error()
+                elif isinstance(event, ParsedChapter):
+                    jobs, merge_job = self.start_chapter(event, book_author, book_title, tts_provider, config)
+                    if merge_job:
+                        submit_merge(merge_job)
+                    if jobs:
+                        waiting_jobs.extend((job, i == len(jobs) - 1) for i, job in enumerate(jobs))
+                    else:
+                        producer.release_chapter()
+                elif isinstance(event, BaseException):
+                    raise event
+                elif isinstance(event, tuple):
+                    pending_merges -= 1
+                    merge_job, success = event
+                    self.record_chapter(merge_job, tts_provider, success)
+                else:
+                    pending_jobs -= 1
+                    for result in event:
+                        merge_job = self.handle_result(result, book_author, book_title, tts_provider, config)
+                        if merge_job:
+                            submit_merge(merge_job)
+        return producer
+
+    async def run_async_engine(self, chapters, book_author, book_title, tts_provider, chapter_store=None):
+        """
+        Run the pipeline on a single event loop, see AsyncEngine.
+
+        Chapters are parsed and split by a ChapterProducer thread as in the process engine. The CPU heavy merging
+        of chapters runs in a small process pool, a chapter is merged as soon as its last chunk finishes.
+        """
+        from audiobook_generator.core.async_engine import AsyncEngine
+
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()  # parsed chapters from the producer and job results
+        producer = ChapterProducer(
+            chapters, tts_provider, lambda event: loop.call_soon_threadsafe(events.put_nowait, event),
+            chapter_store=chapter_store,
+        )
+        engine = AsyncEngine(
+            self.config, tts_provider, get_tts_cache(self.config, tts_provider), self.config.async_concurrency
+        )
+        logger.info(f"Using {engine}")
+        config = copy.copy(self.config)
+        max_pending_jobs = 2 * self.config.async_concurrency
+        waiting_jobs = collections.deque()
+        pending_jobs = 0
+        producing = True
+        merges = []
+
+        # Spawned instead of forked, the helper threads of the event loop must not be forked
+        with ProcessPoolExecutor(
+            max_workers=self.config.worker_count,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=setup_logging,
+            initargs=(self.config.log, self.config.log_file, True),
+        ) as merge_pool:
+            try:
+                producer.start()
+                while producing or waiting_jobs or pending_jobs:
+                    while waiting_jobs and pending_jobs < max_pending_jobs:
+                        job, last_of_chapter = waiting_jobs.popleft()
+                        engine.submit(job, lambda result: events.put_nowait([result]))
+                        pending_jobs += 1
+                        if last_of_chapter:
+                            producer.release_chapter()
+
+                    event = await events.get()
+                    if event is END_OF_CHAPTERS:
+                        producing = False
+                        producer.raise_error()
+                        continue
+                    if isinstance(event, ParsedChapter):
+                        jobs, merge_job = self.start_chapter(event, book_author, book_title, tts_provider, config)
+                        # The engine has its own concurrency, batches are taken apart
+                        jobs = [chunk_job for job in jobs for chunk_job in getattr(job, "jobs", (job,))]
+                        if jobs:
+                            waiting_jobs.extend((job, i == len(jobs) - 1) for i, job in enumerate(jobs))
+                        else:
+                            producer.release_chapter()
+                    else:
+                        pending_jobs -= 1
+                        merge_job = self.handle_result(event[0], book_author, book_title, tts_provider, config)
+                    if merge_job:
+                        merges.append(
+                            asyncio.create_task(self.assemble_chapter_async(merge_job, tts_provider, merge_pool))
+                        )
+                await asyncio.gather(*merges)
+            finally:
+                await engine.close()
+        return producer
 
     def _combine_audio_files(self, book_parser, tts_provider):
         """Combine all audio files into a single file."""
@@ -81,34 +473,26 @@ class AudiobookGenerator:
             # Get file extension
             file_extension = tts_provider.get_output_file_extension()
             
-            # Find all audio files in output directory
+            # Create output filename
+            book_title = book_parser.get_book_title().replace(" ", "_").replace("/", "_")
+            output_filename = f"{book_title}_complete.{file_extension}"
+            output_path = os.path.join(self.config.output_folder, output_filename)
+
+            # Find all audio files in output directory, except a combined file of a previous run
             audio_files = glob.glob(os.path.join(self.config.output_folder, f"*.{file_extension}"))
+            audio_files = [audio_file for audio_file in audio_files if audio_file != output_path]
             audio_files.sort()  # Sort to maintain chapter order
-            
+
             if not audio_files:
                 logger.warning("No audio files found to combine")
                 return
-            
-            # Load and combine audio files
-            combined_audio = AudioSegment.empty()
-            
-            for audio_file in audio_files:
-                logger.info(f"Adding {os.path.basename(audio_file)} to combined file")
-                audio_segment = AudioSegment.from_file(audio_file)
-                combined_audio += audio_segment
-                
-                # Add a small pause between chapters (1 second)
-                combined_audio += AudioSegment.silent(duration=1000)
-            
-            # Create output filename
-            book_title = book_parser.get_book_title().replace(" ", "_").replace("/", "_")
-            output_filename = f"{book_title}_complete.{file_extension}"
-            output_path = os.path.join(self.config.output_folder, output_filename)
-            
-            # Export combined audio
+
+            # Stream the chapters into the combined file with a small pause between chapters (1 second)
             logger.info(f"Exporting combined audio to: {output_filename}")
-            combined_audio.export(output_path, format=file_extension.lower())
-            
+            concat_audio_files(
+                audio_files, output_path, file_extension, silence_ms=1000, cache_dir=self.config.tts_cache_dir
+            )
+
             # Set audio tags for the combined file
             audio_tags = AudioTags(
                 book_parser.get_book_title(),
@@ -116,16 +500,18 @@ class AudiobookGenerator:
                 book_parser.get_book_title(),
                 1
             )
-            
+
             # Apply tags if supported
             try:
                 import eyed3
                 audiofile = eyed3.load(output_path)
+                if audiofile and audiofile.tag is None:
+                    audiofile.initTag()  # the streamed file has no tag yet
                 if audiofile and audiofile.tag:
                     audiofile.tag.title = audio_tags.title
                     audiofile.tag.artist = audio_tags.author
-                    audiofile.tag.album = audio_tags.series_title
-                    audiofile.tag.track_num = audio_tags.part_number
+                    audiofile.tag.album = audio_tags.book_title
+                    audiofile.tag.track_num = audio_tags.idx
                     audiofile.tag.save()
             except ImportError:
                 logger.warning("eyed3 not available, skipping ID3 tags for combined file")
@@ -138,81 +524,94 @@ class AudiobookGenerator:
             logger.exception(f"Error combining audio files: {e}")
 
     def run(self):
+        chapter_store = None
         try:
             logger.info("Starting audiobook generation...")
             book_parser = get_book_parser(self.config)
             tts_provider = get_tts_provider(self.config)
 
             os.makedirs(self.config.output_folder, exist_ok=True)
-            chapters = book_parser.get_chapters(tts_provider.get_break_string())
-            # Filter out empty or very short chapters
-            chapters = [(title, text) for title, text in chapters if text.strip()]
-
-            logger.info(f"Chapters count: {len(chapters)}.")
-
-            # Check chapter start and end args
-            if self.config.chapter_start < 1 or self.config.chapter_start > len(chapters):
-                raise ValueError(
-                    f"Chapter start index {self.config.chapter_start} is out of range. Check your input."
-                )
-            if self.config.chapter_end < -1 or self.config.chapter_end > len(chapters):
-                raise ValueError(
-                    f"Chapter end index {self.config.chapter_end} is out of range. Check your input."
-                )
-            if self.config.chapter_end == -1:
-                self.config.chapter_end = len(chapters)
-            if self.config.chapter_start > self.config.chapter_end:
-                raise ValueError(
-                    f"Chapter start index {self.config.chapter_start} is larger than chapter end index {self.config.chapter_end}. Check your input."
-                )
-
-            logger.info(
-                f"Converting chapters from {self.config.chapter_start} to {self.config.chapter_end}."
+            # Texts of the chapters in the pipeline are spilled to disk, memory doesn't grow with the book
+            chapter_store = ChapterStore(self.config.output_folder)
+            chapters = book_parser.iter_chapter_range(
+                tts_provider.get_break_string(), self.config.chapter_start, self.config.chapter_end
             )
-
-            # Initialize total_characters to 0
-            total_characters = get_total_chars(
-                chapters[self.config.chapter_start - 1 : self.config.chapter_end]
-            )
-            logger.info(f"Total characters in selected book chapters: {total_characters}")
-            rough_price = tts_provider.estimate_cost(total_characters)
-            logger.info(f"Estimate book voiceover would cost you roughly: ${rough_price:.2f}\n")
+            chapter_range = f"{self.config.chapter_start} to {self.config.chapter_end if self.config.chapter_end != -1 else 'the last chapter'}"
 
             # Prompt user to continue if not in preview mode
-            if self.config.no_prompt:
-                logger.info("Skipping prompt as passed parameter no_prompt")
-            elif self.config.preview:
-                logger.info("Skipping prompt as in preview mode")
+            if self.config.no_prompt or self.config.preview:
+                if self.config.no_prompt:
+                    logger.info("Skipping prompt as passed parameter no_prompt")
+                else:
+                    logger.info("Skipping prompt as in preview mode")
+                # Without a prompt, the book is parsed while the first chapters are already converted
+                logger.info(f"Converting chapters from {chapter_range}.")
             else:
+                # The estimate is made from the raw text of the book, the chapters are only parsed once confirmed.
+                # Its chapter count may differ from the parsed one, so the range is checked against the chapters
+                # when they are selected.
+                check_chapter_range(self.config.chapter_start, self.config.chapter_end)
+                estimate = estimate_book(self.config)
+                estimate = estimate.select(self.config.chapter_start, self.config.chapter_end)
+                logger.info(f"Converting chapters from {chapter_range}.")
+                logger.info(f"Estimated total characters in selected book chapters: {estimate.total_characters}")
+                if tts_provider.supports_chunking():
+                    logger.info(
+                        f"Estimated requests to {self.config.tts}: "
+                        f"{estimate.get_chunk_count(self.config.tts, self.config.language)}"
+                    )
+                rough_price = tts_provider.estimate_cost(estimate.total_characters)
+                logger.info(f"Estimate book voiceover would cost you roughly: ${rough_price:.2f}\n")
                 confirm_conversion()
 
-            # Prepare chapters for processing
-            chapters_to_process = chapters[self.config.chapter_start - 1 : self.config.chapter_end]
-            tasks = [
-                (idx, title, text, book_parser)
-                for idx, (title, text) in enumerate(
-                    chapters_to_process, start=self.config.chapter_start
+            os.makedirs(os.path.join(self.config.output_folder, CHUNKS_FOLDER), exist_ok=True)
+            if not self.config.preview:
+                self.manifest = ConversionManifest(self.config.output_folder, tts_provider.get_synthesis_params())
+
+            # Book metadata is resolved once here, the jobs only carry plain values
+            book_author = book_parser.get_book_author()
+            book_title = book_parser.get_book_title()
+
+            use_async_engine = self.config.engine == ENGINE_ASYNC and not self.config.preview
+            if use_async_engine and not (tts_provider.supports_chunking() and tts_provider.supports_async()):
+                logger.warning(
+                    f"TTS provider {self.config.tts} doesn't support the async engine, using worker processes instead."
                 )
-            ]
+                use_async_engine = False
 
-            # Track failed chapters
-            failed_chapters = []
+            # One rate limiter for all requests to the TTS service, whichever worker or thread sends them
+            if use_async_engine:
+                max_concurrency = self.config.async_concurrency
+            else:
+                max_concurrency = self.config.worker_count * tts_provider.get_chunk_concurrency()
+            rate_limiter = get_rate_limiter(self.config, max_concurrency)
+            tts_provider.set_rate_limiter(rate_limiter)
+            logger.info(f"Using {rate_limiter}")
+
+            if use_async_engine:
+                producer = asyncio.run(
+                    self.run_async_engine(chapters, book_author, book_title, tts_provider, chapter_store)
+                )
+            else:
+                producer = self.run_process_engine(
+                    chapters, book_author, book_title, tts_provider, rate_limiter, chapter_store
+                )
+
+            logger.info(f"Total characters in selected book chapters: {producer.total_characters}")
+            rough_price = tts_provider.estimate_cost(producer.total_characters)
+            logger.info(f"Estimate book voiceover would cost you roughly: ${rough_price:.2f}")
 
-            # Use multiprocessing to process chapters in parallel
-            with multiprocessing.Pool(
-                processes=self.config.worker_count,
-                initializer=setup_logging,
-                initargs=(self.config.log, self.config.log_file, True)
-            ) as pool:
-                # Process chapters and collect results
-                results = list(pool.imap_unordered(self.process_chapter_wrapper, tasks))
+            if self.config.tts_cache_dir and self.chunk_job_count:
+                logger.info(
+                    f"TTS cache: {self.cache_hits} hits, {self.chunk_job_count - self.cache_hits} misses "
+                    f"({self.cache_hits / self.chunk_job_count:.0%} hit rate)"
+                )
 
-                # Check for failed chapters
-                for idx, success in results:
-                    if not success:
-                        chapter_title = chapters_to_process[idx - self.config.chapter_start][0]
-                        failed_chapters.append((idx, chapter_title))
+            chunks_folder = os.path.join(self.config.output_folder, CHUNKS_FOLDER)
+            if not os.listdir(chunks_folder):
+                os.rmdir(chunks_folder)
 
+            failed_chapters = sorted(self.failed_chapters)
             if failed_chapters:
                 logger.warning("The following chapters failed to convert:")
                 for idx, title in failed_chapters:
@@ -230,5 +629,8 @@ class AudiobookGenerator:
         except Exception as e:
             logger.exception(f"Error during audiobook generation: {e}")
         finally:
+            if self.manifest:
+                self.manifest.close()
+            if chapter_store:
+                chapter_store.close()
             logger.debug("AudiobookGenerator.run() method finished.")
-
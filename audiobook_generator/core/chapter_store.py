@@ -0,0 +1,67 @@
+import dataclasses
+import logging
+import os
+import tempfile
+import threading
+from typing import List, Union
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class TextRef:
+    """Handle of a text spilled to a ChapterStore, sent to the worker processes instead of the text itself."""
+    path: str
+    offset: int
+    size: int  # in bytes
+    length: int  # in characters
+
+    def read(self) -> str:
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            return f.read(self.size).decode("utf-8")
+
+
+def get_text(text: Union[str, TextRef]) -> str:
+    return text.read() if isinstance(text, TextRef) else text
+
+
+class ChapterStore:
+    """
+    Temporary spill file in the output folder for the texts of the chapters and chunks in the pipeline.
+
+    The pipeline passes TextRef handles around and the text is read back only where it's needed (mostly by the
+    worker synthesizing a chunk), so memory doesn't grow with the size of the book. Texts are appended and flushed
+    before their handles are returned, so other processes can read them right away. The file is removed on close.
+    """
+
+    def __init__(self, folder: str):
+        fd, self.path = tempfile.mkstemp(dir=folder, prefix=".chapters-", suffix=".tmp")
+        self.path = os.path.abspath(self.path)
+        self.file = os.fdopen(fd, "wb")
+        self.offset = 0
+        self.lock = threading.Lock()
+
+    def __str__(self) -> str:
+        return f"ChapterStore(path={self.path}, size={self.offset})"
+
+    def put(self, texts: List[str]) -> List[TextRef]:
+        """Spill the texts, returns their handles."""
+        encoded = [text.encode("utf-8") for text in texts]
+        with self.lock:
+            text_refs = []
+            offset = self.offset
+            for text, data in zip(texts, encoded):
+                text_refs.append(TextRef(self.path, offset, len(data), len(text)))
+                offset += len(data)
+            self.file.writelines(encoded)
+            self.file.flush()
+            self.offset = offset
+        return text_refs
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.close()
+            os.remove(self.path)
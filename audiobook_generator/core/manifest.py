@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "conversion_manifest.sqlite"
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_params(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def is_output_intact(output_file: str, size: int) -> bool:
+    # A missing file or a file with a different size (e.g. truncated by a crash) has to be redone
+    return output_file is not None and os.path.isfile(output_file) and os.path.getsize(output_file) == size
+
+
+class ConversionManifest:
+    """
+    Persistent record of the converted chapters and chunks in the output folder.
+
+    Every chunk and chapter is stored with the hash of its text, the hash of the provider parameters,
+    its output file, byte size and status. It is only written by the parent process, each update is
+    committed right away so the manifest survives Ctrl+C, network outages or OOM kills.
+    """
+
+    def __init__(self, output_folder: str, params: dict):
+        self.path = os.path.join(output_folder, MANIFEST_FILE)
+        self.params_hash = hash_params(params)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chapters (
+                idx INTEGER PRIMARY KEY,
+                title TEXT,
+                text_hash TEXT,
+                params_hash TEXT,
+                chunk_count INTEGER,
+                output_file TEXT,
+                size INTEGER,
+                status TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                idx INTEGER,
+                chunk_number INTEGER,
+                text_hash TEXT,
+                params_hash TEXT,
+                output_file TEXT,
+                size INTEGER,
+                status TEXT,
+                PRIMARY KEY (idx, chunk_number)
+            );
+            CREATE TABLE IF NOT EXISTS params (
+                params_hash TEXT PRIMARY KEY,
+                params TEXT
+            );
+            """
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO params VALUES (?, ?)",
+            (self.params_hash, json.dumps(params, sort_keys=True, default=str)),
+        )
+        self.connection.commit()
+        logger.debug(f"Using conversion manifest: {self.path}")
+
+    def close(self):
+        self.connection.close()
+
+    def is_chapter_done(self, idx: int, text_hash: str) -> bool:
+        row = self.connection.execute(
+            "SELECT text_hash, params_hash, output_file, size, status FROM chapters WHERE idx = ?", (idx,)
+        ).fetchone()
+        if row is None:
+            return False
+        row_text_hash, row_params_hash, output_file, size, status = row
+        return (
+            status == STATUS_DONE
+            and row_text_hash == text_hash
+            and row_params_hash == self.params_hash
+            and is_output_intact(output_file, size)
+        )
+
+    def is_chunk_done(self, idx: int, chunk_number: int, text_hash: str) -> bool:
+        row = self.connection.execute(
+            "SELECT text_hash, params_hash, output_file, size, status FROM chunks WHERE idx = ? AND chunk_number = ?",
+            (idx, chunk_number),
+        ).fetchone()
+        if row is None:
+            return False
+        row_text_hash, row_params_hash, output_file, size, status = row
+        return (
+            status == STATUS_DONE
+            and row_text_hash == text_hash
+            and row_params_hash == self.params_hash
+            and is_output_intact(output_file, size)
+        )
+
+    def update_chapter(self, idx: int, title: str, text_hash: str, chunk_count, output_file: str, status: str):
+        size = os.path.getsize(output_file) if status == STATUS_DONE else None
+        self.connection.execute(
+            "INSERT OR REPLACE INTO chapters VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (idx, title, text_hash, self.params_hash, chunk_count, output_file, size, status),
+        )
+        self.connection.commit()
+
+    def update_chunk(self, idx: int, chunk_number: int, text_hash: str, output_file: str, status: str):
+        size = os.path.getsize(output_file) if status == STATUS_DONE else None
+        self.connection.execute(
+            "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (idx, chunk_number, text_hash, self.params_hash, output_file, size, status),
+        )
+        self.connection.commit()
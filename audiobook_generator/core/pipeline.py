@@ -0,0 +1,84 @@
+import dataclasses
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+from audiobook_generator.core.chapter_store import ChapterStore, TextRef, get_text
+from audiobook_generator.core.manifest import hash_text
+
+logger = logging.getLogger(__name__)
+
+# Number of chapters the producer parses and splits ahead of the chapters whose jobs were submitted
+MAX_CHAPTERS_AHEAD = 4
+# Delivered by the producer after the last chapter
+END_OF_CHAPTERS = None
+
+
+@dataclasses.dataclass(frozen=True)
+class ParsedChapter:
+    # Texts are TextRef handles if the producer spills them to a ChapterStore
+    idx: int
+    title: str
+    text: Union[str, TextRef]
+    text_hash: str
+    text_chunks: Optional[List[Union[str, TextRef]]]  # None for providers that convert whole chapters
+    chunk_hashes: Optional[List[str]]
+
+
+class ChapterProducer(threading.Thread):
+    """
+    First stages of the conversion pipeline: parses and splits the chapters in a background thread and delivers them
+    one by one as ParsedChapter, followed by END_OF_CHAPTERS.
+
+    At most max_chapters_ahead chapters are delivered but not yet released by the consumer (with release_chapter,
+    once their jobs are submitted), so parsing runs ahead of synthesis without holding the whole book in memory.
+    With a chapter_store, the texts of a chapter and its chunks are spilled to it and only their handles are
+    delivered, so no chapter text stays in memory once the chapter is split.
+
+    The chapters are (idx, title, text) tuples, the text may be the TextRef of a text spilled before.
+    """
+
+    def __init__(self, chapters: Iterable[Tuple[int, str, Union[str, TextRef]]], tts_provider, deliver: Callable,
+                 max_chapters_ahead: int = MAX_CHAPTERS_AHEAD, chapter_store: Optional[ChapterStore] = None):
+        super().__init__(name="ChapterProducer", daemon=True)
+        self.chapters = chapters
+        self.tts_provider = tts_provider
+        self.deliver = deliver
+        self.slots = threading.Semaphore(max_chapters_ahead)
+        self.chapter_store = chapter_store
+        self.total_characters = 0
+        self.error = None
+
+    def run(self):
+        try:
+            for idx, title, text in self.chapters:
+                chapter = self.parse_chapter(idx, title, get_text(text))
+                self.slots.acquire()
+                self.deliver(chapter)
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self.deliver(END_OF_CHAPTERS)
+            except RuntimeError:
+                # The consumer's event loop is already closed, it stopped early
+                pass
+
+    def parse_chapter(self, idx, title, text) -> ParsedChapter:
+        text_chunks = self.tts_provider.split_chunks(text) if self.tts_provider.supports_chunking() else None
+        chunk_hashes = [hash_text(chunk) for chunk in text_chunks] if text_chunks is not None else None
+        self.total_characters += len(text)
+        text_hash = hash_text(text)
+        if self.chapter_store is not None:
+            text, *text_chunks = self.chapter_store.put([text] + (text_chunks or []))
+            if chunk_hashes is None:
+                text_chunks = None
+        return ParsedChapter(idx, title, text, text_hash, text_chunks, chunk_hashes)
+
+    def release_chapter(self):
+        self.slots.release()
+
+    def raise_error(self):
+        """Re-raise an error of the producer thread in the consumer, once it received END_OF_CHAPTERS."""
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,70 @@
+import dataclasses
+from typing import Tuple, Union
+
+from audiobook_generator.config.general_config import GeneralConfig
+from audiobook_generator.core.audio_tags import AudioTags
+from audiobook_generator.core.chapter_store import TextRef, get_text
+from audiobook_generator.tts_providers.base_tts_provider import get_chunk_id
+
+
+# Jobs are sent to the worker processes, so they only carry plain values resolved in the
+# parent process: never the book parser (which holds the whole EpubBook) or the generator.
+# Texts spilled to the ChapterStore are carried as TextRef handles and read by the worker.
+@dataclasses.dataclass(frozen=True)
+class ChapterJob:
+    idx: int
+    title: str
+    author: str
+    book_title: str
+    text: Union[str, TextRef]
+    config: GeneralConfig  # snapshot taken after the TTS provider filled in its defaults
+
+    def get_text(self) -> str:
+        return get_text(self.text)
+
+    def get_audio_tags(self) -> AudioTags:
+        return AudioTags(self.title, self.author, self.book_title, self.idx)
+
+
+@dataclasses.dataclass(frozen=True)
+class ChunkJob:
+    idx: int
+    title: str
+    author: str
+    book_title: str
+    chunk_number: int
+    chunk_count: int
+    text: Union[str, TextRef]
+    config: GeneralConfig
+
+    @property
+    def chunk_id(self) -> str:
+        return get_chunk_id(self.idx, self.title, self.chunk_number, self.chunk_count)
+
+    def get_text(self) -> str:
+        return get_text(self.text)
+
+
+@dataclasses.dataclass(frozen=True)
+class ChunkBatchJob:
+    # Consecutive chunks of one chapter, synthesized concurrently by one worker
+    jobs: Tuple[ChunkJob, ...]
+
+    @property
+    def idx(self) -> int:
+        return self.jobs[0].idx
+
+
+@dataclasses.dataclass(frozen=True)
+class MergeJob:
+    # Merge of the synthesized chunks of a chapter into the chapter output file
+    idx: int
+    title: str
+    author: str
+    book_title: str
+    chunk_count: int
+    text_hash: str  # recorded in the conversion manifest once the chapter is merged
+    config: GeneralConfig
+
+    def get_audio_tags(self) -> AudioTags:
+        return AudioTags(self.title, self.author, self.book_title, self.idx)
@@ -1,16 +1,24 @@
+import asyncio
 import html
 import io
 import logging
 import math
 import os
+import re
+import threading
 from datetime import datetime, timedelta
 from time import sleep
+from typing import List, Optional
+
+import aiohttp
 import requests
 
 from audiobook_generator.core.audio_tags import AudioTags
 from audiobook_generator.config.general_config import GeneralConfig
 from audiobook_generator.utils.utils import split_text, set_audio_tags, merge_audio_segments
-from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider
+from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider, TTS_AZURE, get_max_chunk_chars
+from audiobook_generator.utils.rate_limiter import is_throttled
+from audiobook_generator.utils.wav_utils import WAVE_FORMAT_ALAW, WAVE_FORMAT_MULAW, make_wav_fmt
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +40,10 @@ class AzureTTSProvider(BaseTTSProvider):
         # access token and expiry time
         self.access_token = None
         self.token_expiry_time = datetime.utcnow()
+        # concurrent chunk requests share the access token, only one of them renews it
+        self.access_token_lock = threading.Lock()
+        # session of the async engine, created on first use inside its event loop
+        self.async_session = None
         super().__init__(config)
 
         subscription_key = os.environ.get("MS_TTS_KEY")
@@ -58,13 +70,14 @@ class AzureTTSProvider(BaseTTSProvider):
         return self.access_token is None or datetime.utcnow() >= self.token_expiry_time
 
     def auto_renew_access_token(self) -> str:
-        if self.access_token is None or self.is_access_token_expired():
-            logger.info(
-                f"azure tts access_token doesn't exist or is expired, getting new one"
-            )
-            self.access_token = self.get_access_token()
-            self.token_expiry_time = datetime.utcnow() + timedelta(minutes=9, seconds=1)
-        return self.access_token
+        with self.access_token_lock:
+            if self.access_token is None or self.is_access_token_expired():
+                logger.info(
+                    f"azure tts access_token doesn't exist or is expired, getting new one"
+                )
+                self.access_token = self.get_access_token()
+                self.token_expiry_time = datetime.utcnow() + timedelta(minutes=9, seconds=1)
+            return self.access_token
 
     def get_access_token(self) -> str:
         for retry in range(MAX_RETRIES):
@@ -85,72 +98,129 @@ class AzureTTSProvider(BaseTTSProvider):
                     raise e
         raise Exception("Failed to get access token")
 
-    def text_to_speech(
-            self,
-            text: str,
-            output_file: str,
-            audio_tags: AudioTags,
-    ):
+    def supports_chunking(self) -> bool:
+        return True
+
+    def supports_concurrent_requests(self) -> bool:
+        return True
+
+    def supports_async(self) -> bool:
+        return True
+
+    def split_chunks(self, text: str) -> List[str]:
         # Adjust this value based on your testing
-        max_chars = 1800 if self.config.language.startswith("zh") else 3000
+        max_chars = get_max_chunk_chars(TTS_AZURE, self.config.language)
 
-        text_chunks = split_text(text, max_chars, self.config.language)
+        return split_text(text, max_chars, self.config.language)
 
-        audio_segments = []
-        chunk_ids = []
-        for i, chunk in enumerate(text_chunks, 1):
-            chunk_id = f"chapter-{audio_tags.idx}_{audio_tags.title}_chunk_{i}_of_{len(text_chunks)}"
-            logger.info(
-                f"Processing {chunk_id}, length={len(chunk)}"
-            )
-            logger.debug(
-                f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]"
-            )
-            escaped_text = html.escape(chunk)
-            logger.debug(f"Escaped text: [{escaped_text}]")
-            # replace MAGIC_BREAK_STRING with a break tag for section/paragraph break
-            escaped_text = escaped_text.replace(
-                self.get_break_string().strip(),
-                f" <break time='{self.config.break_duration}ms' /> ",
-            )  # strip in case leading bank is missing
-            ssml = f"<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='{self.config.language}'><voice name='{self.config.voice_name}'>{escaped_text}</voice></speak>"
-            logger.debug(f"SSML: [{ssml}]")
-
-            for retry in range(MAX_RETRIES):
-                self.auto_renew_access_token()
-                headers = {
-                    "Authorization": f"Bearer {self.access_token}",
-                    "Content-Type": "application/ssml+xml",
-                    "X-Microsoft-OutputFormat": self.config.output_format,
-                    "User-Agent": "Python",
-                }
-                try:
-                    logger.info(
-                        "Sending request to Azure TTS, data length: " + str(len(ssml))
-                    )
+    def get_ssml(self, chunk: str, chunk_id: str) -> str:
+        logger.info(
+            f"Processing {chunk_id}, length={len(chunk)}"
+        )
+        logger.debug(
+            f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]"
+        )
+        escaped_text = html.escape(chunk)
+        logger.debug(f"Escaped text: [{escaped_text}]")
+        # replace MAGIC_BREAK_STRING with a break tag for section/paragraph break
+        escaped_text = escaped_text.replace(
+            self.get_break_string().strip(),
+            f" <break time='{self.config.break_duration}ms' /> ",
+        )  # strip in case leading bank is missing
+        ssml = f"<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='{self.config.language}'><voice name='{self.config.voice_name}'>{escaped_text}</voice></speak>"
+        logger.debug(f"SSML: [{ssml}]")
+        return ssml
+
+    def get_request_headers(self, access_token: str) -> dict:
+        return {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/ssml+xml",
+            "X-Microsoft-OutputFormat": self.config.output_format,
+            "User-Agent": "Python",
+        }
+
+    def synthesize_chunk(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        ssml = self.get_ssml(chunk, chunk_id)
+
+        for retry in range(MAX_RETRIES):
+            headers = self.get_request_headers(self.auto_renew_access_token())
+            try:
+                logger.info(
+                    "Sending request to Azure TTS, data length: " + str(len(ssml))
+                )
+                with self.get_rate_limiter().request(len(chunk)):
                     response = requests.post(
                         self.TTS_URL, headers=headers, data=ssml.encode("utf-8")
                     )
                     response.raise_for_status()  # Will raise HTTPError for 4XX or 5XX status
-                    logger.info(
-                        "Got response from Azure TTS, response length: "
-                        + str(len(response.content))
-                    )
-                    audio_segments.append(io.BytesIO(response.content))
-                    chunk_ids.append(chunk_id)
-                    break
-                except requests.exceptions.RequestException as e:
-                    logger.warning(
-                        f"Error while converting text to speech (attempt {retry + 1}): {e}"
-                    )
-                    if retry < MAX_RETRIES - 1:
-                        logger.warning(f"Sleeping for {2 ** retry} seconds before retrying, you can also stop the program manually and check error logs.")
-                        sleep(2 ** retry)
-                    else:
-                        raise e
+                logger.info(
+                    "Got response from Azure TTS, response length: "
+                    + str(len(response.content))
+                )
+                return io.BytesIO(response.content)
+            except requests.exceptions.RequestException as e:
+                logger.warning(
+                    f"Error while converting text to speech (attempt {retry + 1}): {e}"
+                )
+                if retry < MAX_RETRIES - 1:
+                    if is_throttled(e):
+                        # The shared rate limiter pauses and slows down the requests of all workers
+                        continue
+                    logger.warning(f"Sleeping for {2 ** retry} seconds before retrying, you can also stop the program manually and check error logs.")
+                    sleep(2 ** retry)
+                else:
+                    raise e
+
+    async def synthesize_chunk_async(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        ssml = self.get_ssml(chunk, chunk_id)
+
+        if self.async_session is None:
+            self.async_session = aiohttp.ClientSession()
+
+        for retry in range(MAX_RETRIES):
+            # The token is renewed with a blocking request every 9 minutes, keep it off the event loop
+            access_token = await asyncio.to_thread(self.auto_renew_access_token)
+            headers = self.get_request_headers(access_token)
+            try:
+                logger.info(
+                    "Sending request to Azure TTS, data length: " + str(len(ssml))
+                )
+                async with self.get_rate_limiter().request(len(chunk)):
+                    async with self.async_session.post(
+                        self.TTS_URL, headers=headers, data=ssml.encode("utf-8")
+                    ) as response:
+                        response.raise_for_status()  # Will raise ClientResponseError for 4XX or 5XX status
+                        content = await response.read()
+                logger.info(
+                    "Got response from Azure TTS, response length: "
+                    + str(len(content))
+                )
+                return io.BytesIO(content)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(
+                    f"Error while converting text to speech (attempt {retry + 1}): {e}"
+                )
+                if retry < MAX_RETRIES - 1:
+                    if is_throttled(e):
+                        # The shared rate limiter pauses and slows down the requests of all workers
+                        continue
+                    logger.warning(f"Sleeping for {2 ** retry} seconds before retrying, you can also stop the program manually and check error logs.")
+                    await asyncio.sleep(2 ** retry)
+                else:
+                    raise e
+
+    async def close_async(self):
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
 
+    def merge_chunks(self, audio_segments: List[io.BytesIO], output_file: str, audio_tags: AudioTags,
+                     chunk_ids: List[str]):
         # Use utility function to merge audio segments
-        merge_audio_segments(audio_segments, output_file, self.get_output_file_extension(), chunk_ids, self.config.use_pydub_merge)
+        merge_audio_segments(
+            audio_segments, output_file, self.get_output_file_extension(), chunk_ids, self.config.use_pydub_merge,
+            self.get_wav_fmt(),
+        )
 
         set_audio_tags(output_file, audio_tags)
 
@@ -177,6 +247,19 @@ class AzureTTSProvider(BaseTTSProvider):
         else:
             raise NotImplementedError(f"Unknown file extension for output format: {self.config.output_format}")
 
+    def get_wav_fmt(self) -> Optional[bytes]:
+        """
+        fmt chunk of the raw a-law and mu-law formats, whose headerless chunks are merged into a wav file.
+
+        None for the other formats, truesilk is merged as a silk file.
+        """
+        match = re.fullmatch(r"raw-(\d+)(k?)hz-(\d+)bit-mono-(alaw|mulaw)", self.config.output_format)
+        if not match:
+            return None
+        sample_rate = int(match[1]) * (1000 if match[2] else 1)
+        format_tag = WAVE_FORMAT_ALAW if match[4] == "alaw" else WAVE_FORMAT_MULAW
+        return make_wav_fmt(format_tag, 1, sample_rate, int(match[3]))
+
     def validate_config(self):
         if self.config.language not in get_azure_supported_languages():
             raise ValueError(
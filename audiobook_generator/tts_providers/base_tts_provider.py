@@ -1,18 +1,29 @@
-from typing import List
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 from audiobook_generator.config.general_config import GeneralConfig
+from audiobook_generator.core.audio_tags import AudioTags
+from audiobook_generator.utils.rate_limiter import RateLimiter, get_rate_limiter
 
 TTS_AZURE = "azure"
 TTS_OPENAI = "openai"
 TTS_EDGE = "edge"
 TTS_PIPER = "piper"
 
+# Maximum length of the chunks the providers supporting chunking split a chapter into, in characters
+MAX_CHUNK_CHARS = {TTS_AZURE: 3000, TTS_OPENAI: 1800, TTS_EDGE: 3000}
+# Chinese needs more tokens per character, its chunks are kept shorter
+MAX_CHUNK_CHARS_ZH = 1800
+
 
 class BaseTTSProvider:  # Base interface for TTS providers
     # Base provider interface
     def __init__(self, config: GeneralConfig):
         self.config = config
         self.validate_config()
+        # Limiter of the requests to the TTS service, AudiobookGenerator sets one shared by all workers
+        self.rate_limiter = None
 
     def __str__(self) -> str:
         return f"{self.config}"
@@ -20,9 +31,92 @@ class BaseTTSProvider:  # Base interface for TTS providers
     def validate_config(self):
         raise NotImplementedError
 
-    def text_to_speech(self, *args, **kwargs):
+    def text_to_speech(self, text: str, output_file: str, audio_tags: AudioTags):
+        # Default implementation for providers that support chunk level synthesis,
+        # providers that can only convert a whole chapter at once override this method.
+        text_chunks = self.split_chunks(text)
+        chunk_ids = [
+            get_chunk_id(audio_tags.idx, audio_tags.title, i, len(text_chunks)) for i in range(1, len(text_chunks) + 1)
+        ]
+
+        chunk_concurrency = self.get_chunk_concurrency()
+        if chunk_concurrency > 1:
+            # map returns the results in chunk order, no matter in which order the requests finish
+            with ThreadPoolExecutor(max_workers=chunk_concurrency) as executor:
+                audio_segments = list(executor.map(self.synthesize_chunk, text_chunks, chunk_ids))
+        else:
+            audio_segments = [self.synthesize_chunk(chunk, chunk_id) for chunk, chunk_id in zip(text_chunks, chunk_ids)]
+
+        self.merge_chunks(audio_segments, output_file, audio_tags, chunk_ids)
+
+    def supports_chunking(self) -> bool:
+        # Providers returning True implement split_chunks, synthesize_chunk and merge_chunks,
+        # so the chunks of one chapter can be synthesized by different workers.
+        return False
+
+    def supports_concurrent_requests(self) -> bool:
+        # Providers returning True can run synthesize_chunk from several threads at the same time
+        return False
+
+    def set_rate_limiter(self, rate_limiter: RateLimiter):
+        self.rate_limiter = rate_limiter
+
+    def get_rate_limiter(self) -> RateLimiter:
+        if self.rate_limiter is None:
+            # Used on its own, the provider only limits its own requests
+            self.rate_limiter = get_rate_limiter(self.config, self.get_chunk_concurrency())
+        return self.rate_limiter
+
+    def get_chunk_concurrency(self) -> int:
+        # Number of chunks of one chapter synthesized concurrently
+        if not self.supports_concurrent_requests():
+            return 1
+        return max(1, self.config.chunk_concurrency or 1)
+
+    def supports_async(self) -> bool:
+        # Providers returning True implement synthesize_chunk_async with an async client,
+        # so they can be driven by the async engine
+        return False
+
+    def split_chunks(self, text: str) -> List[str]:
+        raise NotImplementedError
+
+    def synthesize_chunk(self, chunk: str, chunk_id: str) -> io.BytesIO:
         raise NotImplementedError
 
+    async def synthesize_chunk_async(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        raise NotImplementedError
+
+    async def close_async(self):
+        # Close the async clients, called by the async engine before its event loop ends
+        pass
+
+    def merge_chunks(self, audio_segments: List[io.BytesIO], output_file: str, audio_tags: AudioTags,
+                     chunk_ids: List[str]):
+        raise NotImplementedError
+
+    def get_synthesis_params(self) -> dict:
+        # Everything besides the text that has an influence on the synthesized audio
+        return {
+            "tts": self.config.tts,
+            "language": self.config.language,
+            "voice_name": self.config.voice_name,
+            "model_name": self.config.model_name,
+            "output_format": self.config.output_format,
+            "instructions": self.config.instructions,
+            "speed": self.config.speed,
+            "break_duration": self.config.break_duration,
+            "voice_rate": self.config.voice_rate,
+            "voice_volume": self.config.voice_volume,
+            "voice_pitch": self.config.voice_pitch,
+            "piper_speaker": self.config.piper_speaker,
+            "piper_noise_scale": self.config.piper_noise_scale,
+            "piper_noise_w_scale": self.config.piper_noise_w_scale,
+            "piper_length_scale": self.config.piper_length_scale,
+            "piper_sentence_silence": self.config.piper_sentence_silence,
+            "use_pydub_merge": self.config.use_pydub_merge,
+        }
+
     def estimate_cost(self, total_chars):
         raise NotImplementedError
 
@@ -34,6 +128,18 @@ class BaseTTSProvider:  # Base interface for TTS providers
 
 
 # Common support methods for all TTS providers
+def get_chunk_id(idx: int, title: str, chunk_number: int, chunk_count: int) -> str:
+    return f"chapter-{idx}_{title}_chunk_{chunk_number}_of_{chunk_count}"
+
+
+def get_max_chunk_chars(tts: str, language: Optional[str]) -> Optional[int]:
+    """Maximum length of the chunks of a provider in characters, None for providers converting whole chapters."""
+    max_chars = MAX_CHUNK_CHARS.get(tts)
+    if max_chars is not None and language and language.startswith("zh"):
+        max_chars = min(max_chars, MAX_CHUNK_CHARS_ZH)
+    return max_chars
+
+
 def get_supported_tts_providers() -> List[str]:
     return [TTS_AZURE, TTS_OPENAI, TTS_EDGE, TTS_PIPER]
 
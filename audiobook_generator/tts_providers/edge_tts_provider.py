@@ -3,6 +3,7 @@ import logging
 import math
 import io
 from time import sleep
+from typing import List
 
 import edge_tts
 from edge_tts import list_voices
@@ -10,17 +11,21 @@ from pydub import AudioSegment
 
 from audiobook_generator.config.general_config import GeneralConfig
 from audiobook_generator.core.audio_tags import AudioTags
+from audiobook_generator.utils.mp3_utils import find_audio_frames, parse_frame_header
+from audiobook_generator.utils.silence import get_mp3_silence, get_pcm_silence
 from audiobook_generator.utils.utils import (
-    pydub_merge_audio_segments,
-    save_segment_tmp,
+    merge_audio_segments,
     set_audio_tags,
     split_text,
 )
-from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider
+from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider, TTS_EDGE, get_max_chunk_chars
+from audiobook_generator.utils.rate_limiter import is_throttled
 
 logger = logging.getLogger(__name__)
 
 MAX_RETRIES = 12  # Max_retries constant for network errors
+# Frame header of the audio-24khz-48kbitrate-mono-mp3 output of Edge, for pauses before any audio is known
+EDGE_MP3_HEADER = parse_frame_header(bytes([0xFF, 0xF3, 0x64, 0xC4]))
 
 
 async def get_supported_voices():
@@ -53,6 +58,7 @@ class CommWithPauses:
         break_string: str,
         break_duration: int = 1250,
         output_format_ext: str = "mp3",
+        keep_mp3_frames: bool = False,
         **kwargs,
     ) -> None:
         self.full_text = text
@@ -60,6 +66,10 @@ class CommWithPauses:
         self.break_string = break_string
         self.break_duration = int(break_duration)
         self.output_format_ext = output_format_ext
+        # Copy the mp3 frames of Edge and insert silent frames for the pauses, instead of decoding
+        # the audio to add the pauses and re-encoding it
+        self.keep_mp3_frames = keep_mp3_frames and output_format_ext == "mp3"
+        self.mp3_header = EDGE_MP3_HEADER
         self.kwargs = kwargs
 
         self.parsed = self.parse_text()
@@ -93,8 +103,9 @@ class CommWithPauses:
     def generate_pause(self, time: int) -> bytes:
         logger.debug(f"Generating pause")
         # pause time should be provided in ms
-        silent: AudioSegment = AudioSegment.silent(time, 24000)
-        return silent.raw_data  # type: ignore
+        if self.keep_mp3_frames:
+            return get_mp3_silence(self.mp3_header, time)
+        return get_pcm_silence(24000, 1, time)
 
     async def generate_audio(self, text: str) -> bytes:
         logger.debug(f"Generating audio for: <{text}>")
@@ -105,11 +116,21 @@ class CommWithPauses:
             if chunk["type"] == "audio":
                 temp_chunk.write(chunk["data"])
 
+        if self.keep_mp3_frames:
+            data = temp_chunk.getbuffer()
+            start, end, header = find_audio_frames(data)
+            if header is None:
+                logger.warning("No audio frames in the chunk, returning a silent chunk.")
+                return b""
+            self.mp3_header = header
+            return bytes(data[start:end])
+
         temp_chunk.seek(0)
         # handle the case where the chunk is empty
         try:
             logger.debug(f"Decoding the chunk")
-            decoded_chunk = AudioSegment.from_mp3(temp_chunk)
+            # decoding runs ffmpeg, keep it off the event loop
+            decoded_chunk = await asyncio.to_thread(AudioSegment.from_mp3, temp_chunk)
         except Exception as e:
             logger.warning(
                 f"Failed to decode the chunk, reason: {e}, returning a silent chunk."
@@ -122,12 +143,16 @@ class CommWithPauses:
         await self.chunkify() # main logic to chunkify the text and generate audio segments
 
         self.file.seek(0)
+        if self.keep_mp3_frames:
+            # The frames of the parts and pauses are the chunk, it gets its info frame when the chunks are merged
+            return self.file
+
         audio: AudioSegment = AudioSegment.from_raw(
             self.file, sample_width=2, frame_rate=24000, channels=1
         )
 
         output_bytes = io.BytesIO()
-        audio.export(output_bytes, format=self.output_format_ext)
+        await asyncio.to_thread(audio.export, output_bytes, format=self.output_format_ext)
         output_bytes.seek(0)
         return output_bytes
 
@@ -163,62 +188,88 @@ class EdgeTTSProvider(BaseTTSProvider):
                 f"EdgeTTS: Unsupported voice name: {self.config.voice_name}"
             )
 
-    def text_to_speech(
-        self,
-        text: str,
-        output_file: str,
-        audio_tags: AudioTags,
-    ):
+    def supports_chunking(self) -> bool:
+        return True
+
+    def supports_async(self) -> bool:
+        # edge_tts is natively async
+        return True
+
+    def split_chunks(self, text: str) -> List[str]:
         # edge-tts package has a much higher limit than below, but I feels better to use a smaller limit to reduce the risk of error.
         # just use the same value as azure-tts-provider now, change it if needed.
-        max_chars = 1800 if self.config.language.startswith("zh") else 3000
-
-        text_chunks = split_text(text, max_chars, self.config.language)
-
-        tmp_files = []
-        for i, chunk in enumerate(text_chunks, 1):
-            chunk_id = f"chapter-{audio_tags.idx}_{audio_tags.title}_chunk_{i}_of_{len(text_chunks)}"
-            logger.info(f"Processing {chunk_id}, length={len(chunk)}")
-            logger.debug(f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]")
-            
-            for retry in range(MAX_RETRIES):
-                try:
-                    communicate = CommWithPauses(
-                        text=chunk,
-                        voice_name=self.config.voice_name,
-                        break_string=self.get_break_string().strip(),
-                        break_duration=int(self.config.break_duration),
-                        output_format_ext=self.get_output_file_extension(),
-                        rate=self.config.voice_rate,
-                        volume=self.config.voice_volume,
-                        pitch=self.config.voice_pitch,
-                        proxy=self.config.proxy,
-                    )
-                    audio_stream = asyncio.run(communicate.get_audio_stream())
-                    tmp_file = save_segment_tmp(
-                        audio_stream,
-                        self.get_output_file_extension(),
-                        prefix=chunk_id,
+        max_chars = get_max_chunk_chars(TTS_EDGE, self.config.language)
+
+        return split_text(text, max_chars, self.config.language)
+
+    def synthesize_chunk(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        logger.info(f"Processing {chunk_id}, length={len(chunk)}")
+        logger.debug(f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]")
+
+        for retry in range(MAX_RETRIES):
+            try:
+                communicate = self.create_communicate(chunk)
+                with self.get_rate_limiter().request(len(chunk)):
+                    return asyncio.run(communicate.get_audio_stream())
+            except Exception as e:
+                logger.warning(
+                    f"Error while converting text to speech for {chunk_id} (attempt {retry + 1}/{MAX_RETRIES}): {e}"
+                )
+                if retry < MAX_RETRIES - 1:
+                    if is_throttled(e):
+                        # The shared rate limiter pauses and slows down the requests of all workers
+                        continue
+                    sleep_time = 2**retry
+                    logger.warning(
+                        f"Sleeping for {sleep_time} seconds before retrying, you can also stop the program manually and check error logs."
                     )
-                    tmp_files.append(tmp_file)
-                    break  # success
-                except Exception as e:
+                    sleep(sleep_time)
+                else:
+                    raise e
+
+    async def synthesize_chunk_async(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        logger.info(f"Processing {chunk_id}, length={len(chunk)}")
+        logger.debug(f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]")
+
+        for retry in range(MAX_RETRIES):
+            try:
+                communicate = self.create_communicate(chunk)
+                async with self.get_rate_limiter().request(len(chunk)):
+                    return await communicate.get_audio_stream()
+            except Exception as e:
+                logger.warning(
+                    f"Error while converting text to speech for {chunk_id} (attempt {retry + 1}/{MAX_RETRIES}): {e}"
+                )
+                if retry < MAX_RETRIES - 1:
+                    if is_throttled(e):
+                        continue
+                    sleep_time = 2**retry
                     logger.warning(
-                        f"Error while converting text to speech for {chunk_id} (attempt {retry + 1}/{MAX_RETRIES}): {e}"
+                        f"Sleeping for {sleep_time} seconds before retrying, you can also stop the program manually and check error logs."
                     )
-                    if retry < MAX_RETRIES - 1:
-                        sleep_time = 2**retry
-                        logger.warning(
-                            f"Sleeping for {sleep_time} seconds before retrying, you can also stop the program manually and check error logs."
-                        )
-                        sleep(sleep_time)
-                    else:
-                        raise e
-
-        pydub_merge_audio_segments(
-            tmp_files, output_file, self.get_output_file_extension()
+                    await asyncio.sleep(sleep_time)
+                else:
+                    raise e
+
+    def create_communicate(self, chunk: str) -> CommWithPauses:
+        return CommWithPauses(
+            text=chunk,
+            voice_name=self.config.voice_name,
+            break_string=self.get_break_string().strip(),
+            break_duration=int(self.config.break_duration),
+            output_format_ext=self.get_output_file_extension(),
+            keep_mp3_frames=not self.config.use_pydub_merge,
+            rate=self.config.voice_rate,
+            volume=self.config.voice_volume,
+            pitch=self.config.voice_pitch,
+            proxy=self.config.proxy,
         )
 
+    def merge_chunks(self, audio_segments: List[io.BytesIO], output_file: str, audio_tags: AudioTags,
+                     chunk_ids: List[str]):
+        merge_audio_segments(audio_segments, output_file, self.get_output_file_extension(), chunk_ids,
+                             self.config.use_pydub_merge)
+
         set_audio_tags(output_file, audio_tags)
 
     def estimate_cost(self, total_chars):
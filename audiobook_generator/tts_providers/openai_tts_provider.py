@@ -3,18 +3,23 @@ import logging
 import math
 import tempfile
 import os
+from typing import List
+
 from pydub import AudioSegment
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIStatusError
 
 from audiobook_generator.core.audio_tags import AudioTags
 from audiobook_generator.config.general_config import GeneralConfig
 from audiobook_generator.utils.utils import split_text, set_audio_tags, merge_audio_segments
-from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider
+from audiobook_generator.tts_providers.base_tts_provider import BaseTTSProvider, TTS_OPENAI, get_max_chunk_chars
+from audiobook_generator.utils.rate_limiter import is_throttled
 
 
 logger = logging.getLogger(__name__)
 
+MAX_THROTTLED_RETRIES = 12  # Retries of requests still throttled after the retries of the SDK
+
 
 def get_openai_supported_output_formats():
     return ["mp3", "aac", "flac", "opus", "wav"]
@@ -58,48 +63,104 @@ class OpenAITTSProvider(BaseTTSProvider):
         super().__init__(config)
 
         self.client = OpenAI(max_retries=4)  # User should set OPENAI_API_KEY environment variable
+        self.async_client = None  # created on first use, inside the event loop of the async engine
 
     def __str__(self) -> str:
         return super().__str__()
 
-    def text_to_speech(self, text: str, output_file: str, audio_tags: AudioTags):
+    def supports_chunking(self) -> bool:
+        return True
+
+    def supports_concurrent_requests(self) -> bool:
+        # The OpenAI client is thread safe
+        return True
+
+    def supports_async(self) -> bool:
+        return True
+
+    def split_chunks(self, text: str) -> List[str]:
         # Reason: The max num of input tokens is 2000 for gpt-4o-mini-tts https://platform.openai.com/docs/models/gpt-4o-mini-tts. One token is ~4 chars in English but ~1 word/char in Chinese.
         # So we reduce the max num of chars from 4000 to 1800 to avoid the input tokens limit.
         # TODO: detect the language and set the max num of chars accordingly.
-        max_chars = 1800
-
-        text_chunks = split_text(text, max_chars, self.config.language)
-
-        audio_segments = []
-        chunk_ids = []
-
-        for i, chunk in enumerate(text_chunks, 1):
-            chunk_id = f"chapter-{audio_tags.idx}_{audio_tags.title}_chunk_{i}_of_{len(text_chunks)}"
-            logger.info(
-                f"Processing {chunk_id}, length={len(chunk)}"
-            )
-            logger.debug(
-                f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]"
-            )
-
-            # NO retry for OpenAI TTS because SDK has built-in retry logic
-            response = self.client.audio.speech.create(
-                model=self.config.model_name,
-                voice=self.config.voice_name,
-                speed=self.config.speed,
-                instructions=self.config.instructions,
-                input=chunk,
-                response_format=self.config.output_format,
-            )
-
-            # Log response details
-            logger.debug(f"Remote server response: status_code={response.response.status_code}, "
-                         f"size={len(response.content)} bytes, "
-                         f"content={response.content[:128]}...")
-
-            audio_segments.append(io.BytesIO(response.content))
-            chunk_ids.append(chunk_id)
-
+        max_chars = get_max_chunk_chars(TTS_OPENAI, self.config.language)
+
+        return split_text(text, max_chars, self.config.language)
+
+    def synthesize_chunk(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        logger.info(
+            f"Processing {chunk_id}, length={len(chunk)}"
+        )
+        logger.debug(
+            f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]"
+        )
+
+        # The SDK has built-in retry logic, only requests still throttled afterwards are retried here,
+        # once the shared rate limiter lets them through again
+        for retry in range(MAX_THROTTLED_RETRIES):
+            try:
+                with self.get_rate_limiter().request(len(chunk)):
+                    response = self.client.audio.speech.create(
+                        model=self.config.model_name,
+                        voice=self.config.voice_name,
+                        speed=self.config.speed,
+                        instructions=self.config.instructions,
+                        input=chunk,
+                        response_format=self.config.output_format,
+                    )
+                break
+            except APIStatusError as e:
+                if not is_throttled(e) or retry == MAX_THROTTLED_RETRIES - 1:
+                    raise
+                logger.warning(f"OpenAI TTS throttled {chunk_id} (attempt {retry + 1}/{MAX_THROTTLED_RETRIES}): {e}")
+
+        # Log response details
+        logger.debug(f"Remote server response: status_code={response.response.status_code}, "
+                     f"size={len(response.content)} bytes, "
+                     f"content={response.content[:128]}...")
+
+        return io.BytesIO(response.content)
+
+    async def synthesize_chunk_async(self, chunk: str, chunk_id: str) -> io.BytesIO:
+        logger.info(
+            f"Processing {chunk_id}, length={len(chunk)}"
+        )
+        logger.debug(
+            f"Processing {chunk_id}, length={len(chunk)}, text=[{chunk}]"
+        )
+
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(max_retries=4)
+
+        for retry in range(MAX_THROTTLED_RETRIES):
+            try:
+                async with self.get_rate_limiter().request(len(chunk)):
+                    response = await self.async_client.audio.speech.create(
+                        model=self.config.model_name,
+                        voice=self.config.voice_name,
+                        speed=self.config.speed,
+                        instructions=self.config.instructions,
+                        input=chunk,
+                        response_format=self.config.output_format,
+                    )
+                break
+            except APIStatusError as e:
+                if not is_throttled(e) or retry == MAX_THROTTLED_RETRIES - 1:
+                    raise
+                logger.warning(f"OpenAI TTS throttled {chunk_id} (attempt {retry + 1}/{MAX_THROTTLED_RETRIES}): {e}")
+
+        logger.debug(f"Remote server response: status_code={response.response.status_code}, "
+                     f"size={len(response.content)} bytes, "
+                     f"content={response.content[:128]}...")
+
+        return io.BytesIO(response.content)
+
+    async def close_async(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+    def merge_chunks(self, audio_segments: List[io.BytesIO], output_file: str, audio_tags: AudioTags,
+                     chunk_ids: List[str]):
         # Use utility function to merge audio segments
         merge_audio_segments(audio_segments, output_file, self.config.output_format, chunk_ids, self.config.use_pydub_merge)
 
@@ -1,3 +1,4 @@
+import argparse
 from multiprocessing import Process
 from typing import Optional, Tuple, List, Dict
 import os
@@ -9,7 +10,9 @@ import time
 import gradio as gr
 # from gradio_log import Log  # Disabled due to compatibility issues
 
+from audiobook_generator.book_parsers.book_estimator import estimate_book
 from audiobook_generator.config.general_config import GeneralConfig
+from audiobook_generator.tts_providers.base_tts_provider import get_max_chunk_chars
 from audiobook_generator.tts_providers.azure_tts_provider import get_azure_supported_languages, \
     get_azure_supported_voices, get_azure_supported_output_formats
 from audiobook_generator.tts_providers.edge_tts_provider import get_edge_tts_supported_voices, \
@@ -22,6 +25,7 @@ from audiobook_generator.utils.log_handler import generate_unique_log_path
 from audiobook_generator.utils.gutenberg_utils import GutenbergUtils
 from audiobook_generator.utils.cost_calculator import CostCalculator
 from audiobook_generator.utils.i18n import i18n
+from audiobook_generator.utils.parse_cache import DEFAULT_PARSE_CACHE_DIR
 from main import main
 
 # Global variables
@@ -31,7 +35,7 @@ webui_log_file = None
 gutenberg_utils = GutenbergUtils()
 cost_calculator = CostCalculator()
 current_language = "en"
-current_epub_file = None
+current_book_file = None
 current_text_preview = ""
 
 def set_language(language: str):
@@ -116,22 +120,20 @@ def load_gutenberg_book(book_id: str) -> Tuple[str, str, str]:
         if not text:
             return "", "", i18n.t("gutenberg_error")
         
-        # Create EPUB
-        epub_path = gutenberg_utils.create_epub_from_text(
-            text, f"Gutenberg Book {actual_id}", "Project Gutenberg", "en", actual_id
-        )
+        # Save the text, it is parsed directly by the text parser
+        text_path = gutenberg_utils.save_text(text, actual_id)
         
-        if not epub_path:
+        if not text_path:
             return "", "", i18n.t("gutenberg_error")
         
         # Get preview
         preview = gutenberg_utils.get_book_preview(actual_id, max_chars=1500)
         
-        global current_epub_file, current_text_preview
-        current_epub_file = epub_path
+        global current_book_file, current_text_preview
+        current_book_file = text_path
         current_text_preview = preview
         
-        return epub_path, preview, i18n.t("gutenberg_success")
+        return text_path, preview, i18n.t("gutenberg_success")
         
     except Exception as e:
         return "", "", f"{i18n.t('gutenberg_error')}: {str(e)}"
@@ -155,13 +157,34 @@ def load_selected_book_from_results(search_results_data) -> Tuple[str, str, str]
         book_id = str(first_row.iloc[0])  # First column is ID
         
         # Load the book using the existing function
-        epub_path, preview, status = load_gutenberg_book(book_id)
+        book_path, preview, status = load_gutenberg_book(book_id)
         
-        return epub_path, preview, status
+        return book_path, preview, status
         
     except Exception as e:
         return "", "", f"{i18n.t('error')}: {str(e)}"
 
+def get_book_chapters(file_path: str) -> List[Tuple[str, str]]:
+    """Parse the chapters of a book for previews and estimates, cached so the same book is only parsed once"""
+    from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+
+    # Create a minimal config for parsing
+    class DummyArgs:
+        def __init__(self):
+            self.input_file = file_path
+            self.title_mode = "auto"
+            self.newline_mode = "double"
+            self.chapter_start = 1
+            self.chapter_end = -1
+            self.remove_endnotes = False
+            self.remove_reference_numbers = False
+            self.search_and_replace_file = None
+            self.parse_cache_dir = DEFAULT_PARSE_CACHE_DIR
+
+    config = GeneralConfig(DummyArgs())
+    parser = get_book_parser(config)
+    return parser.get_chapters("")
+
 def estimate_conversion_costs(file_path: str = None, text: str = None) -> str:
     """Estimate TTS conversion costs for the entire book"""
     try:
@@ -170,32 +193,15 @@ def estimate_conversion_costs(file_path: str = None, text: str = None) -> str:
         
         # Always analyze the entire book from file, not just preview text
         text_length = 0
+        estimate = None
         
         if file_path and os.path.exists(file_path):
             try:
-                from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
-                from audiobook_generator.config.general_config import GeneralConfig
-                
-                # Create a minimal config for parsing
-                class DummyArgs:
-                    def __init__(self):
-                        self.input_file = file_path
-                        self.title_mode = "auto"
-                        self.newline_mode = "double"
-                        self.chapter_start = 1
-                        self.chapter_end = -1
-                        self.remove_endnotes = False
-                        self.remove_reference_numbers = False
-                        self.search_and_replace_file = None
-                
-                config = GeneralConfig(DummyArgs())
-                parser = EpubBookParser(config)
+                # Estimate ALL chapters from the raw text of the book (not just preview), without parsing them
+                estimate = estimate_book(GeneralConfig(argparse.Namespace(input_file=file_path)))
+                text_length = estimate.total_characters
                 
-                # Get ALL chapters and calculate total length (not just preview)
-                chapters = parser.get_chapters("")
-                text_length = sum(len(chapter_text) for title, chapter_text in chapters)
-                
-                print(f"📊 Cost estimation: Found {len(chapters)} chapters, total {text_length:,} characters")
+                print(f"📊 Cost estimation: Found {estimate.chapter_count} chapters, total {text_length:,} characters")
                 
             except Exception as e:
                 print(f"❌ Error parsing book: {e}")
@@ -229,6 +235,8 @@ def estimate_conversion_costs(file_path: str = None, text: str = None) -> str:
             formatted_cost = cost_calculator.format_cost_info(cost_info)
             # Convert markdown-style formatting to HTML and ensure visibility
             formatted_cost = formatted_cost.replace("💰", "💰").replace("**", "")
+            if estimate is not None and get_max_chunk_chars(cost_info['provider'], None) is not None:
+                formatted_cost += f" – ~{estimate.get_chunk_count(cost_info['provider'], None):,} {i18n.t('requests')}"
             html_content += f'<div style="color: #212529 !important; margin-bottom: 8px; padding: 8px; background: #f8f9fa; border-left: 4px solid #007bff; font-family: monospace; font-size: 0.95rem;">{formatted_cost}</div>'
         
         # Add cost explanation
@@ -266,26 +274,8 @@ def show_text_preview(file_path: str = None) -> str:
     
     if file_path and os.path.exists(file_path):
         try:
-            from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
-            from audiobook_generator.config.general_config import GeneralConfig
-            
-            # Create a minimal config for parsing
-            class DummyArgs:
-                def __init__(self):
-                    self.input_file = file_path
-                    self.title_mode = "auto"
-                    self.newline_mode = "double"
-                    self.chapter_start = 1
-                    self.chapter_end = -1
-                    self.remove_endnotes = False
-                    self.remove_reference_numbers = False
-                    self.search_and_replace_file = None
-            
-            config = GeneralConfig(DummyArgs())
-            parser = EpubBookParser(config)
-            
             # Get first few chapters for preview
-            chapters = parser.get_chapters("")
+            chapters = get_book_chapters(file_path)
             if chapters:
                 preview_text = ""
                 for i, (title, text) in enumerate(chapters[:3]):  # First 3 chapters
@@ -310,26 +300,8 @@ def show_full_text_preview(file_path: str = None) -> str:
         return f'<div style="color: #dc3545; padding: 20px; text-align: center; font-size: 1.1rem;">{i18n.t("no_text_loaded")}</div>'
     
     try:
-        from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
-        from audiobook_generator.config.general_config import GeneralConfig
-        
-        # Create a minimal config for parsing
-        class DummyArgs:
-            def __init__(self):
-                self.input_file = file_path
-                self.title_mode = "auto"
-                self.newline_mode = "double"
-                self.chapter_start = 1
-                self.chapter_end = -1
-                self.remove_endnotes = False
-                self.remove_reference_numbers = False
-                self.search_and_replace_file = None
-        
-        config = GeneralConfig(DummyArgs())
-        parser = EpubBookParser(config)
-        
         # Get ALL chapters for full preview
-        chapters = parser.get_chapters("")
+        chapters = get_book_chapters(file_path)
         if chapters:
             full_text = f"""
             <div style="max-height: 80vh !important; overflow-y: auto !important; padding: 20px !important; background: #ffffff !important; border-radius: 8px !important; box-shadow: 0 4px 6px rgba(0,0,0,0.1) !important; color: #212529 !important;">
@@ -398,8 +370,8 @@ def process_ui_form(
     
     # Handle source type
     if source_type == i18n.t("gutenberg_project"):
-        if current_epub_file and os.path.exists(current_epub_file):
-            config.input_file = current_epub_file
+        if current_book_file and os.path.exists(current_book_file):
+            config.input_file = current_book_file
         else:
             return f"{i18n.t('error')}: {i18n.t('gutenberg_error')}"
     else:
@@ -528,7 +500,7 @@ def create_enhanced_ui(config):
         with gr.Row(visible=True) as local_file_row:
             input_file = gr.File(
                 label=i18n.t("select_book_file"), 
-                file_types=[".epub"], 
+                file_types=[".epub", ".txt"], 
                 file_count="single", 
                 interactive=True
             )
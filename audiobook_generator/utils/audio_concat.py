@@ -0,0 +1,242 @@
+import contextlib
+import logging
+import mmap
+import os
+import shutil
+import subprocess
+from typing import List, Optional, Tuple
+
+from pydub import AudioSegment
+from pydub.utils import mediainfo
+
+from audiobook_generator.utils.mp3_utils import (
+    ID3V1_SIZE,
+    Mp3FrameHeader,
+    Mp3FrameWriter,
+    find_audio_frames,
+    get_id3v2_size,
+)
+from audiobook_generator.utils.ogg_utils import merge_ogg_segments
+from audiobook_generator.utils.silence import get_encoded_silence, get_mp3_silence, get_pcm_silence, get_wav_silence
+from audiobook_generator.utils.wav_utils import find_wav_data, is_wav, make_wav_header
+from audiobook_generator.utils.webm_utils import merge_webm_segments
+
+logger = logging.getLogger(__name__)
+
+# Size of the blocks streamed between the decoder and the encoder processes
+PIPE_BLOCK_SIZE = 1024 * 1024
+
+# Bytes read after the ID3v2 tag to find the first audio frame of a mp3 file
+MP3_PROBE_SIZE = 64 * 1024
+
+# Bytes read to find the fmt chunk of a wav file
+WAV_PROBE_SIZE = 64 * 1024
+
+# ffmpeg muxer names for file extensions that differ from them
+FFMPEG_FORMATS = {
+    "aac": "adts",
+    "pcm": "s16le",
+}
+
+# Lossless mergers of the containers whose files are concatenated with silence encoded once in their format
+CONTAINER_MERGERS = {
+    "ogg": merge_ogg_segments,
+    "opus": merge_ogg_segments,
+    "webm": merge_webm_segments,
+}
+
+
+def concat_audio_files(input_files: List[str], output_file: str, file_extension: str, silence_ms: int = 1000,
+                       cache_dir: Optional[str] = None):
+    """
+    Concatenate audio files into one file with silence between them, without holding the audio in memory.
+
+    MP3 files are concatenated frame by frame and wav files sample by sample, without decoding. Ogg Opus and
+    WebM files are merged without decoding too, with a silence encoded once (and stored in cache_dir) between
+    them. Everything else is decoded file by file and piped as PCM into a single ffmpeg encoder process.
+    """
+    if file_extension.lower() == "mp3" and concat_mp3_files(input_files, output_file, silence_ms):
+        return
+    if file_extension.lower() == "wav" and concat_wav_files(input_files, output_file, silence_ms):
+        return
+    if file_extension.lower() in CONTAINER_MERGERS and concat_container_files(
+        input_files, output_file, file_extension, silence_ms, cache_dir
+    ):
+        return
+    concat_with_ffmpeg(input_files, output_file, file_extension, silence_ms)
+
+
+def concat_mp3_files(input_files: List[str], output_file: str, silence_ms: int) -> bool:
+    """
+    Concatenate the MPEG frames of mp3 files into one stream with a single Xing/Info header.
+
+    The tags and info frames of the files are dropped and their frames are copied block by block, with silent
+    frames in the format of the first file between them. Returns False (without writing anything) if the files
+    don't share one format and need to be re-encoded instead.
+    """
+    first_header = None
+    spans = []
+    for input_file in input_files:
+        start, end, header = find_mp3_frames(input_file)
+        if header is None:
+            logger.warning(f"No MPEG audio frames found in {input_file}, falling back to re-encoding")
+            return False
+        if first_header is None:
+            first_header = header
+        elif not first_header.is_compatible(header):
+            logger.warning(f"Format of {input_file} differs from the first file, falling back to re-encoding")
+            return False
+        spans.append((start, end))
+
+    silence = get_mp3_silence(first_header, silence_ms)
+    with open(output_file, "wb") as outfile:
+        writer = Mp3FrameWriter(outfile, first_header)
+        for i, (input_file, (start, end)) in enumerate(zip(input_files, spans)):
+            logger.info(f"Adding {input_file} to combined file")
+            if i > 0:
+                writer.write_frames(silence)
+            with open(input_file, "rb") as f:
+                f.seek(start)
+                writer.copy_frames(f, end, PIPE_BLOCK_SIZE)
+        writer.close()
+    return True
+
+
+def concat_wav_files(input_files: List[str], output_file: str, silence_ms: int) -> bool:
+    """
+    Concatenate the samples of the data chunks of wav files under a single header.
+
+    The silence between files is samples of silence in their format. Returns False (without writing anything)
+    if the files don't share one PCM format and need to be re-encoded instead.
+    """
+    fmt = None
+    spans = []
+    for input_file in input_files:
+        file_fmt, start, end = find_wav_span(input_file)
+        if file_fmt is None:
+            logger.warning(f"No fmt chunk found in {input_file}, falling back to re-encoding")
+            return False
+        if fmt is None:
+            fmt = file_fmt
+        elif file_fmt != fmt:
+            logger.warning(f"Format of {input_file} differs from the first file, falling back to re-encoding")
+            return False
+        spans.append((start, end))
+    silence = get_wav_silence(fmt, silence_ms)
+    if silence is None:
+        logger.warning("Audio of the wav files isn't PCM, falling back to re-encoding")
+        return False
+
+    with open(output_file, "wb") as outfile:
+        # The header is rewritten with the size of the data once it's known, its length doesn't change
+        outfile.write(make_wav_header(fmt, 0))
+        data_size = 0
+        for i, (input_file, (start, end)) in enumerate(zip(input_files, spans)):
+            logger.info(f"Adding {input_file} to combined file")
+            if i > 0:
+                outfile.write(silence)
+                data_size += len(silence)
+            with open(input_file, "rb") as f:
+                f.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    block = f.read(min(PIPE_BLOCK_SIZE, remaining))
+                    if not block:
+                        break
+                    outfile.write(block)
+                    remaining -= len(block)
+                data_size += end - start - remaining
+        if data_size & 1:
+            outfile.write(b"\x00")
+        outfile.seek(0)
+        outfile.write(make_wav_header(fmt, data_size))
+    return True
+
+
+def find_wav_span(input_file: str) -> Tuple[Optional[bytes], int, int]:
+    """find_wav_data of a wav file, reading only its head."""
+    with open(input_file, "rb") as f:
+        head = f.read(WAV_PROBE_SIZE)
+        file_size = f.seek(0, os.SEEK_END)
+    if not is_wav(head):
+        return None, file_size, file_size
+    return find_wav_data(head, file_size)
+
+
+def concat_container_files(input_files: List[str], output_file: str, file_extension: str, silence_ms: int,
+                           cache_dir: Optional[str] = None) -> bool:
+    """
+    Concatenate Ogg Opus or WebM files with the lossless merger of their container.
+
+    The files are memory mapped and a silence encoded in their format is copied between them. Returns False
+    (without writing anything) if the files and the silence don't share one format and need to be re-encoded.
+    """
+    info = mediainfo(input_files[0])
+    sample_rate = int(info.get("sample_rate") or 48000)
+    channels = int(info.get("channels") or 1)
+    silence = get_encoded_silence(file_extension.lower(), sample_rate, channels, silence_ms, cache_dir)
+
+    with contextlib.ExitStack() as stack:
+        segments = []
+        for i, input_file in enumerate(input_files):
+            logger.info(f"Adding {input_file} to combined file")
+            if i > 0:
+                segments.append(silence)
+            with open(input_file, "rb") as f:
+                if not os.fstat(f.fileno()).st_size:
+                    logger.warning(f"{input_file} is empty, falling back to re-encoding")
+                    return False
+                segments.append(stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
+        return CONTAINER_MERGERS[file_extension.lower()](segments, output_file)
+
+
+def find_mp3_frames(input_file: str) -> Tuple[int, int, Optional[Mp3FrameHeader]]:
+    """find_audio_frames of a mp3 file, reading only its head and the place of an ID3v1 tag at its end."""
+    with open(input_file, "rb") as f:
+        head = f.read(10)
+        head += f.read(get_id3v2_size(head) + MP3_PROBE_SIZE)
+        end = f.seek(0, os.SEEK_END)
+        if end >= ID3V1_SIZE:
+            f.seek(end - ID3V1_SIZE)
+            if f.read(3) == b"TAG":
+                end -= ID3V1_SIZE
+    if len(head) >= end:
+        start, _, header = find_audio_frames(head[:end])
+    else:
+        # Only the head is searched, padded so that its last bytes aren't taken for an ID3v1 tag
+        start, _, header = find_audio_frames(head + bytes(ID3V1_SIZE))
+    return start, end, header
+
+
+def concat_with_ffmpeg(input_files: List[str], output_file: str, file_extension: str, silence_ms: int):
+    """Decode the files one after another and stream their PCM through a single ffmpeg encoder."""
+    info = mediainfo(input_files[0])
+    sample_rate = int(info.get("sample_rate") or 24000)
+    channels = int(info.get("channels") or 1)
+    pcm_args = ["-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels)]
+    output_format = FFMPEG_FORMATS.get(file_extension.lower(), file_extension.lower())
+
+    encoder = subprocess.Popen(
+        [AudioSegment.converter, "-y", "-loglevel", "error", *pcm_args, "-i", "pipe:0", "-f", output_format,
+         output_file],
+        stdin=subprocess.PIPE,
+    )
+    try:
+        silence = get_pcm_silence(sample_rate, channels, silence_ms)
+        for i, input_file in enumerate(input_files):
+            logger.info(f"Adding {input_file} to combined file")
+            if i > 0:
+                encoder.stdin.write(silence)
+            decoder = subprocess.Popen(
+                [AudioSegment.converter, "-loglevel", "error", "-i", input_file, *pcm_args, "pipe:1"],
+                stdout=subprocess.PIPE,
+            )
+            shutil.copyfileobj(decoder.stdout, encoder.stdin, PIPE_BLOCK_SIZE)
+            decoder.stdout.close()
+            if decoder.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed to decode {input_file}")
+    finally:
+        encoder.stdin.close()
+        returncode = encoder.wait()
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {output_file}")
@@ -127,6 +127,18 @@ class GutenbergUtils:
         cleaned_text = '\n'.join(content_lines)
         return cleaned_text
     
+    def save_text(self, text: str, book_id: str = "") -> str:
+        """Save downloaded text to a .txt file, which is parsed directly by the text book parser"""
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", delete=False, prefix=f"gutenberg-{book_id}-", suffix=".txt"
+            ) as temp_file:
+                temp_file.write(text)
+            return temp_file.name
+        except Exception as e:
+            logger.error(f"Error saving text: {e}")
+            return ""
+    
     def create_epub_from_text(self, text: str, title: str, author: str = "Unknown", 
                              language: str = "en", book_id: str = "") -> str:
         """Create an EPUB file from text content"""
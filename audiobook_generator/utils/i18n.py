@@ -101,6 +101,7 @@ class I18n:
                 'estimated_costs': 'Geschätzte Kosten',
                 'text_length': 'Textlänge',
                 'characters': 'Zeichen',
+                'requests': 'Anfragen',
                 'free_service': 'KOSTENLOS',
                 'cost_usd': 'Kosten (USD)',
                 'cost_eur': 'Kosten (EUR)',
@@ -244,6 +245,7 @@ class I18n:
                 'estimated_costs': 'Estimated Costs',
                 'text_length': 'Text Length',
                 'characters': 'Characters',
+                'requests': 'Requests',
                 'free_service': 'FREE',
                 'cost_usd': 'Cost (USD)',
                 'cost_eur': 'Cost (EUR)',
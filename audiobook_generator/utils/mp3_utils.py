@@ -0,0 +1,331 @@
+import array
+import dataclasses
+import logging
+import math
+import struct
+from typing import BinaryIO, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MPEG1 = 1
+MPEG2 = 2
+MPEG25 = 25
+
+LAYER3 = 3
+
+CHANNEL_MODE_MONO = 3
+
+# Bitrates in kbps for layer III, indexed by the bitrate index of the frame header
+BITRATES = {
+    MPEG1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, None],
+    MPEG2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160, None],
+}
+BITRATES[MPEG25] = BITRATES[MPEG2]
+
+SAMPLE_RATES = {
+    MPEG1: [44100, 48000, 32000, None],
+    MPEG2: [22050, 24000, 16000, None],
+    MPEG25: [11025, 12000, 8000, None],
+}
+
+VERSION_BITS = {0b00: MPEG25, 0b10: MPEG2, 0b11: MPEG1}
+
+ID3V1_SIZE = 128
+
+# Fields of a Xing/Info tag: flags, then frame count, byte count and seek table, in that order
+XING_FLAG_FRAMES = 0x1
+XING_FLAG_BYTES = 0x2
+XING_FLAG_TOC = 0x4
+XING_TOC_SIZE = 100
+XING_TAG_SIZE = 4 + 4 + 4 + 4 + XING_TOC_SIZE
+# Bytes read at once by Mp3FrameWriter.copy_frames
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclasses.dataclass(frozen=True)
+class Mp3FrameHeader:
+    version: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    padding: int
+    channel_mode: int
+    raw: bytes  # the 4 header bytes
+
+    @property
+    def samples_per_frame(self) -> int:
+        return 1152 if self.version == MPEG1 else 576
+
+    @property
+    def frame_length(self) -> int:
+        return self.samples_per_frame // 8 * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def side_info_length(self) -> int:
+        if self.version == MPEG1:
+            return 17 if self.channel_mode == CHANNEL_MODE_MONO else 32
+        return 9 if self.channel_mode == CHANNEL_MODE_MONO else 17
+
+    def is_compatible(self, other: "Mp3FrameHeader") -> bool:
+        # Frames of both streams can be played back to back by the same decoder
+        return (
+            self.version == other.version
+            and self.sample_rate == other.sample_rate
+            and (self.channel_mode == CHANNEL_MODE_MONO) == (other.channel_mode == CHANNEL_MODE_MONO)
+        )
+
+
+def parse_frame_header(data, offset: int = 0) -> Optional[Mp3FrameHeader]:
+    """Parse the layer III frame header at offset, returns None if there is no valid header."""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3, b4 = data[offset], data[offset + 1], data[offset + 2], data[offset + 3]
+    if b1 != 0xFF or (b2 & 0xE0) != 0xE0:
+        return None
+    version = VERSION_BITS.get((b2 >> 3) & 0b11)
+    layer = 4 - ((b2 >> 1) & 0b11)
+    if version is None or layer != LAYER3:
+        return None
+    bitrate = BITRATES[version][b3 >> 4]
+    sample_rate = SAMPLE_RATES[version][(b3 >> 2) & 0b11]
+    if not bitrate or not sample_rate:  # free format or reserved values
+        return None
+    return Mp3FrameHeader(
+        version=version,
+        bitrate=bitrate * 1000,
+        sample_rate=sample_rate,
+        padding=(b3 >> 1) & 0b1,
+        channel_mode=b4 >> 6,
+        raw=bytes(data[offset:offset + 4]),
+    )
+
+
+def get_id3v2_size(data) -> int:
+    """Size of the ID3v2 tag at the start of data, 0 if there is none."""
+    if len(data) < 10 or bytes(data[:3]) != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    has_footer = data[5] & 0x10
+    return 10 + size + (10 if has_footer else 0)
+
+
+def is_info_frame(data, offset: int, header: Mp3FrameHeader) -> bool:
+    """Whether the frame at offset is a Xing/Info or VBRI frame, which holds metadata instead of audio."""
+    xing_offset = offset + 4 + header.side_info_length
+    if bytes(data[xing_offset:xing_offset + 4]) in (b"Xing", b"Info"):
+        return True
+    return bytes(data[offset + 36:offset + 40]) == b"VBRI"
+
+
+def find_audio_frames(data) -> Tuple[int, int, Optional[Mp3FrameHeader]]:
+    """
+    Locate the MPEG audio frames in the content of a mp3 file.
+
+    Returns the start and end offset of the frames, without ID3v2/ID3v1 tags and info frames,
+    and the header of the first audio frame (None if no frame was found).
+    """
+    start = get_id3v2_size(data)
+    end = len(data)
+    if end - start >= ID3V1_SIZE and bytes(data[end - ID3V1_SIZE:end - ID3V1_SIZE + 3]) == b"TAG":
+        end -= ID3V1_SIZE
+
+    # Skip garbage between the tag and the first frame, a frame is only accepted if the next one follows it
+    while start + 4 <= end:
+        header = parse_frame_header(data, start)
+        if header and (start + header.frame_length >= end or parse_frame_header(data, start + header.frame_length)):
+            break
+        start += 1
+    else:
+        return start, end, None
+
+    if is_info_frame(data, start, header):
+        start += header.frame_length
+        header = parse_frame_header(data, start)
+    return start, end, header
+
+
+def make_silent_frame(header: Mp3FrameHeader) -> bytes:
+    """
+    Build a frame of digital silence in the format of the given header.
+
+    Side info and main data are all zero (part2_3_length and global gain 0), so every decoder outputs silence
+    for it. The frame has no CRC and no padding, and it doesn't use the bit reservoir.
+    """
+    b2 = header.raw[1] | 0b1  # protection bit set means no CRC
+    b3 = header.raw[2] & 0b11111101  # no padding
+    raw = bytes([header.raw[0], b2, b3, header.raw[3]])
+    silent_header = dataclasses.replace(header, padding=0, raw=raw)
+    return raw + bytes(silent_header.frame_length - 4)
+
+
+def make_silence(header: Mp3FrameHeader, duration_ms: int) -> bytes:
+    """Silent frames in the format of the given header, rounded up to whole frames."""
+    frame_count = math.ceil(duration_ms * header.sample_rate / 1000 / header.samples_per_frame)
+    return make_silent_frame(header) * frame_count
+
+
+def make_info_frame(header: Mp3FrameHeader, frame_count: int, byte_count: int, toc: bytes, vbr: bool) -> bytes:
+    """
+    Build a Xing (VBR) or Info (CBR) frame describing a stream in the format of the given header.
+
+    The frame gets the lowest bitrate it fits in, with no CRC and no padding. Its side info is all zero,
+    so decoders that don't know the tag play it as a frame of silence.
+    """
+    tag_offset = 4 + header.side_info_length
+    for bitrate_index, bitrate in enumerate(BITRATES[header.version]):
+        if not bitrate:
+            continue
+        raw = bytes([header.raw[0], header.raw[1] | 0b1, (header.raw[2] & 0b00001101) | bitrate_index << 4,
+                     header.raw[3]])
+        info_header = dataclasses.replace(header, bitrate=bitrate * 1000, padding=0, raw=raw)
+        if info_header.frame_length >= tag_offset + XING_TAG_SIZE:
+            break
+    tag = (
+        (b"Xing" if vbr else b"Info")
+        + struct.pack(">III", XING_FLAG_FRAMES | XING_FLAG_BYTES | XING_FLAG_TOC, frame_count, byte_count)
+        + toc
+    )
+    return raw + bytes(header.side_info_length) + tag + bytes(info_header.frame_length - tag_offset - len(tag))
+
+
+class Mp3FrameWriter:
+    """
+    Writes MPEG frames of mp3 streams to a file as one stream, headed by a Xing/Info frame describing it.
+
+    The frames are checked one by one: anything between them that isn't a frame in the format of the stream
+    is dropped, and so is a truncated last frame. A placeholder of the info frame is written first and filled
+    in on close, once the frame count, byte count and seek table of the whole stream are known.
+    """
+
+    def __init__(self, file: BinaryIO, header: Mp3FrameHeader):
+        self.file = file
+        self.header = header
+        self.start = file.tell()
+        # Frame length for the third header byte (bitrate, sample rate and padding bits) of a frame of the stream
+        self.frame_lengths = [0] * 256
+        for b3 in range(256):
+            frame_header = parse_frame_header(bytes([header.raw[0], header.raw[1], b3, header.raw[3]]))
+            if frame_header and frame_header.sample_rate == header.sample_rate:
+                self.frame_lengths[b3] = frame_header.frame_length
+        self.frame_offsets = array.array("Q")  # offset of every frame in the stream
+        self.bitrates = set()
+        self.info_frame_length = len(make_info_frame(header, 0, 0, bytes(XING_TOC_SIZE), False))
+        self.size = self.info_frame_length  # of the stream written so far, with the info frame
+        file.write(bytes(self.info_frame_length))
+
+    def write_frames(self, data: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """Write the frames of data between start and end, returns the number of frames written."""
+        end = len(data) if end is None else end
+        frame_count, pos = self._write_frames(data, start, end)
+        if pos < end:
+            logger.debug(f"Dropping a truncated frame of {end - pos} bytes")
+        return frame_count
+
+    def copy_frames(self, file: BinaryIO, end: int, block_size: int = COPY_BLOCK_SIZE) -> int:
+        """
+        Write the frames of a file from its current position up to end, read block by block.
+
+        A frame cut by the end of a block is carried over to the next one. Returns the number of frames written.
+        """
+        frame_count = 0
+        remaining = end - file.tell()
+        carry = b""
+        while remaining > 0:
+            block = file.read(min(block_size, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            data = carry + block if carry else block
+            block_frame_count, pos = self._write_frames(data, 0, len(data))
+            frame_count += block_frame_count
+            carry = data[pos:]
+        if carry:
+            logger.debug(f"Dropping a truncated frame of {len(carry)} bytes")
+        return frame_count
+
+    def _write_frames(self, data: bytes, start: int, end: int) -> Tuple[int, int]:
+        # Returns the number of frames written and where a frame truncated by end (if any) starts
+        frame_lengths = self.frame_lengths
+        sync = self.header.raw[1] | 0b1  # with or without CRC
+        frame_count = 0
+        run_start = None
+        pos = start
+        while pos + 4 <= end:
+            frame_length = frame_lengths[data[pos + 2]] if data[pos] == 0xFF and data[pos + 1] | 0b1 == sync else 0
+            if not frame_length or pos + frame_length > end:
+                if run_start is not None:
+                    self._write(data, run_start, pos)
+                    run_start = None
+                if frame_length:
+                    break
+                # Skip to the next possible frame header
+                pos = data.find(b"\xff", pos + 1, end)
+                if pos == -1:
+                    return frame_count, end
+                continue
+            if run_start is None:
+                run_start = pos
+            self.frame_offsets.append(self.size + pos - run_start)
+            self.bitrates.add(data[pos + 2] >> 4)
+            frame_count += 1
+            pos += frame_length
+        if run_start is not None:
+            self._write(data, run_start, pos)
+        return frame_count, pos
+
+    def _write(self, data: bytes, start: int, end: int):
+        self.file.write(memoryview(data)[start:end])
+        self.size += end - start
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.frame_offsets)
+
+    def get_toc(self) -> bytes:
+        """Seek table: for every percent of the duration, the position of its frame in 1/256 of the stream size."""
+        if not self.frame_count:
+            return bytes(XING_TOC_SIZE)
+        return bytes(
+            min(255, self.frame_offsets[i * self.frame_count // XING_TOC_SIZE] * 256 // self.size)
+            for i in range(XING_TOC_SIZE)
+        )
+
+    def close(self):
+        """Fill in the info frame, the file is left positioned at the end of the stream."""
+        info_frame = make_info_frame(self.header, self.frame_count, self.size, self.get_toc(), len(self.bitrates) > 1)
+        self.file.seek(self.start)
+        self.file.write(info_frame)
+        self.file.seek(self.start + self.size)
+
+
+def merge_mp3_segments(segments: List[bytes], output_file: str) -> bool:
+    """
+    Merge mp3 files into one stream with a single Xing/Info header, concatenating their frames without decoding.
+
+    The ID3 tags and info frames of the segments are dropped, so players get the duration and seek positions
+    of the whole stream from the new header. Returns False (without writing anything) if the segments don't
+    share one format and need to be re-encoded.
+    """
+    spans = []
+    first_header = None
+    for data in segments:
+        start, end, header = find_audio_frames(data)
+        if header is None:
+            logger.debug("Skipping an audio segment without MPEG audio frames")
+            continue
+        if first_header is None:
+            first_header = header
+        elif not first_header.is_compatible(header):
+            logger.warning("Format of the mp3 audio segments differs, falling back to re-encoding")
+            return False
+        spans.append((data, start, end))
+    if first_header is None:
+        logger.warning("No MPEG audio frames found in the audio segments, falling back to re-encoding")
+        return False
+
+    with open(output_file, "wb") as outfile:
+        writer = Mp3FrameWriter(outfile, first_header)
+        for data, start, end in spans:
+            writer.write_frames(data, start, end)
+        writer.close()
+    logger.debug(f"Wrote {writer.frame_count} MPEG frames to {output_file}")
+    return True
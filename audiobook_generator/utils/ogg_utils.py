@@ -0,0 +1,141 @@
+import io
+import logging
+from typing import List, Optional, Tuple
+
+from mutagen.ogg import OggPage, error as OggError
+
+logger = logging.getLogger(__name__)
+
+OPUS_HEAD = b"OpusHead"
+# Identification and comment header, the audio packets of an Ogg Opus stream start on the page after them
+OPUS_HEADER_PACKET_COUNT = 2
+# Frame size in 48 kHz samples for each configuration of the TOC byte of an Opus packet (RFC 6716, 3.1):
+# SILK (10, 20, 40, 60 ms in three bandwidths), Hybrid (10, 20 ms in two) and CELT (2.5, 5, 10, 20 ms in four)
+OPUS_FRAME_SIZES = [480, 960, 1920, 2880] * 3 + [480, 960] * 2 + [120, 240, 480, 960] * 4
+NO_GRANULE_POSITION = -1  # of pages on which no packet ends
+
+
+def get_opus_packet_samples(packet: bytes) -> int:
+    """Duration of an Opus packet in 48 kHz samples, from its TOC byte (and frame count byte)."""
+    if not packet:
+        return 0
+    toc = packet[0]
+    code = toc & 0b11
+    if code == 0:
+        frame_count = 1
+    elif code in (1, 2):
+        frame_count = 2
+    else:
+        frame_count = packet[1] & 0b111111 if len(packet) > 1 else 0
+    return OPUS_FRAME_SIZES[toc >> 3] * frame_count
+
+
+def read_opus_stream(data: bytes) -> Optional[Tuple[List[OggPage], List[OggPage]]]:
+    """
+    Read the pages of an Ogg Opus file, split into the pages of its headers and of its audio.
+
+    Returns None if the file isn't a single Ogg Opus stream.
+    """
+    pages = []
+    fileobj = io.BytesIO(data)
+    try:
+        while True:
+            pages.append(OggPage(fileobj))
+    except EOFError:
+        pass
+    except OggError as e:
+        logger.warning(f"Invalid Ogg page in an audio segment: {e}")
+        return None
+    if not pages or not pages[0].packets or not pages[0].packets[0].startswith(OPUS_HEAD):
+        return None
+    if any(page.serial != pages[0].serial for page in pages):
+        return None
+
+    packet_count = 0
+    for i, page in enumerate(pages):
+        packet_count += len(page.packets) - (not page.complete)
+        if packet_count >= OPUS_HEADER_PACKET_COUNT:
+            if packet_count > OPUS_HEADER_PACKET_COUNT or not page.complete:
+                return None
+            return pages[:i + 1], pages[i + 1:]
+    return None
+
+
+def get_opus_format(head: bytes) -> bytes:
+    # Fields of the identification header that must match for the audio to be decoded by one decoder:
+    # everything but the pre-skip and the informational input sample rate
+    return head[:10] + head[16:]
+
+
+def merge_ogg_segments(segments: List[bytes], output_file: str) -> bool:
+    """
+    Merge Ogg Opus files into one logical stream without decoding.
+
+    The headers of the first file are kept, and the audio pages of all files are renumbered into its stream
+    with continuous granule positions, recomputed from the duration of the packets. The end trimming of
+    the last file is kept. Returns False (without writing anything) if the segments aren't Ogg Opus streams
+    of one format and need to be re-encoded. The segments (bytes or memory mapped files) are read one at a
+    time, only the pages of one of them are held in memory.
+    """
+    head = None
+    for data in segments:
+        stream = read_opus_stream(data)
+        if stream is None:
+            logger.warning("Audio segment isn't an Ogg Opus stream, falling back to re-encoding")
+            return False
+        stream_head = stream[0][0].packets[0]
+        if head is not None and get_opus_format(stream_head) != get_opus_format(head):
+            logger.warning("Format of the Ogg Opus audio segments differs, falling back to re-encoding")
+            return False
+        head = head or stream_head
+    if head is None:
+        logger.warning("No audio segments to merge")
+        return False
+
+    serial = None
+    sequence = 0
+    last_page = end_position = None  # pages are written one behind, the last one ends the stream
+    with open(output_file, "wb") as outfile:
+        for page, page_end_position in iter_merged_pages(segments):
+            if last_page is not None:
+                outfile.write(last_page.write())
+            serial = page.serial if serial is None else serial
+            page.serial = serial
+            page.sequence = sequence
+            sequence += 1
+            last_page, end_position = page, page_end_position
+        if end_position is not None:
+            last_page.position = min(last_page.position, end_position)
+        last_page.last = True
+        outfile.write(last_page.write())
+    return True
+
+
+def iter_merged_pages(segments: List[bytes]):
+    """
+    Pages of the merged stream: the headers of the first stream, then the audio pages of all streams with
+    their granule positions in the merged stream. Every page comes with the granule position its stream
+    gave it, shifted into the merged stream (None if no packet ends on it), which may trim the end.
+    """
+    granule_position = 0  # samples of the packets ending on the pages so far
+    for i, data in enumerate(segments):
+        header_pages, audio_pages = read_opus_stream(data)
+        if i == 0:
+            for page in header_pages:
+                yield page, None
+        stream_start = granule_position
+        packet_start = b""  # first bytes of the packet continued on the next page
+        for page in audio_pages:
+            for j, packet in enumerate(page.packets):
+                if j == 0 and page.continued:
+                    packet = packet_start + packet
+                if j == len(page.packets) - 1 and not page.complete:
+                    packet_start = packet[:2]
+                else:
+                    granule_position += get_opus_packet_samples(packet)
+            ends_packet = len(page.packets) > 1 or page.complete
+            end_position = stream_start + page.position if ends_packet else None
+            page.position = granule_position if ends_packet else NO_GRANULE_POSITION
+            page.first = False
+            page.last = False
+            yield page, end_position
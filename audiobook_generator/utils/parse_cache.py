@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import zlib
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache directory of the web UI, which parses the same book for every preview and estimate
+DEFAULT_PARSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "epub_to_audiobook", "parsed_books")
+
+# Bumped whenever parsing changes the chapters of a book, so entries of older versions are not used
+PARSE_CACHE_VERSION = 1
+# Entry layout: magic, chapter count, (title length, text length) per chapter, then the UTF-8 encoded titles
+# and texts, all zlib compressed
+ENTRY_MAGIC = b"APC1"
+ENTRY_HEADER = struct.Struct("<4sI")
+CHAPTER_HEADER = struct.Struct("<II")
+# Compression level of entries, the texts compress well already at the fastest level
+COMPRESSION_LEVEL = 1
+FILE_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_file_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(FILE_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_parse_cache_key(config, break_string) -> str:
+    """Key of the chapters of a book: the book's content and every option that changes its parsed chapters."""
+    search_and_replace_file = config.search_and_replace_file
+    payload = json.dumps({
+        "version": PARSE_CACHE_VERSION,
+        "book": get_file_hash(config.input_file),
+        "newline_mode": config.newline_mode,
+        "title_mode": config.title_mode,
+        "remove_endnotes": bool(config.remove_endnotes),
+        "remove_reference_numbers": bool(config.remove_reference_numbers),
+        "search_and_replace": get_file_hash(search_and_replace_file) if search_and_replace_file else None,
+        "break_string": break_string,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_chapters(chapters: List[Tuple[str, str]]) -> bytes:
+    encoded = [(title.encode("utf-8"), text.encode("utf-8")) for title, text in chapters]
+    parts = [ENTRY_HEADER.pack(ENTRY_MAGIC, len(encoded))]
+    parts.extend(CHAPTER_HEADER.pack(len(title), len(text)) for title, text in encoded)
+    for title, text in encoded:
+        parts.append(title)
+        parts.append(text)
+    return zlib.compress(b"".join(parts), COMPRESSION_LEVEL)
+
+
+def decode_chapters(data: bytes) -> List[Tuple[str, str]]:
+    data = zlib.decompress(data)
+    magic, count = ENTRY_HEADER.unpack_from(data)
+    if magic != ENTRY_MAGIC:
+        raise ValueError("Not a parse cache entry")
+    offset = ENTRY_HEADER.size + count * CHAPTER_HEADER.size
+    chapters = []
+    for title_length, text_length in CHAPTER_HEADER.iter_unpack(data[ENTRY_HEADER.size:offset]):
+        title = data[offset:offset + title_length].decode("utf-8")
+        offset += title_length
+        text = data[offset:offset + text_length].decode("utf-8")
+        offset += text_length
+        chapters.append((title, text))
+    if offset != len(data):
+        raise ValueError("Truncated parse cache entry")
+    return chapters
+
+
+class ParseCache:
+    """
+    On-disk cache of the parsed chapters of books, shared across runs.
+
+    Entries are keyed by the hash of the book file and the parser options (see get_parse_cache_key), so a book
+    is only parsed again after it or the options changed. Entries are written atomically, a corrupt entry is
+    treated as missing.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __str__(self) -> str:
+        return f"ParseCache(cache_dir={self.cache_dir})"
+
+    def get(self, key: str) -> Optional[List[Tuple[str, str]]]:
+        try:
+            with open(self._get_path(key), "rb") as f:
+                return decode_chapters(f.read())
+        except FileNotFoundError:
+            return None
+        except (zlib.error, struct.error, ValueError) as e:
+            logger.warning(f"Ignoring corrupt parse cache entry {key}: {e}")
+            return None
+
+    def put(self, key: str, chapters: List[Tuple[str, str]]):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(encode_chapters(chapters))
+        os.replace(tmp_path, self._get_path(key))
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.chapters")
+
+
+def get_parse_cache(config) -> Optional[ParseCache]:
+    if not config.parse_cache_dir:
+        return None
+    return ParseCache(config.parse_cache_dir)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes of responses telling the client to slow down
+THROTTLING_STATUS_CODES = (429, 503)
+# Pause of all requests after a throttled response without Retry-After header, in seconds
+DEFAULT_THROTTLE_PAUSE = 1.0
+# Throttled responses within this many seconds after a decrease belong to the same burst, and
+# only halve the concurrency limit once
+DECREASE_COOLDOWN = 2.0
+# Interval of the rate log line, in seconds
+RATE_LOG_INTERVAL = 30.0
+# Longest sleep of a waiting request before it checks again, in seconds
+MAX_POLL_INTERVAL = 0.1
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, which holds either seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def get_throttling(error: Optional[BaseException]) -> Tuple[bool, Optional[float]]:
+    """
+    Whether a request failed with a throttled response, and the seconds to wait from its Retry-After header.
+
+    Understands the errors of requests and openai (status code on the response) and aiohttp (status on the error).
+    """
+    if error is None:
+        return False, None
+    response = getattr(error, "response", None)
+    status_code = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, "status_code", None)
+    if status_code not in THROTTLING_STATUS_CODES:
+        return False, None
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None)
+    return True, parse_retry_after(headers.get("Retry-After") if headers else None)
+
+
+class RateLimitedRequest:
+    """Holds a slot of the rate limiter for the duration of a request, usable with `with` and `async with`."""
+
+    def __init__(self, rate_limiter, chars: int):
+        self.rate_limiter = rate_limiter
+        self.chars = chars
+
+    def __enter__(self):
+        self.rate_limiter.acquire(self.chars)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.rate_limiter.release(exc)
+        return False
+
+    async def __aenter__(self):
+        await self.rate_limiter.acquire_async(self.chars)
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        self.rate_limiter.release(exc)
+        return False
+
+
+class RateLimiter:
+    """
+    Rate controller shared by all workers and threads that send requests to a TTS service.
+
+    Requests are limited by token buckets for requests per second and characters per second, and by an AIMD
+    concurrency limit: every successful request raises the limit by 1/limit (about +1 per round of requests),
+    a throttled response (429/503) halves it and pauses all requests for its Retry-After time. So the workers
+    back off together instead of each retrying on its own, and creep back up to the quota afterwards.
+
+    The state lives in shared memory, so a limiter created in the parent process can be handed to
+    worker processes (e.g. as initializer argument of a multiprocessing pool).
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_second: Optional[float] = None,
+                 chars_per_second: Optional[float] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_second = requests_per_second or 0.0  # 0 means unlimited
+        self.chars_per_second = chars_per_second or 0.0
+        now = time.time()
+
+        self.lock = multiprocessing.Lock()
+        self.concurrency_limit = multiprocessing.Value("d", float(self.max_concurrency), lock=False)
+        self.in_flight = multiprocessing.Value("i", 0, lock=False)
+        self.request_tokens = multiprocessing.Value("d", max(1.0, self.requests_per_second), lock=False)
+        self.char_tokens = multiprocessing.Value("d", self.chars_per_second, lock=False)
+        self.last_refill = multiprocessing.Value("d", now, lock=False)
+        self.paused_until = multiprocessing.Value("d", 0.0, lock=False)
+        self.last_decrease = multiprocessing.Value("d", 0.0, lock=False)
+        # Counters of the current log interval
+        self.window_start = multiprocessing.Value("d", now, lock=False)
+        self.window_requests = multiprocessing.Value("i", 0, lock=False)
+        self.window_chars = multiprocessing.Value("d", 0.0, lock=False)
+        self.window_throttled = multiprocessing.Value("i", 0, lock=False)
+
+    def __str__(self) -> str:
+        return (
+            f"RateLimiter(max_concurrency={self.max_concurrency}, requests_per_second={self.requests_per_second or 'unlimited'}, "
+            f"chars_per_second={self.chars_per_second or 'unlimited'})"
+        )
+
+    def request(self, chars: int) -> RateLimitedRequest:
+        """Rate limited request of chars characters, releases its slot according to the outcome of the request."""
+        return RateLimitedRequest(self, chars)
+
+    def acquire(self, chars: int):
+        """Block until a request of chars characters may be sent."""
+        while True:
+            wait = self.try_acquire(chars)
+            if wait == 0:
+                return
+            time.sleep(min(wait, MAX_POLL_INTERVAL))
+
+    async def acquire_async(self, chars: int):
+        """Wait until a request of chars characters may be sent, without blocking the event loop."""
+        while True:
+            wait = self.try_acquire(chars)
+            if wait == 0:
+                return
+            await asyncio.sleep(min(wait, MAX_POLL_INTERVAL))
+
+    def try_acquire(self, chars: int) -> float:
+        """Take a concurrency slot and the tokens of a request if available, else return the seconds to wait."""
+        with self.lock:
+            now = time.time()
+            self._refill(now)
+
+            if now < self.paused_until.value:
+                return self.paused_until.value - now
+            if self.in_flight.value >= int(self.concurrency_limit.value):
+                return MAX_POLL_INTERVAL
+            if self.requests_per_second and self.request_tokens.value < 1:
+                return (1 - self.request_tokens.value) / self.requests_per_second
+            # A request larger than the bucket is let through once the bucket is full, running into debt
+            needed_chars = min(chars, self.chars_per_second)
+            if self.chars_per_second and self.char_tokens.value < needed_chars:
+                return (needed_chars - self.char_tokens.value) / self.chars_per_second
+
+            self.in_flight.value += 1
+            if self.requests_per_second:
+                self.request_tokens.value -= 1
+            if self.chars_per_second:
+                self.char_tokens.value -= chars
+            self.window_requests.value += 1
+            self.window_chars.value += chars
+            return 0
+
+    def release(self, error: Optional[BaseException] = None):
+        """
+        Return the concurrency slot of a finished request, and adapt the concurrency limit to its outcome:
+        increased after a success, halved after a throttled response, unchanged after other errors.
+        """
+        throttled, retry_after = get_throttling(error)
+        with self.lock:
+            now = time.time()
+            self.in_flight.value = max(0, self.in_flight.value - 1)
+            if throttled:
+                self.window_throttled.value += 1
+                pause = retry_after if retry_after is not None else DEFAULT_THROTTLE_PAUSE
+                self.paused_until.value = max(self.paused_until.value, now + pause)
+                if now - self.last_decrease.value >= DECREASE_COOLDOWN:
+                    self.concurrency_limit.value = max(1.0, self.concurrency_limit.value / 2)
+                    self.last_decrease.value = now
+                    logger.warning(
+                        f"Rate limiter: request throttled, pausing requests for {pause:.1f}s and reducing concurrency "
+                        f"limit to {int(self.concurrency_limit.value)}"
+                    )
+            elif error is None:
+                self.concurrency_limit.value = min(
+                    float(self.max_concurrency), self.concurrency_limit.value + 1 / self.concurrency_limit.value
+                )
+            self._log_rate(now)
+
+    def _refill(self, now: float):
+        elapsed = now - self.last_refill.value
+        self.last_refill.value = now
+        if self.requests_per_second:
+            self.request_tokens.value = min(
+                max(1.0, self.requests_per_second), self.request_tokens.value + elapsed * self.requests_per_second
+            )
+        if self.chars_per_second:
+            self.char_tokens.value = min(
+                self.chars_per_second, self.char_tokens.value + elapsed * self.chars_per_second
+            )
+
+    def _log_rate(self, now: float):
+        elapsed = now - self.window_start.value
+        if elapsed < RATE_LOG_INTERVAL:
+            return
+        logger.info(
+            f"Rate limiter: {self.window_requests.value / elapsed:.2f} requests/s, "
+            f"{self.window_chars.value / elapsed:.0f} chars/s, {self.window_throttled.value} throttled, "
+            f"concurrency limit {int(self.concurrency_limit.value)}/{self.max_concurrency}, "
+            f"{self.in_flight.value} in flight"
+        )
+        self.window_start.value = now
+        self.window_requests.value = 0
+        self.window_chars.value = 0.0
+        self.window_throttled.value = 0
+
+
+def is_throttled(error: BaseException) -> bool:
+    return get_throttling(error)[0]
+
+
+def get_rate_limiter(config, max_concurrency: int) -> RateLimiter:
+    return RateLimiter(max_concurrency, config.max_requests_per_second, config.max_chars_per_second)
@@ -0,0 +1,101 @@
+import functools
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+from typing import Optional
+
+from pydub import AudioSegment
+
+from audiobook_generator.utils.mp3_utils import Mp3FrameHeader, make_silence
+from audiobook_generator.utils.wav_utils import WAVE_FORMAT_EXTENSIBLE, WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM
+
+logger = logging.getLogger(__name__)
+
+# Silences (per format and duration) kept in memory by each process, a chapter only needs one or two
+SILENCE_CACHE_SIZE = 32
+
+# Folder of the encoded silences in the cache directory
+SILENCE_FOLDER = "silence"
+
+# Containers of the Opus audio of the TTS services, their silence is encoded in Opus too
+OPUS_EXTENSIONS = ("ogg", "opus", "webm")
+
+
+@functools.lru_cache(maxsize=SILENCE_CACHE_SIZE)
+def get_mp3_silence(header: Mp3FrameHeader, duration_ms: int) -> bytes:
+    """Silent mp3 frames in the format of the given header, rounded up to whole frames."""
+    return make_silence(header, duration_ms)
+
+
+@functools.lru_cache(maxsize=SILENCE_CACHE_SIZE)
+def get_pcm_silence(sample_rate: int, channels: int, duration_ms: int, sample_width: int = 2) -> bytes:
+    """Interleaved PCM samples of silence. Samples of 8 bits are unsigned, like in wav files."""
+    sample = b"\x80" if sample_width == 1 else bytes(sample_width)
+    return sample * (sample_rate * duration_ms // 1000 * channels)
+
+
+def get_wav_silence(fmt: bytes, duration_ms: int) -> Optional[bytes]:
+    """
+    Samples of silence in the format of the fmt chunk of a wav file.
+
+    Returns None for compressed formats (like mu-law), whose silence isn't a sample of zero.
+    """
+    if len(fmt) < 16:
+        return None
+    format_tag, channels, sample_rate, _, block_align, _ = struct.unpack_from("<HHIIHH", fmt)
+    if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag, = struct.unpack_from("<H", fmt, 24)  # first two bytes of the sub format GUID
+    if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) or not channels or block_align % channels:
+        return None
+    return get_pcm_silence(sample_rate, channels, duration_ms, block_align // channels)
+
+
+@functools.lru_cache(maxsize=SILENCE_CACHE_SIZE)
+def get_encoded_silence(file_extension: str, sample_rate: int, channels: int, duration_ms: int,
+                        cache_dir: Optional[str] = None) -> bytes:
+    """
+    A file of silence in the container and codec of file_extension, encoded by ffmpeg.
+
+    Memoized in each process, and stored in the cache directory (if any) so that it's only encoded once
+    across processes and runs. The files are entries of the TTS cache there, evicted along with them.
+    """
+    file_name = f"{duration_ms}ms_{sample_rate}hz_{channels}ch.{file_extension}"
+    if cache_dir:
+        path = os.path.join(cache_dir, SILENCE_FOLDER, file_name)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        # Written atomically, another process may encode the same silence at the same time
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=f".{file_extension}")
+        os.close(fd)
+        try:
+            silence = encode_silence(tmp_path, sample_rate, channels, duration_ms)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return silence
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        return encode_silence(os.path.join(tmp_dir, file_name), sample_rate, channels, duration_ms)
+
+
+def encode_silence(output_file: str, sample_rate: int, channels: int, duration_ms: int) -> bytes:
+    """Encode silence with ffmpeg into output_file, whose extension selects the container. Returns its content."""
+    file_extension = os.path.splitext(output_file)[1][1:].lower()
+    codec_args = ["-c:a", "libopus"] if file_extension in OPUS_EXTENSIONS else []
+    logger.info(f"Encoding {duration_ms} ms of silence in {file_extension}, {sample_rate} Hz, {channels} channels")
+    result = subprocess.run(
+        [AudioSegment.converter, "-y", "-loglevel", "error", "-f", "lavfi",
+         "-i", f"anullsrc=r={sample_rate}:cl={channels}c", "-t", str(duration_ms / 1000), *codec_args, output_file],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode silence: {result.stderr.decode('utf-8', 'replace').strip()}")
+    with open(output_file, "rb") as f:
+        return f.read()
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import unicodedata
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Synthesis params that don't change the audio of a single chunk
+IGNORED_PARAMS = ("use_pydub_merge",)
+
+# After eviction the cache is shrunk to this fraction of its max size, so eviction doesn't run on every put
+EVICTION_LOW_WATERMARK = 0.9
+
+
+def normalize_text(text: str) -> str:
+    # Whitespace differences don't change the synthesized speech
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def get_cache_key(text: str, params: dict) -> str:
+    key_params = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+    payload = json.dumps({"text": normalize_text(text), "params": key_params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    Content addressed on-disk cache for synthesized chunks.
+
+    Entries are keyed by the hash of the normalized chunk text and the synthesis params, so the same text
+    with the same voice and settings is only synthesized once across runs. The cache directory can be shared
+    by several processes: entries are written atomically and the least recently used entries (by mtime,
+    which is refreshed on every hit) are evicted once the cache grows over max_size bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int, file_extension: str):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.file_extension = file_extension
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.current_size = sum(size for _, size, _ in self._scan())
+
+    def __str__(self) -> str:
+        return f"TTSCache(cache_dir={self.cache_dir}, max_size={self.max_size}, current_size={self.current_size})"
+
+    def get(self, text: str, params: dict) -> Optional[io.BytesIO]:
+        path = self._get_path(get_cache_key(text, params))
+        try:
+            with open(path, "rb") as f:
+                audio = io.BytesIO(f.read())
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return audio
+
+    def put(self, text: str, params: dict, audio: io.BytesIO):
+        path = self._get_path(get_cache_key(text, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(audio.getbuffer())
+        os.replace(tmp_path, path)
+        self.current_size += audio.getbuffer().nbytes
+        if self.current_size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        # Rescan, other processes may have added or evicted entries in the meantime
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self.current_size = sum(size for _, size, _ in entries)
+        target_size = self.max_size * EVICTION_LOW_WATERMARK
+        evicted = 0
+        for path, size, _ in entries:
+            if self.current_size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # already evicted by another process
+            self.current_size -= size
+            evicted += 1
+        logger.info(f"TTS cache: evicted {evicted} entries, size is now {self.current_size} bytes")
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{self.file_extension}")
+
+    def _scan(self):
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime
+
+
+def get_tts_cache(config, tts_provider) -> Optional[TTSCache]:
+    if not config.tts_cache_dir:
+        return None
+    return TTSCache(
+        config.tts_cache_dir,
+        int(config.tts_cache_max_size) * 1024 * 1024,
+        tts_provider.get_output_file_extension(),
+    )
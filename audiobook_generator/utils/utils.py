@@ -1,17 +1,39 @@
 import logging
-from typing import List
-import tempfile
+from typing import List, Optional
 import os
 import io
+import subprocess
 from pydub import AudioSegment
+from pydub.audio_segment import fix_wav_headers
 from mutagen.id3._frames import TIT2, TPE1, TALB, TRCK
 from mutagen.id3 import ID3, ID3NoHeaderError
+from mutagen.wave import WAVE
 from typing import List
 from sentencex import segment
 import os
 
+from audiobook_generator.utils.audio_concat import FFMPEG_FORMATS
+from audiobook_generator.utils.mp3_utils import merge_mp3_segments
+from audiobook_generator.utils.ogg_utils import merge_ogg_segments
+from audiobook_generator.utils.wav_utils import is_wav, merge_pcm_segments, merge_wav_segments
+from audiobook_generator.utils.webm_utils import merge_webm_segments
+
 logger = logging.getLogger(__name__)
 
+# ffmpeg formats of raw PCM samples, by sample width in bytes (8 bit samples are unsigned, like in wav files)
+PCM_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}
+
+# Lossless mergers of the containers with direct write support, by file extension. They return False
+# (without writing anything) if the segments don't share one format and need to be re-encoded.
+DIRECT_MERGERS = {
+    "mp3": merge_mp3_segments,
+    "wav": merge_wav_segments,
+    "pcm": merge_pcm_segments,
+    "ogg": merge_ogg_segments,
+    "opus": merge_ogg_segments,
+    "webm": merge_webm_segments,
+}
+
 
 def split_text(text: str, max_chars: int, language: str) -> List[str]:
     """
@@ -35,20 +57,25 @@ def split_text(text: str, max_chars: int, language: str) -> List[str]:
     sentences = list(segment(language, text))
     
     chunks = []
-    current_chunk = ""
+    # Sentences of the current chunk, joined once when the chunk is complete
+    current_parts = []
+    current_len = 0
     
     for sentence in sentences:
-        # Add a space between sentences if current_chunk is not empty
-        space = " " if current_chunk else ""
+        # Add a space between sentences if current chunk is not empty
+        space = 1 if current_len else 0
         # Check if adding the sentence would exceed max_chars
-        if len(current_chunk) + len(space) + len(sentence) <= max_chars:
-            current_chunk += space + sentence
+        if current_len + space + len(sentence) <= max_chars:
+            if current_len:
+                current_parts.append(sentence)
+            else:
+                current_parts = [sentence]
+            current_len += space + len(sentence)
         # If the sentence itself is longer than max_chars, split it
         elif len(sentence) > max_chars:
             # Add the current chunk if it's not empty
-            if current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = ""
+            if current_len:
+                chunks.append(" ".join(current_parts))
             
             # Split the long sentence
             sentence_chunks = split_long_sentence(sentence, max_chars)
@@ -57,16 +84,18 @@ def split_text(text: str, max_chars: int, language: str) -> List[str]:
             chunks.extend(sentence_chunks[:-1])
             
             # Start a new chunk with the last sentence chunk
-            current_chunk = sentence_chunks[-1]
+            current_parts = [sentence_chunks[-1]]
+            current_len = len(sentence_chunks[-1])
         # Otherwise, start a new chunk with this sentence
         else:
-            if current_chunk:
-                chunks.append(current_chunk)
-            current_chunk = sentence
+            if current_len:
+                chunks.append(" ".join(current_parts))
+            current_parts = [sentence]
+            current_len = len(sentence)
     
     # Add the last chunk if it's not empty
-    if current_chunk:
-        chunks.append(current_chunk)
+    if current_len:
+        chunks.append(" ".join(current_parts))
     
     # For DEBUG only
     # # Assert that no chunk exceeds max_chars
@@ -82,10 +111,28 @@ def split_text(text: str, max_chars: int, language: str) -> List[str]:
     
     return chunks
 
+
+# Punctuation marks to split long sentences at, in order of priority
+SPLIT_PUNCTUATIONS = [
+    '。', '！', '？',  # Chinese end-of-sentence
+    '. ', '! ', '? ',  # English end-of-sentence with space
+    '；', ';',  # Semicolons
+    '，', ',',  # Commas
+    '：', ':',  # Colons
+    '）', ')', ']', '】', '}', '」', '』',  # Closing parentheses and brackets
+    '、',  # Chinese enumeration comma
+    '—', '-', '–',  # Dashes
+    ' ',  # Spaces as last resort
+]
+
+
 def split_long_sentence(sentence: str, max_chars: int) -> List[str]:
     """
     Split a long sentence into smaller parts based on punctuation and spaces.
     
+    Each part ends at the rightmost occurrence of the highest priority punctuation mark within max_chars.
+    The sentence is never re-sliced, the search works on index spans of the original string.
+    
     Args:
         sentence: The sentence to split
         max_chars: The maximum number of characters per part
@@ -97,63 +144,51 @@ def split_long_sentence(sentence: str, max_chars: int) -> List[str]:
     if max_chars < 5:
         return [sentence[i:i+max_chars] for i in range(0, len(sentence), max_chars)]
     
-    # Define punctuation marks in order of priority
-    punctuations = [
-        '。', '！', '？',  # Chinese end-of-sentence
-        '. ', '! ', '? ',  # English end-of-sentence with space
-        '；', ';',  # Semicolons
-        '，', ',',  # Commas
-        '：', ':',  # Colons
-        '）', ')', ']', '】', '}', '」', '』',  # Closing parentheses and brackets
-        '、',  # Chinese enumeration comma
-        '—', '-', '–',  # Dashes
-        ' ',  # Spaces as last resort
-    ]
+    # Only punctuation marks occurring in the sentence at all are searched for in every window
+    punctuations = [punctuation for punctuation in SPLIT_PUNCTUATIONS if punctuation in sentence]
     
     parts = []
-    remaining = sentence
+    start = 0
+    end = len(sentence)
     
-    while remaining:
-        if len(remaining) <= max_chars:
-            parts.append(remaining)
+    while start < end:
+        if end - start <= max_chars:
+            parts.append(sentence[start:])
             break
         
-        # Try to find the best split point based on punctuation marks
-        best_split_idx = -1
-        
+        # Find the best split point based on punctuation marks, the punctuation mark
+        # (or space) is kept at the end of the current part
+        window_end = start + max_chars
+        # If no punctuation is found, split at max_chars
+        split_idx = window_end
         for punctuation in punctuations:
             # Find the rightmost occurrence of the punctuation within max_chars
-            split_idx = remaining[:max_chars].rfind(punctuation)
-            
-            if split_idx != -1:
-                # For punctuation marks that are not spaces, include them in the current chunk
-                if punctuation != ' ':
-                    split_idx += len(punctuation)
-                else:
-                    # For spaces, exclude them from both chunks
-                    split_idx += 1
-                
-                best_split_idx = split_idx
+            idx = sentence.rfind(punctuation, start, window_end)
+            if idx != -1:
+                split_idx = idx + len(punctuation)
                 break
         
-        # If no punctuation is found, split at max_chars
-        if best_split_idx == -1:
-            best_split_idx = max_chars
-        
-        parts.append(remaining[:best_split_idx])
-        remaining = remaining[best_split_idx:]
+        parts.append(sentence[start:split_idx])
+        start = split_idx
     
     return parts
 
 
 def set_audio_tags(output_file, audio_tags):
     try:
-        try:
-            tags = ID3(output_file)
-            logger.debug(f"tags: {tags}")
-        except ID3NoHeaderError:
-            logger.debug(f"handling ID3NoHeaderError: {output_file}")
-            tags = ID3()
+        if output_file.lower().endswith(".wav"):
+            # The tags of a wav file go in an "id3 " chunk, an ID3 header in front would hide its RIFF header
+            wave_file = WAVE(output_file)
+            if wave_file.tags is None:
+                wave_file.add_tags()
+            tags = wave_file.tags
+        else:
+            try:
+                tags = ID3(output_file)
+                logger.debug(f"tags: {tags}")
+            except ID3NoHeaderError:
+                logger.debug(f"handling ID3NoHeaderError: {output_file}")
+                tags = ID3()
         tags.add(TIT2(encoding=3, text=audio_tags.title))
         tags.add(TPE1(encoding=3, text=audio_tags.author))
         tags.add(TALB(encoding=3, text=audio_tags.book_title))
@@ -176,57 +211,81 @@ def is_special_char(char: str) -> bool:
     return result
 
 
-def save_segment_tmp(segment: io.BytesIO, output_format: str, prefix: str = None) -> str:
+def run_ffmpeg(args: List[str], input_data: bytes, action: str) -> bytes:
+    """Run ffmpeg with input_data on its stdin, returns its stdout"""
+    process = subprocess.run(
+        [AudioSegment.converter, "-y", "-loglevel", "error", *args], input=input_data, capture_output=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to {action}: {process.stderr.decode(errors='replace').strip()}")
+    return process.stdout
+
+
+def decode_audio_segment(segment: io.BytesIO) -> AudioSegment:
     """
-    Save audio segment to a temporary file
-    
+    Decode an audio segment in memory to PCM, natively for wav and else with ffmpeg reading it from stdin
+
     Args:
         segment: Audio segment (io.BytesIO)
-        output_format: Audio file format
-        prefix: Optional prefix for the temporary filename
-        
+
     Returns:
-        Path to the temporary file
+        The decoded audio
     """
-    kwargs = {"delete": False, "suffix": f".{output_format}"}
-    if prefix:
-        kwargs["prefix"] = f"{prefix}_"
-        
-    with tempfile.NamedTemporaryFile(**kwargs) as tmp_file:
-        segment.seek(0)
-        tmp_file.write(segment.read())
-        logger.debug(f"Audio segment written to temporary file: {tmp_file.name}")
-        return tmp_file.name
+    data = segment.getvalue()
+    if not is_wav(data):
+        # A wav written to a pipe has no sizes in its header, they are filled in before it's read
+        data = bytearray(run_ffmpeg(["-i", "pipe:0", "-vn", "-f", "wav", "pipe:1"], data, "decode an audio segment"))
+        fix_wav_headers(data)
+        data = bytes(data)
+    return AudioSegment(data=data)
 
 
-def pydub_merge_audio_segments(tmp_files: List[str], output_file: str, output_format: str) -> None:
+def pydub_merge_audio_segments(audio_segments: List[io.BytesIO], output_file: str, output_format: str) -> None:
     """
-    Merge multiple audio segments into one and set audio tags
-    
+    Decode multiple audio segments and encode them into one file
+
+    Every segment is decoded to PCM in memory, they are converted to the highest sample rate, channel count and
+    sample width among them (like pydub does when adding them up) and joined in one buffer, which is encoded
+    once. No temporary files are written, wav and pcm output is written without ffmpeg.
+
     Args:
-        tmp_files: List of temporary file paths
+        audio_segments: List of audio segments in memory
         output_file: Path to the final output file
         output_format: Audio file format
     """
-    if not tmp_files:
-        logger.warning("No temporary files to merge")
+    if not audio_segments:
+        logger.warning("No audio segments to merge")
         return
-        
-    combined = AudioSegment.empty()
-    for tmp_file in tmp_files:
-        logger.debug(f"Loading chunk from temporary file: {tmp_file}")
-        segment = AudioSegment.from_file(tmp_file)
-        combined += segment
-        
-    # Export to final output file
-    logger.debug(f"Exporting to final output file: {output_file}")
-    combined.export(output_file, format=output_format)
-    logger.debug(f"Final output file exported: {output_file}")
 
-    # Delete the temporary files
-    for tmp_file in tmp_files:
-        os.remove(tmp_file)
-    logger.debug(f"Temporary files deleted: {tmp_files}")
+    decoded_segments = [decode_audio_segment(segment) for segment in audio_segments]
+    frame_rate = max(segment.frame_rate for segment in decoded_segments)
+    channels = max(segment.channels for segment in decoded_segments)
+    sample_width = max(segment.sample_width for segment in decoded_segments)
+    combined = AudioSegment(
+        data=b"".join(
+            segment.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(sample_width).raw_data
+            for segment in decoded_segments
+        ),
+        frame_rate=frame_rate,
+        channels=channels,
+        sample_width=sample_width,
+    )
+    del decoded_segments
+
+    output_format = output_format.lower()
+    if output_format == "wav":
+        combined.export(output_file, format="wav")
+    elif output_format == "pcm":
+        with open(output_file, "wb") as f:
+            f.write(combined.raw_data)
+    else:
+        pcm_format = PCM_FORMATS[sample_width]
+        run_ffmpeg(
+            ["-f", pcm_format, "-ar", str(frame_rate), "-ac", str(channels), "-i", "pipe:0",
+             "-f", FFMPEG_FORMATS.get(output_format, output_format), output_file],
+            combined.raw_data, f"encode {output_file}",
+        )
+    logger.debug(f"Final output file exported: {output_file}")
 
 
 def direct_merge_audio_segments(audio_segments: List[io.BytesIO], output_file: str) -> None:
@@ -250,7 +309,7 @@ def direct_merge_audio_segments(audio_segments: List[io.BytesIO], output_file: s
 
 
 def merge_audio_segments(audio_segments: List[io.BytesIO], output_file: str, output_format: str, 
-                          chunk_ids: List[str], use_pydub_merge: bool) -> None:
+                          chunk_ids: List[str], use_pydub_merge: bool, wav_fmt: Optional[bytes] = None) -> None:
     """
     Merge audio segments using either pydub or direct write method based on configuration
     
@@ -260,16 +319,23 @@ def merge_audio_segments(audio_segments: List[io.BytesIO], output_file: str, out
         output_format: Audio file format
         chunk_ids: List of IDs for each audio chunk
         use_pydub_merge: Whether to use pydub for merging (True) or direct write (False)
+        wav_fmt: fmt chunk of headerless wav segments, written in the header of the merged wav file
     """
+    direct_merger = DIRECT_MERGERS.get(output_format.lower())
+    if not use_pydub_merge and direct_merger:
+        logger.info(f"Using direct write to merge the {output_format} audio segments: {chunk_ids}")
+        segments = [segment.getvalue() for segment in audio_segments]
+        if wav_fmt is not None and direct_merger is merge_wav_segments:
+            merged = merge_wav_segments(segments, output_file, wav_fmt)
+        else:
+            merged = direct_merger(segments, output_file)
+        if merged:
+            return
+        use_pydub_merge = True
+
     if use_pydub_merge:
         logger.info(f"Using pydub to merge audio segments: {chunk_ids}")
-        tmp_files = []
-        for i, segment in enumerate(audio_segments):
-            tmp_file_path = save_segment_tmp(segment, output_format, chunk_ids[i])
-            tmp_files.append(tmp_file_path)
-
-        # Merge all audio chunks with pydub and create the final output file
-        pydub_merge_audio_segments(tmp_files, output_file, output_format)
+        pydub_merge_audio_segments(audio_segments, output_file, output_format)
     else:
         logger.info(f"Using direct write to merge audio segments: {chunk_ids}")
         # Direct write audio segments to output file
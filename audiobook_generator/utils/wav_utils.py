@@ -0,0 +1,110 @@
+import logging
+import struct
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RIFF_HEADER_SIZE = 12  # "RIFF", size, "WAVE"
+CHUNK_HEADER_SIZE = 8  # chunk id, size
+# Data size written by streaming encoders that don't know the length of the audio up front
+UNKNOWN_DATA_SIZES = (0, 0xFFFFFFFF)
+
+# Format tags of the fmt chunk
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_ALAW = 0x0006
+WAVE_FORMAT_MULAW = 0x0007
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def is_wav(data) -> bool:
+    return len(data) >= RIFF_HEADER_SIZE and bytes(data[:4]) == b"RIFF" and bytes(data[8:12]) == b"WAVE"
+
+
+def find_wav_data(data, file_size: Optional[int] = None) -> Tuple[Optional[bytes], int, int]:
+    """
+    Locate the audio of the content of a wav file.
+
+    Returns the content of its fmt chunk (None if there is none) and the start and end offset of its data chunk.
+    A data chunk of unknown or too large size (written by a streaming encoder) ends at the end of the file.
+    If data is only the head of a file of file_size bytes, its data chunk must start in the head.
+    """
+    file_size = len(data) if file_size is None else file_size
+    fmt = None
+    pos = RIFF_HEADER_SIZE
+    while pos + CHUNK_HEADER_SIZE <= len(data):
+        chunk_id = bytes(data[pos:pos + 4])
+        size, = struct.unpack_from("<I", data, pos + 4)
+        start = pos + CHUNK_HEADER_SIZE
+        if chunk_id == b"data":
+            if size in UNKNOWN_DATA_SIZES or start + size > file_size:
+                return fmt, start, file_size
+            return fmt, start, start + size
+        if chunk_id == b"fmt ":
+            fmt = bytes(data[start:start + size])
+        pos = start + size + (size & 1)  # chunks are padded to an even size
+    return fmt, file_size, file_size
+
+
+def make_wav_header(fmt: bytes, data_size: int) -> bytes:
+    """RIFF header, fmt chunk and data chunk header of a wav file with data_size bytes of audio."""
+    fmt_chunk = b"fmt " + struct.pack("<I", len(fmt)) + fmt + bytes(len(fmt) & 1)
+    riff_size = 4 + len(fmt_chunk) + CHUNK_HEADER_SIZE + data_size + (data_size & 1)
+    return b"RIFF" + struct.pack("<I", riff_size) + b"WAVE" + fmt_chunk + b"data" + struct.pack("<I", data_size)
+
+
+def make_wav_fmt(format_tag: int, channels: int, sample_rate: int, bits_per_sample: int) -> bytes:
+    """Content of the fmt chunk of a wav file, with an empty extension for formats other than PCM."""
+    block_align = channels * bits_per_sample // 8
+    fmt = struct.pack(
+        "<HHIIHH", format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample
+    )
+    return fmt if format_tag == WAVE_FORMAT_PCM else fmt + struct.pack("<H", 0)
+
+
+def merge_wav_segments(segments: List[bytes], output_file: str, default_fmt: Optional[bytes] = None) -> bool:
+    """
+    Merge wav files into one, writing the samples of their data chunks under a single header.
+
+    Headerless segments (like the raw formats of Azure) are taken as samples in the format of the others, or of
+    default_fmt if no segment has a header. Returns False (without writing anything) if the segments don't share
+    one format, or if their format is unknown, and need to be re-encoded.
+    """
+    fmt = None
+    spans = []
+    for data in segments:
+        if not is_wav(data):
+            spans.append((data, 0, len(data)))
+            continue
+        segment_fmt, start, end = find_wav_data(data)
+        if segment_fmt is None:
+            logger.warning("No fmt chunk found in a wav audio segment, falling back to re-encoding")
+            return False
+        if fmt is None:
+            fmt = segment_fmt
+        elif segment_fmt != fmt:
+            logger.warning("Format of the wav audio segments differs, falling back to re-encoding")
+            return False
+        spans.append((data, start, end))
+
+    fmt = fmt or default_fmt
+    if fmt is None:
+        logger.warning("Format of the headerless wav audio segments is unknown, falling back to re-encoding")
+        return False
+    data_size = sum(end - start for _, start, end in spans)
+    with open(output_file, "wb") as outfile:
+        outfile.write(make_wav_header(fmt, data_size))
+        for data, start, end in spans:
+            outfile.write(memoryview(data)[start:end])
+        if data_size & 1:
+            outfile.write(b"\x00")
+    return True
+
+
+def merge_pcm_segments(segments: List[bytes], output_file: str) -> bool:
+    """Merge raw PCM segments into one, dropping the wav header of any segment that comes with one."""
+    with open(output_file, "wb") as outfile:
+        for data in segments:
+            start, end = find_wav_data(data)[1:] if is_wav(data) else (0, len(data))
+            outfile.write(memoryview(data)[start:end])
+    return True
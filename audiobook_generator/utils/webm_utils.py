@@ -0,0 +1,268 @@
+import dataclasses
+import logging
+import struct
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# EBML element ids of a WebM file
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMESTAMP_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+CODEC_ID = 0x86
+CODEC_PRIVATE = 0x63A2
+CLUSTER = 0x1F43B675
+CLUSTER_TIMESTAMP = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+BLOCK_DURATION = 0x9B
+# Top level elements of a segment, they end a cluster of unknown size
+SEGMENT_CHILDREN = {
+    0x114D9B74,  # SeekHead
+    INFO,
+    TRACKS,
+    CLUSTER,
+    0x1C53BB6B,  # Cues
+    0x1941A469,  # Attachments
+    0x1043A770,  # Chapters
+    0x1254C367,  # Tags
+}
+DEFAULT_TIMESTAMP_SCALE = 1000000  # nanoseconds per timestamp unit
+# Size of 8 bytes with all value bits set, streaming muxers write it for elements of unknown size
+UNKNOWN_SIZE = b"\x01\xff\xff\xff\xff\xff\xff\xff"
+
+
+def read_vint(data, pos: int, keep_marker: bool = False) -> Tuple[Optional[int], int]:
+    """
+    Read an EBML variable size integer, returns its value and length.
+
+    Element ids keep their length marker. The value of a size with all value bits set (unknown size) is None.
+    """
+    first = data[pos]
+    length = 1
+    while length <= 8 and not first & (0x80 >> (length - 1)):
+        length += 1
+    if length > 8:
+        raise ValueError(f"Invalid EBML variable size integer at {pos}")
+    if len(data) < pos + length:
+        raise ValueError(f"Truncated EBML variable size integer at {pos}")
+    value = first if keep_marker else first & (0xFF >> length)
+    all_ones = value == (0xFF >> length)
+    for byte in data[pos + 1:pos + length]:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    return (None if all_ones and not keep_marker else value), length
+
+
+def encode_id(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def encode_element(element_id: int, content: bytes) -> bytes:
+    # Sizes are always written on 8 bytes, so they don't need to be known before the content
+    return encode_id(element_id) + bytes([0x01]) + len(content).to_bytes(7, "big") + content
+
+
+@dataclasses.dataclass
+class EbmlElement:
+    id: int
+    start: int  # offset of the element id
+    content_start: int
+    end: int
+
+
+def iter_elements(data, start: int, end: int, parent_ends=()):
+    """
+    Elements between start and end. An element of unknown size ends at the first element whose id is in
+    parent_ends (the ids of its siblings), or at end. Without parent_ends, it's the last element.
+    """
+    pos = start
+    while pos < end:
+        element_id, id_length = read_vint(data, pos, keep_marker=True)
+        size, size_length = read_vint(data, pos + id_length)
+        content_start = pos + id_length + size_length
+        if size is None and not parent_ends:
+            element_end = end
+        elif size is None:
+            element_end = content_start
+            while element_end < end:
+                child_id, child_id_length = read_vint(data, element_end, keep_marker=True)
+                if child_id in parent_ends:
+                    break
+                child_size, child_size_length = read_vint(data, element_end + child_id_length)
+                if child_size is None:
+                    raise ValueError(f"Nested element of unknown size at {element_end}")
+                element_end += child_id_length + child_size_length + child_size
+        else:
+            element_end = content_start + size
+        element_end = min(element_end, end)
+        yield EbmlElement(element_id, pos, content_start, element_end)
+        pos = element_end
+
+
+def find_child(data, element: EbmlElement, child_id: int) -> Optional[EbmlElement]:
+    for child in iter_elements(data, element.content_start, element.end):
+        if child.id == child_id:
+            return child
+    return None
+
+
+def read_uint(data, element: EbmlElement) -> int:
+    return int.from_bytes(data[element.content_start:element.end], "big")
+
+
+def read_float(data, element: EbmlElement) -> float:
+    content = bytes(data[element.content_start:element.end])
+    return struct.unpack(">f" if len(content) == 4 else ">d", content)[0]
+
+
+@dataclasses.dataclass
+class WebmFile:
+    data: bytes
+    ebml_header: EbmlElement
+    info: EbmlElement
+    tracks: EbmlElement
+    clusters: List[EbmlElement]
+    timestamp_scale: int
+    duration: Optional[float]  # in timestamp units, None if the muxer didn't know it
+
+    def get_track_format(self) -> List[Tuple[bytes, bytes, int]]:
+        """Codec, codec private data and number of every track, which must match for the clusters to be merged."""
+        track_format = []
+        for entry in iter_elements(self.data, self.tracks.content_start, self.tracks.end):
+            if entry.id != TRACK_ENTRY:
+                continue
+            fields = {}
+            for field_id in (CODEC_ID, CODEC_PRIVATE, TRACK_NUMBER):
+                child = find_child(self.data, entry, field_id)
+                fields[field_id] = bytes(self.data[child.content_start:child.end]) if child else b""
+            track_format.append((fields[CODEC_ID], fields[CODEC_PRIVATE], int.from_bytes(fields[TRACK_NUMBER], "big")))
+        return track_format
+
+    def get_cluster_timestamp(self, cluster: EbmlElement) -> int:
+        timestamp = find_child(self.data, cluster, CLUSTER_TIMESTAMP)
+        return read_uint(self.data, timestamp) if timestamp else 0
+
+    def get_end_timestamp(self) -> int:
+        """End of the last block in timestamp units, from the duration or estimated from the block timestamps."""
+        if self.duration is not None:
+            return round(self.duration)
+        block_timestamps = []
+        block_end = 0
+        for cluster in self.clusters:
+            cluster_timestamp = self.get_cluster_timestamp(cluster)
+            for child in iter_elements(self.data, cluster.content_start, cluster.end):
+                block = child
+                duration = None
+                if child.id == BLOCK_GROUP:
+                    block = find_child(self.data, child, BLOCK)
+                    block_duration = find_child(self.data, child, BLOCK_DURATION)
+                    duration = read_uint(self.data, block_duration) if block_duration else None
+                elif child.id != SIMPLE_BLOCK:
+                    continue
+                if block is None:
+                    continue
+                _, track_length = read_vint(self.data, block.content_start)
+                relative, = struct.unpack_from(">h", self.data, block.content_start + track_length)
+                block_timestamps.append(cluster_timestamp + relative)
+                if duration is not None:
+                    block_end = max(block_end, block_timestamps[-1] + duration)
+        if not block_timestamps:
+            return block_end
+        # Without block durations, the last block lasts as long as the one before it
+        last_duration = block_timestamps[-1] - block_timestamps[-2] if len(block_timestamps) > 1 else 0
+        return max(block_end, block_timestamps[-1] + last_duration)
+
+
+def read_webm(data: bytes) -> Optional[WebmFile]:
+    """Read the structure of a WebM file, returns None if it isn't one."""
+    try:
+        ebml_header = segment = None
+        for element in iter_elements(data, 0, len(data)):
+            if element.id == EBML_HEADER:
+                ebml_header = element
+            elif element.id == SEGMENT:
+                segment = element
+                break
+        if ebml_header is None or segment is None:
+            return None
+        info = tracks = None
+        clusters = []
+        for element in iter_elements(data, segment.content_start, segment.end, SEGMENT_CHILDREN):
+            if element.id == INFO:
+                info = element
+            elif element.id == TRACKS:
+                tracks = element
+            elif element.id == CLUSTER:
+                clusters.append(element)
+        if info is None or tracks is None:
+            return None
+        timestamp_scale = find_child(data, info, TIMESTAMP_SCALE)
+        duration = find_child(data, info, DURATION)
+        return WebmFile(
+            data, ebml_header, info, tracks, clusters,
+            read_uint(data, timestamp_scale) if timestamp_scale else DEFAULT_TIMESTAMP_SCALE,
+            read_float(data, duration) if duration else None,
+        )
+    except (ValueError, IndexError, struct.error) as e:
+        logger.warning(f"Invalid WebM audio segment: {e}")
+        return None
+
+
+def merge_webm_segments(segments: List[bytes], output_file: str) -> bool:
+    """
+    Merge WebM files into one, copying their blocks without decoding.
+
+    The header and tracks of the first file are kept, the clusters of all files follow each other with their
+    timestamps shifted by the duration of the files before. The segment has an unknown size and no seek head
+    or cues, like the output of a streaming muxer, and its duration is the total duration. Returns False
+    (without writing anything) if the segments don't share one format and need to be re-encoded.
+    """
+    files = []
+    for data in segments:
+        webm_file = read_webm(data)
+        if webm_file is None:
+            logger.warning("Audio segment isn't a WebM file, falling back to re-encoding")
+            return False
+        if files and (webm_file.timestamp_scale != files[0].timestamp_scale
+                      or webm_file.get_track_format() != files[0].get_track_format()):
+            logger.warning("Format of the WebM audio segments differs, falling back to re-encoding")
+            return False
+        files.append(webm_file)
+    if not files:
+        logger.warning("No audio segments to merge")
+        return False
+
+    first = files[0]
+    offsets = [0]  # start of every file in the merged file, in timestamp units
+    for webm_file in files:
+        offsets.append(offsets[-1] + webm_file.get_end_timestamp())
+    info_children = [
+        bytes(first.data[child.start:child.end])
+        for child in iter_elements(first.data, first.info.content_start, first.info.end)
+        if child.id != DURATION
+    ]
+    info = encode_element(INFO, b"".join(info_children) + encode_element(DURATION, struct.pack(">d", offsets[-1])))
+
+    with open(output_file, "wb") as outfile:
+        outfile.write(first.data[first.ebml_header.start:first.ebml_header.end])
+        outfile.write(encode_id(SEGMENT) + UNKNOWN_SIZE)
+        outfile.write(info)
+        outfile.write(first.data[first.tracks.start:first.tracks.end])
+        for i, webm_file in enumerate(files):
+            for cluster in webm_file.clusters:
+                timestamp = webm_file.get_cluster_timestamp(cluster) + offsets[i]
+                children = [encode_element(CLUSTER_TIMESTAMP, timestamp.to_bytes(8, "big"))]
+                children.extend(
+                    webm_file.data[child.start:child.end]
+                    for child in iter_elements(webm_file.data, cluster.content_start, cluster.end)
+                    if child.id != CLUSTER_TIMESTAMP
+                )
+                outfile.write(encode_element(CLUSTER, b"".join(children)))
+    return True
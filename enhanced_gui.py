@@ -249,7 +249,7 @@ class EnhancedEpubToAudiobookGUI:
         """Browse for EPUB file"""
         file_path = filedialog.askopenfilename(
             title=i18n.t("select_epub_file"),
-            filetypes=[("EPUB files", "*.epub"), ("All files", "*.*")]
+            filetypes=[("EPUB files", "*.epub"), ("Text files", "*.txt"), ("All files", "*.*")]
         )
         if file_path:
             self.file_path_var.set(file_path)
@@ -362,20 +362,18 @@ class EnhancedEpubToAudiobookGUI:
                     self.root.after(0, lambda: messagebox.showerror(i18n.t("error"), "Could not download book"))
                     return
                 
-                # Create EPUB
-                epub_path = self.gutenberg_utils.create_epub_from_text(
-                    text, f"Gutenberg Book {actual_id}", "Project Gutenberg", "en", actual_id
-                )
+                # Save the text, it is parsed directly by the text parser
+                text_path = self.gutenberg_utils.save_text(text, actual_id)
                 
-                if not epub_path:
-                    self.root.after(0, lambda: messagebox.showerror(i18n.t("error"), "Could not create EPUB"))
+                if not text_path:
+                    self.root.after(0, lambda: messagebox.showerror(i18n.t("error"), "Could not save book text"))
                     return
                 
                 # Get preview
                 preview = self.gutenberg_utils.get_book_preview(actual_id, max_chars=1500)
                 
                 # Update UI in main thread
-                self.root.after(0, lambda: self.gutenberg_book_loaded(epub_path, preview))
+                self.root.after(0, lambda: self.gutenberg_book_loaded(text_path, preview))
                 
             except Exception as e:
                 self.root.after(0, lambda: messagebox.showerror(i18n.t("error"), f"Error loading book: {str(e)}"))
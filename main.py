@@ -11,7 +11,7 @@ from audiobook_generator.utils.log_handler import setup_logging, generate_unique
 
 def handle_args():
     parser = argparse.ArgumentParser(description="Convert text book to audiobook")
-    parser.add_argument("input_file", help="Path to the EPUB file")
+    parser.add_argument("input_file", help="Path to the EPUB or plain text (.txt) file")
     parser.add_argument("output_folder", help="Path to the output folder")
     parser.add_argument(
         "--tts",
@@ -90,21 +90,113 @@ def handle_args():
         """,
     )
 
+    parser.add_argument(
+        "--text_extractor",
+        choices=["bs4", "lxml"],
+        default="bs4",
+        help="Backend extracting the text of the book's documents (default: bs4). bs4: builds a BeautifulSoup tree of every document. "
+        "lxml: streams every document through the lxml parser without building a tree, producing the same text several times faster.",
+    )
+
+    parser.add_argument(
+        "--parse_worker_count",
+        type=int,
+        default=None,
+        help="Number of processes parsing the documents of large books (default: number of CPUs). "
+        "Books with many documents (200 or more) are parsed in parallel, the chapters keep the order of the book. Set to 1 to parse in a single process.",
+    )
+
+    parser.add_argument(
+        "--parse_cache_dir",
+        help="Directory of an on-disk cache for parsed books, shared across runs. A book parsed before with the same "
+        "newline mode, title mode, cleaning options and search and replace file is loaded from the cache instead of "
+        "being parsed again. Disabled if not set.",
+    )
+
     parser.add_argument(
         "--worker_count",
         type=int,
         default=1,
         help="Specifies the number of parallel workers to use for audiobook generation. "
-        "Increasing this value can significantly speed up the process by processing multiple chapters simultaneously. "
+        "Increasing this value can significantly speed up the process by processing multiple chunks simultaneously. "
+        "Every chapter is split into chunks first and all chunks share one work queue, so a single large chapter is also processed by all workers. "
         "Note: Chapters may not be processed in sequential order, but this will not affect the final audiobook.",
     )
 
+    parser.add_argument(
+        "--chunk_concurrency",
+        type=int,
+        default=1,
+        help="Number of chunk requests of one chapter each worker sends concurrently (default: 1). "
+        "Requests to the TTS service are network bound, so this speeds up large chapters without starting more "
+        "worker processes. Currently only supported for OpenAI and Azure TTS, other providers send one request at a time. "
+        "Mind the rate limits of your TTS service.",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["process", "async"],
+        default="process",
+        help="Execution engine (default: process). process: chunks are synthesized by a pool of worker processes. "
+        "async: chunks are synthesized on a single event loop with the async client of the TTS provider, "
+        "with up to --async_concurrency requests in flight, while chapters are merged by a pool of --worker_count processes. "
+        "The async engine is supported for OpenAI, Azure and Edge TTS, other providers fall back to worker processes.",
+    )
+
+    parser.add_argument(
+        "--async_concurrency",
+        type=int,
+        default=64,
+        help="Maximum number of concurrent chunk requests of the async engine (default: 64). "
+        "Mind the rate limits of your TTS service.",
+    )
+
+    parser.add_argument(
+        "--max_requests_per_second",
+        type=float,
+        help="Maximum number of requests per second sent to the TTS service, shared by all workers. Unlimited if not set. "
+        "Independent of this limit, the number of concurrent requests is halved whenever the service throttles a request "
+        "(HTTP 429/503, honoring Retry-After) and slowly increased again while requests succeed.",
+    )
+
+    parser.add_argument(
+        "--max_chars_per_second",
+        type=float,
+        help="Maximum number of characters per second sent to the TTS service, shared by all workers. Unlimited if not set.",
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume a previous run in the same output folder. Chapters and chunks recorded as converted in the "
+        "conversion manifest (conversion_manifest.sqlite) of the output folder are skipped, as long as their text, "
+        "the TTS settings and the size of their output file are unchanged. Only missing or corrupt ones are converted again.",
+    )
+
+    parser.add_argument(
+        "--tts_cache_dir",
+        help="Directory of an on-disk cache for synthesized chunks, shared across runs. Chunks with the same text "
+        "(ignoring whitespace differences) and the same TTS provider settings are taken from the cache instead of "
+        "being synthesized again. Disabled if not set.",
+    )
+
+    parser.add_argument(
+        "--tts_cache_max_size",
+        type=int,
+        default=2048,
+        help="Maximum size of the TTS cache in MB (default: 2048). The least recently used entries are evicted first.",
+    )
+
     parser.add_argument(
         "--use_pydub_merge",
         action="store_true",
         help="Use pydub to merge audio segments of one chapter into single file instead of direct write. "
-        "Currently only supported for OpenAI and Azure TTS. "
+        "Currently only supported for OpenAI, Azure and Edge TTS. "
+        "With direct write, Edge TTS also keeps its mp3 frames and inserts the breaks as silent frames, "
+        "while pydub merge decodes the audio to add the breaks and re-encodes it. "
         "Direct write is faster but might skip audio segments if formats differ. "
+        "For mp3, wav, pcm, ogg/opus and webm output, direct write merges the segments into one stream without "
+        "re-encoding (with the correct headers and duration), and falls back to pydub if their formats differ. "
         "Pydub merge is slower but more reliable for different audio formats. It requires ffmpeg to be installed first. "
         "You can use this option to avoid the issue of skipping audio segments in some cases. "
         "However, it's recommended to use direct write for most cases as it's faster. "
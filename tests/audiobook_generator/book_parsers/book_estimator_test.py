@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+from audiobook_generator.book_parsers.book_estimator import BookEstimate, count_document_characters, estimate_book
+from tests.test_utils import get_edge_config
+
+
+class TestBookEstimator(unittest.TestCase):
+
+    def test_count_document_characters(self):
+        content = (
+            b'<?xml version="1.0" encoding="utf-8"?>\n<html><head><title>Title</title></head>\n'
+            b'<body><!-- a <b>comment</b> -->\n<p>It was <i>dark</i> &amp;\n  stormy.</p></body></html>'
+        )
+        self.assertEqual(count_document_characters(content), len("Title It was dark & stormy."))
+        self.assertEqual(count_document_characters(b"<html><body>\n <p/> </body></html>"), 0)
+
+    def test_epub_estimate_is_close_to_parsed_book(self):
+        config = get_edge_config()
+        estimate = estimate_book(config)
+        chapters = get_book_parser(config).get_chapters(" ")
+        self.assertEqual(estimate.chapter_count, len(chapters))
+        total_characters = sum(len(text) for _, text in chapters)
+        self.assertAlmostEqual(estimate.total_characters / total_characters, 1, delta=0.01)
+
+    def test_text_estimate(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = get_edge_config()
+            config.input_file = os.path.join(tmp_dir, "book.txt")
+            with open(config.input_file, "w", encoding="utf-8") as f:
+                f.write("Preface\n\nCHAPTER I\n\nOne  two\nthree.\n\nCHAPTER II\n\nFour.\n")
+            estimate = estimate_book(config)
+        self.assertEqual(estimate.chapter_characters, [len("CHAPTER I One two three."), len("CHAPTER II Four.")])
+
+    def test_chunk_count(self):
+        estimate = BookEstimate([100, 6000, 2000])
+        self.assertEqual(estimate.total_characters, 8100)
+        self.assertEqual(estimate.get_chunk_count("edge", "en-US"), 1 + 3 + 1)
+        self.assertEqual(estimate.get_chunk_count("azure", "zh-CN"), 1 + 4 + 2)
+        self.assertEqual(estimate.get_chunk_count("piper", "en-US"), 3)
+        self.assertEqual(estimate.select(2, -1).chapter_characters, [6000, 2000])
+        self.assertEqual(estimate.select(1, 2).chapter_characters, [100, 6000])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
+import os
+import tempfile
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
 from unittest.mock import MagicMock
 
-from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+from audiobook_generator.book_parsers import epub_book_parser
+from audiobook_generator.book_parsers.base_book_parser import get_book_parser, select_chapters
 from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
-from tests.test_utils import get_azure_config
+from tests.test_utils import get_azure_config, get_edge_config
 
 
 class TestGetBookParser(unittest.TestCase):
@@ -29,5 +34,96 @@ class TestGetBookParser(unittest.TestCase):
             get_book_parser(config)
 
 
+class TestParallelParsing(unittest.TestCase):
+
+    def test_parallel_parsing_keeps_spine_order(self):
+        config = get_edge_config()
+        config.parse_worker_count = 1
+        chapters = EpubBookParser(config).get_chapters("   ")
+
+        config.parse_worker_count = 2
+        with mock.patch.object(epub_book_parser, "PARALLEL_PARSE_MIN_DOCUMENTS", 1), \
+                mock.patch.object(epub_book_parser, "PARALLEL_PARSE_DOCUMENTS_AHEAD", 1):
+            self.assertEqual(EpubBookParser(config).get_chapters("   "), chapters)
+
+    def test_rules_are_sent_once_per_worker(self):
+        config = get_edge_config()
+        config.parse_worker_count = 1
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config.search_and_replace_file = os.path.join(tmp_dir, "search.conf")
+            with open(config.search_and_replace_file, "w") as f:
+                f.write("\\bCrusoe\\b==Kruso\n")
+            chapters = EpubBookParser(config).get_chapters("   ")
+            config.parse_worker_count = 2
+            executors = []
+
+            class RecordingExecutor(ProcessPoolExecutor):
+                def __init__(self, **kwargs):
+                    super().__init__(**kwargs)
+                    self.kwargs = kwargs
+                    self.submitted = []
+                    executors.append(self)
+
+                def submit(self, fn, *args, **kwargs):
+                    self.submitted.append(args)
+                    return super().submit(fn, *args, **kwargs)
+
+            with mock.patch.object(epub_book_parser, "PARALLEL_PARSE_MIN_DOCUMENTS", 1), \
+                    mock.patch.object(epub_book_parser, "ProcessPoolExecutor", RecordingExecutor):
+                self.assertEqual(EpubBookParser(config).get_chapters("   "), chapters)
+
+        executor, = executors
+        # The rules are built by the initializer of every worker, each document is submitted alone
+        self.assertIs(executor.kwargs["initializer"], epub_book_parser.init_parse_worker)
+        self.assertEqual(executor.kwargs["initargs"][1], [(r"\bCrusoe\b", "Kruso")])
+        self.assertGreater(len(executor.submitted), 2)
+        self.assertTrue(all(len(args) == 1 and isinstance(args[0], bytes) for args in executor.submitted))
+
+
+class TestChapterRange(unittest.TestCase):
+
+    def setUp(self):
+        self.config = get_edge_config()
+        self.config.parse_worker_count = 1
+        self.parser = EpubBookParser(self.config)
+
+    def test_same_numbering_as_full_parse(self):
+        for chapter_start, chapter_end in [(1, -1), (3, 5), (23, 23)]:
+            with self.subTest(chapter_start=chapter_start, chapter_end=chapter_end):
+                self.assertEqual(
+                    list(self.parser.iter_chapter_range("   ", chapter_start, chapter_end)),
+                    list(select_chapters(self.parser.iter_chapters("   "), chapter_start, chapter_end)),
+                )
+
+    def test_only_chapters_in_range_are_parsed(self):
+        with mock.patch.object(epub_book_parser, "parse_document", wraps=epub_book_parser.parse_document) as parse:
+            chapters = list(self.parser.iter_chapter_range("   ", 20, 21))
+        self.assertEqual([idx for idx, _, _ in chapters], [20, 21])
+        self.assertEqual(parse.call_count, 2)
+
+    def test_whole_book_is_parsed_without_index(self):
+        self.config.remove_endnotes = True
+        parser = EpubBookParser(self.config)
+        with mock.patch.object(parser, "get_chapter_items") as get_chapter_items, \
+                mock.patch.object(epub_book_parser, "parse_document_text") as parse_document_text:
+            chapters = parser.iter_chapter_range("   ", 1, -1)
+            self.assertEqual(next(chapters)[0], 1)
+            list(chapters)
+        get_chapter_items.assert_not_called()
+        parse_document_text.assert_not_called()
+
+    def test_index_stops_at_chapter_end(self):
+        documents = self.parser.book.get_documents()
+        with mock.patch.object(self.parser.book, "get_documents", return_value=iter(documents)):
+            chapters = list(self.parser.iter_chapter_range("   ", 2, 3))
+            remaining = list(self.parser.book.get_documents())
+        self.assertEqual([idx for idx, _, _ in chapters], [2, 3])
+        self.assertGreater(len(remaining), 10)
+
+    def test_range_beyond_last_chapter(self):
+        with self.assertRaisesRegex(ValueError, "Chapter end index 24 is out of range"):
+            list(self.parser.iter_chapter_range("   ", 1, 24))
+
+
 if __name__ == '__main__':
     unittest.main()
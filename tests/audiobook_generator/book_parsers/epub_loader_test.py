@@ -0,0 +1,84 @@
+import os
+import pickle
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+import ebooklib
+from ebooklib import epub
+
+from audiobook_generator.book_parsers.epub_loader import EpubLoader
+from tests.test_utils import get_edge_config
+
+
+class TestEpubLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_same_as_ebooklib(self, file_name):
+        book = epub.read_epub(file_name, {"ignore_ncx": True})
+        loader = EpubLoader(file_name)
+        items = list(book.get_items_of_type(ebooklib.ITEM_DOCUMENT))
+        documents = loader.get_documents()
+        self.assertEqual([document.get_name() for document in documents], [item.get_name() for item in items])
+        for document, item in zip(documents, items):
+            self.assertEqual(document.get_content(), item.get_content())
+        for name in ("title", "creator", "language", "identifier"):
+            self.assertEqual(loader.get_metadata("DC", name), book.get_metadata("DC", name))
+        loader.close()
+
+    def make_illustrated_book(self):
+        book = epub.EpubBook()
+        book.set_identifier("illustrated")
+        book.set_title("Illustrated")
+        book.set_language("de")
+        book.add_author("Some Author")
+        chapters = []
+        for i in range(3):
+            chapter = epub.EpubHtml(title=f"Chapter {i}", file_name=f"text/chapter {i}.xhtml", lang="de")
+            chapter.content = f"<h1>Chapter {i}</h1><p>Text of chapter {i}.</p><img src='../images/{i}.png'/>"
+            book.add_item(chapter)
+            book.add_item(epub.EpubImage(file_name=f"images/{i}.png", media_type="image/png", content=os.urandom(1024)))
+            chapters.append(chapter)
+        book.add_item(epub.EpubNav())
+        book.spine = ["nav"] + chapters
+        file_name = os.path.join(self.tmp_dir.name, "illustrated.epub")
+        epub.write_epub(file_name, book)
+        return file_name
+
+    def test_same_as_ebooklib(self):
+        self.assert_same_as_ebooklib(get_edge_config().input_file)
+        self.assert_same_as_ebooklib(self.make_illustrated_book())
+
+    def test_images_are_never_read(self):
+        file_name = self.make_illustrated_book()
+        read = zipfile.ZipFile.read
+        with mock.patch.object(zipfile.ZipFile, "read", autospec=True, side_effect=read) as read_file:
+            loader = EpubLoader(file_name)
+            for document in loader.get_documents():
+                document.get_content()
+        read_names = [call.args[1] for call in read_file.call_args_list]
+        self.assertTrue(any(name.endswith(".xhtml") for name in read_names))
+        self.assertFalse([name for name in read_names if name.endswith(".png")])
+
+    def test_pickle(self):
+        loader = EpubLoader(self.make_illustrated_book())
+        contents = [document.get_content() for document in loader.get_documents()]
+        loader = pickle.loads(pickle.dumps(loader))
+        self.assertEqual([document.get_content() for document in loader.get_documents()], contents)
+
+    def test_bad_zip_file(self):
+        file_name = os.path.join(self.tmp_dir.name, "bad.epub")
+        with open(file_name, "wb") as f:
+            f.write(b"not a zip file")
+        with self.assertRaises(epub.EpubException):
+            EpubLoader(file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import re
+import tempfile
+import unittest
+from collections import Counter
+
+from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
+from audiobook_generator.book_parsers.search_and_replace import (
+    SearchAndReplaceRules,
+    get_trie_pattern,
+    load_search_and_replace_rules,
+)
+from tests.test_utils import get_edge_config
+
+RULES = [
+    (r"\bcat\b", "dog"),
+    (r"\bdog\b", "big dog"),  # also replaces the dogs of the first rule
+    (r"\bcats\b", ""),
+    (r"(\w+)ing\b", r"\1ed"),
+    (r"\bbig\b", "large"),
+    (r"\bcat\b", "never"),  # no cat is left by the first rule
+    (r"\bwalked\b", "ran"),
+]
+TEXT = "The cat and the dog, cats walking; a catalog. cat"
+
+
+def apply_sequentially(rules, text):
+    hits = Counter()
+    for index, (search, replace) in enumerate(rules):
+        text, count = re.subn(search, replace, text)
+        if count:
+            hits[index] += count
+    return text, hits
+
+
+class TestSearchAndReplaceRules(unittest.TestCase):
+
+    def test_same_as_sequential_re_sub(self):
+        rules = SearchAndReplaceRules(RULES)
+        self.assertEqual(len(rules.stages), 3)
+        hits = Counter()
+        self.assertEqual((rules.apply(TEXT, hits), hits), apply_sequentially(RULES, TEXT))
+        self.assertEqual(rules.apply(TEXT), "The large dog and the large dog,  ran; a catalog. large dog")
+        self.assertEqual(hits[0], 2)
+        self.assertEqual(hits[5], 0)
+
+    def test_trie_pattern(self):
+        words = ["cat", "cats", "catalog", "dog", "é"]
+        pattern = re.compile(rf"\b{get_trie_pattern(words)}\b")
+        self.assertEqual(pattern.findall("cat cats catalogs catalog dogs dog é"), ["cat", "cats", "catalog", "dog", "é"])
+
+    def test_load_rules(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "search.conf")
+            with open(file_name, "w") as f:
+                f.write("# comment==x\n\\bCrusoe\\b==Kruso\n==x\nno rule\nFriday==Freitag\n")
+            rules = load_search_and_replace_rules(file_name)
+        self.assertEqual(rules.rules, [(r"\bCrusoe\b", "Kruso"), ("Friday", "Freitag")])
+        self.assertEqual(len(load_search_and_replace_rules("")), 0)
+
+    def test_parser_applies_rules(self):
+        config = get_edge_config()
+        config.parse_worker_count = 1
+        chapters = EpubBookParser(config).get_chapters("   ")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config.search_and_replace_file = os.path.join(tmp_dir, "search.conf")
+            with open(config.search_and_replace_file, "w") as f:
+                f.write("\\bCrusoe\\b==Kruso\n\\bKruso\\b==Robinson Kruso\n\\bI\\b==we\n")
+            replaced_chapters = EpubBookParser(config).get_chapters("   ")
+        rules = [(r"\bCrusoe\b", "Kruso"), (r"\bKruso\b", "Robinson Kruso"), (r"\bI\b", "we")]
+        self.assertEqual(
+            [text for _, text in replaced_chapters], [apply_sequentially(rules, text)[0] for _, text in chapters]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from audiobook_generator.book_parsers import text_book_parser
+from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+from audiobook_generator.book_parsers.text_book_parser import TextBookParser
+from audiobook_generator.utils.gutenberg_utils import GutenbergUtils
+from tests.test_utils import get_edge_config
+
+GUTENBERG_TEXT = """The Project Gutenberg eBook of A Test Book
+
+Title: A Test Book
+
+Author: Some Author
+
+*** START OF THE PROJECT GUTENBERG EBOOK A TEST BOOK ***
+
+A Test Book
+
+CHAPTER I. The Beginning
+
+It was a dark
+and stormy night.
+
+The end of the first chapter.
+
+CHAPTER II. The End
+
+Second chapter.
+
+*** END OF THE PROJECT GUTENBERG EBOOK A TEST BOOK ***
+
+License of the book.
+"""
+
+
+class TestTextBookParser(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = get_edge_config()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def get_parser(self, text, file_name="book.txt") -> TextBookParser:
+        self.config.input_file = os.path.join(self.tmp_dir.name, file_name)
+        with open(self.config.input_file, "w", encoding="utf-8") as f:
+            f.write(text)
+        parser = get_book_parser(self.config)
+        self.assertIsInstance(parser, TextBookParser)
+        return parser
+
+    def test_gutenberg_text(self):
+        parser = self.get_parser(GUTENBERG_TEXT)
+        self.assertEqual(parser.get_book_title(), "A Test Book")
+        self.assertEqual(parser.get_book_author(), "Some Author")
+        self.assertEqual(parser.get_chapters(" @BRK#"), [
+            ("CHAPTER_I", "CHAPTER I. The Beginning @BRK#It was a dark and stormy night. @BRK#The end of the first chapter."),
+            ("CHAPTER_II", "CHAPTER II. The End @BRK#Second chapter."),
+        ])
+
+    def test_same_chapters_as_gutenberg_utils(self):
+        gutenberg_utils = GutenbergUtils()
+        chapters = gutenberg_utils._split_text_into_chapters(gutenberg_utils.clean_gutenberg_text(GUTENBERG_TEXT), "")
+        self.config.title_mode = "tag_text"
+        self.config.newline_mode = "none"
+        self.assertEqual(
+            self.get_parser(GUTENBERG_TEXT).get_chapters(" @BRK#"),
+            [(title.replace(" ", "_").replace(".", ""), " ".join(text.split())) for title, text in chapters],
+        )
+
+    def test_text_without_chapter_headings(self):
+        text = "\n".join(f"Line {i} has five words." for i in range(100))
+        with mock.patch.object(text_book_parser, "MIN_WORDS_PER_CHAPTER", 120):
+            parser = self.get_parser(text, "plain text.txt")
+            chapters = parser.get_chapters(" @BRK#")
+        self.assertEqual(parser.get_book_title(), "plain text")
+        self.assertEqual(parser.get_book_author(), "Unknown")
+        self.assertEqual([len(text.split()) for _, text in chapters], [120, 120, 120, 120, 20])
+        self.assertEqual(chapters[1][1].split()[:2], ["Line", "24"])
+
+
+if __name__ == '__main__':
+    unittest.main()
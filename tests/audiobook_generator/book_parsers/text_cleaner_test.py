@@ -0,0 +1,50 @@
+import argparse
+import unittest
+
+from audiobook_generator.book_parsers.search_and_replace import SearchAndReplaceRules
+from audiobook_generator.book_parsers.text_cleaner import TextCleaner
+
+RAW = " \n Chapter 1\n\n\tIt was a dark night,1 he said.[2] \n \n Then [3.1] x9y (12)　end.\x1c\n"
+
+
+def get_text_cleaner(newline_mode, remove_numbers=False, rules=()):
+    config = argparse.Namespace(
+        newline_mode=newline_mode, remove_endnotes=remove_numbers, remove_reference_numbers=remove_numbers
+    )
+    return TextCleaner(config, SearchAndReplaceRules(list(rules)))
+
+
+class TestTextCleaner(unittest.TestCase):
+
+    def test_newline_modes(self):
+        self.assertEqual(
+            get_text_cleaner("double").clean(RAW, " @BRK#"),
+            "Chapter 1 @BRK# It was a dark night,1 he said.[2] Then [3.1] x9y (12) end.",
+        )
+        self.assertEqual(
+            get_text_cleaner("single").clean(RAW, " @BRK#"),
+            "Chapter 1 @BRK# It was a dark night,1 he said.[2] @BRK# @BRK# Then [3.1] x9y (12) end.",
+        )
+        self.assertEqual(
+            get_text_cleaner("none").clean(RAW, " @BRK#"),
+            "Chapter 1 It was a dark night,1 he said.[2] Then [3.1] x9y (12) end.",
+        )
+        self.assertEqual(get_text_cleaner("double").clean(" \n\n ", " @BRK#"), "")
+        with self.assertRaises(ValueError):
+            get_text_cleaner("triple")
+
+    def test_remove_numbers(self):
+        self.assertEqual(
+            get_text_cleaner("none", remove_numbers=True).clean(RAW, " @BRK#"),
+            # End-notes are removed first, so the 1 of [3.1] is removed as an end-note
+            "Chapter 1 It was a dark night, he said. Then [3.] xy (12) end.",
+        )
+
+    def test_may_remove_text(self):
+        self.assertFalse(get_text_cleaner("double").may_remove_text)
+        self.assertTrue(get_text_cleaner("double", remove_numbers=True).may_remove_text)
+        self.assertTrue(get_text_cleaner("double", rules=[("dark", "bright")]).may_remove_text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from audiobook_generator.book_parsers.text_extractors import extract_text_bs4, extract_text_lxml, get_text_extractor
+
+DOCUMENTS = [
+    b'<?xml version="1.0" encoding="utf-8"?>\n<!DOCTYPE html>\n<html xmlns="http://www.w3.org/1999/xhtml">'
+    b'<head><title>The <b>title</b></title><style>p {}</style></head>\n\n  <body><h1>One <h1>nested</h1> two</h1>'
+    b'<!-- comment -->a<!-- comment -->b<?pi x?>c\n\t \n<p>&amp; &#160; <![CDATA[cdata <x>]]>text</p>\n\n\n</body></html>',
+    b'<html><body><h2></h2><h3>heading</h3><p>text</p></body></html>',
+    b'<html xmlns:h="http://www.w3.org/1999/xhtml"><h:body><h:h1>prefixed</h:h1> <p>a<br/>b</p></h:body></html>',
+    b'<html><body><p>unclosed<p>tags</body>',
+    '<?xml version="1.0" encoding="iso-8859-1"?><html><title>caf\xe9</title></html>'.encode("latin-1"),
+    b'\xef\xbb\xbf<html><title>bom</title> \r\n </html>',
+    b'',
+]
+
+
+class TestTextExtractors(unittest.TestCase):
+
+    def test_lxml_matches_bs4(self):
+        for document in DOCUMENTS:
+            with self.subTest(document=document):
+                self.assertEqual(extract_text_lxml(document), extract_text_bs4(document))
+
+    def test_title_tag_preference(self):
+        text, title = extract_text_lxml(DOCUMENTS[0])
+        self.assertEqual(title, "The title")
+        self.assertIn("One nested two", text)
+        self.assertEqual(extract_text_lxml(DOCUMENTS[1])[1], "")
+        self.assertIsNone(extract_text_lxml(DOCUMENTS[3])[1])
+
+    def test_unsupported_text_extractor(self):
+        with self.assertRaises(ValueError):
+            get_text_extractor("html5lib")
+
+
+if __name__ == '__main__':
+    unittest.main()
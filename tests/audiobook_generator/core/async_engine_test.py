@@ -0,0 +1,89 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from audiobook_generator.core.async_engine import AsyncEngine
+from audiobook_generator.core.audiobook_generator import CHUNKS_FOLDER
+from audiobook_generator.core.synthesis_job import ChunkJob
+
+
+class FakeAsyncTTSProvider:
+    """Answers after a delay, fails for texts containing FAIL, and tracks the number of requests in flight."""
+
+    def __init__(self, config):
+        self.config = config
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.closed = False
+
+    def get_synthesis_params(self):
+        return {"tts": "fake"}
+
+    def get_output_file_extension(self):
+        return "mp3"
+
+    async def synthesize_chunk_async(self, chunk, chunk_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # later chunks finish first
+        await asyncio.sleep(0.05 / len(chunk))
+        self.in_flight -= 1
+        if "FAIL" in chunk:
+            raise RuntimeError("synthesis failed")
+        return io.BytesIO(chunk.encode("utf-8"))
+
+    async def close_async(self):
+        self.closed = True
+
+
+class TestAsyncEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = Namespace(output_folder=self.tmp_dir.name)
+        os.makedirs(os.path.join(self.tmp_dir.name, CHUNKS_FOLDER))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_engine(self, texts, concurrency):
+        tts_provider = FakeAsyncTTSProvider(self.config)
+        engine = AsyncEngine(self.config, tts_provider, None, concurrency)
+        jobs = [
+            ChunkJob(1, "title", "author", "book", chunk_number, len(texts), text, self.config)
+            for chunk_number, text in enumerate(texts, 1)
+        ]
+
+        async def collect():
+            # Same use of the engine as the generator: submit the jobs, collect their results, close
+            results = asyncio.Queue()
+            for job in jobs:
+                engine.submit(job, results.put_nowait)
+            try:
+                return [await results.get() for _ in jobs]
+            finally:
+                await engine.close()
+
+        return asyncio.run(collect()), tts_provider
+
+    def test_results_of_all_chunks(self):
+        texts = ["a" * n for n in range(1, 21)]
+        results, tts_provider = self.run_engine(texts, 4)
+
+        self.assertEqual(sorted(results), [(1, n, True, False) for n in range(1, 21)])
+        self.assertEqual(tts_provider.max_in_flight, 4)
+        self.assertTrue(tts_provider.closed)
+        for chunk_number, text in enumerate(texts, 1):
+            with open(os.path.join(self.tmp_dir.name, CHUNKS_FOLDER, f"0001_{chunk_number:04d}.mp3"), "rb") as f:
+                self.assertEqual(f.read(), text.encode("utf-8"))
+
+    def test_failed_chunk(self):
+        results, _ = self.run_engine(["first", "FAIL", "third"], 2)
+        self.assertEqual(sorted(results), [(1, 1, True, False), (1, 2, False, False), (1, 3, True, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
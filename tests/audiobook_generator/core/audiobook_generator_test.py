@@ -0,0 +1,119 @@
+import copy
+import os
+import pickle
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from audiobook_generator.book_parsers.base_book_parser import get_book_parser
+from audiobook_generator.core.audiobook_generator import CHUNKS_FOLDER, AudiobookGenerator
+from audiobook_generator.core.manifest import STATUS_DONE, ConversionManifest
+from audiobook_generator.core.pipeline import ChapterProducer
+from audiobook_generator.core.synthesis_job import ChunkJob, ChunkBatchJob
+from audiobook_generator.tts_providers.base_tts_provider import get_tts_provider
+from audiobook_generator.tts_providers.edge_tts_provider import EdgeTTSProvider
+from tests.audiobook_generator.tts_providers.edge_tts_provider_test import FakeCommunicate
+from tests.test_utils import get_edge_config
+
+
+def merge_chunks_with_pid(self, audio_segments, output_file, audio_tags, chunk_ids):
+    # Writes the process that merged the chapter along with its chunks
+    with open(output_file, "wb") as f:
+        f.write(f"{os.getpid()}:".encode("utf-8"))
+        for segment in audio_segments:
+            f.write(segment.getvalue())
+
+
+class TestCreateJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.config = get_edge_config()
+        self.tts_provider = get_tts_provider(self.config)
+        self.book_parser = get_book_parser(self.config)
+        chapters = self.book_parser.get_chapters(self.tts_provider.get_break_string())
+        self.chapters = [(title, text) for title, text in chapters if text.strip()]
+
+    def create_jobs(self):
+        # Jobs of the chapters as parsed by the producer and taken into the pipeline by the generator
+        generator = AudiobookGenerator(self.config)
+        producer = ChapterProducer([], self.tts_provider, deliver=None)
+        config = copy.copy(self.config)
+        jobs = []
+        for idx, (title, text) in enumerate(self.chapters, start=1):
+            chapter = producer.parse_chapter(idx, title, text)
+            chapter_jobs, _ = generator.start_chapter(
+                chapter, self.book_parser.get_book_author(), self.book_parser.get_book_title(), self.tts_provider,
+                config,
+            )
+            jobs.extend(chapter_jobs)
+        return jobs
+
+    def test_chunk_jobs_cover_all_chapters(self):
+        jobs = self.create_jobs()
+        self.assertTrue(all(isinstance(job, ChunkJob) for job in jobs))
+        self.assertEqual({job.idx for job in jobs}, set(range(1, len(self.chapters) + 1)))
+        self.assertEqual(jobs[0].author, "Daniel Defoe")
+        self.assertEqual(jobs[0].book_title, "The Life and Adventures of Robinson Crusoe")
+
+    def test_pickled_job_size_is_bounded(self):
+        # A job must not drag the book parser (and its EpubBook) along, only its text and small metadata
+        epub_size = os.path.getsize(self.config.input_file)
+        for job in self.create_jobs():
+            pickled_size = len(pickle.dumps(job))
+            self.assertLess(pickled_size, len(job.text.encode("utf-8")) + 4096)
+            self.assertLess(pickled_size, epub_size / 10)
+
+    def test_chunk_jobs_are_batched_per_chapter(self):
+        chunk_jobs = self.create_jobs()
+        with patch.object(self.tts_provider, "get_chunk_concurrency", return_value=3):
+            batches = self.create_jobs()
+
+        self.assertTrue(all(isinstance(batch, ChunkBatchJob) for batch in batches))
+        for batch in batches:
+            self.assertLessEqual(len(batch.jobs), 3)
+            self.assertEqual({job.idx for job in batch.jobs}, {batch.idx})
+        # Same chunks in the same order
+        self.assertEqual(
+            [(job.idx, job.chunk_number, job.text) for batch in batches for job in batch.jobs],
+            [(job.idx, job.chunk_number, job.text) for job in chunk_jobs],
+        )
+
+
+# The workers are forked, so they inherit the patches
+@patch("edge_tts.Communicate", FakeCommunicate)
+@patch.object(EdgeTTSProvider, "merge_chunks", merge_chunks_with_pid)
+class TestProcessEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = get_edge_config()
+        self.config.output_folder = self.tmp_dir.name
+        self.config.worker_count = 2
+        self.tts_provider = get_tts_provider(self.config)
+        os.makedirs(os.path.join(self.tmp_dir.name, CHUNKS_FOLDER))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_chapters_are_merged_by_the_workers(self):
+        generator = AudiobookGenerator(self.config)
+        generator.manifest = ConversionManifest(self.tmp_dir.name, self.tts_provider.get_synthesis_params())
+        chapters = [(idx, f"Chapter_{idx}", f"Text of chapter {idx}.") for idx in range(1, 4)]
+        try:
+            generator.run_process_engine(chapters, "Author", "Book", self.tts_provider, None)
+            statuses = generator.manifest.connection.execute("SELECT idx, status FROM chapters ORDER BY idx").fetchall()
+        finally:
+            generator.manifest.close()
+
+        self.assertEqual(statuses, [(1, STATUS_DONE), (2, STATUS_DONE), (3, STATUS_DONE)])
+        self.assertEqual(generator.failed_chapters, [])
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir.name, CHUNKS_FOLDER)), [])
+        for idx, title, _ in chapters:
+            with open(os.path.join(self.tmp_dir.name, f"{idx:04d}_{title}.mp3"), "rb") as f:
+                pid, audio = f.read().split(b":", 1)
+            self.assertNotEqual(int(pid), os.getpid())
+            self.assertTrue(audio)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from audiobook_generator.core.chapter_store import ChapterStore, get_text
+
+
+class TestChapterStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.chapter_store = ChapterStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.chapter_store.close()
+        self.tmp_dir.cleanup()
+
+    def test_put_and_read(self):
+        first, second = self.chapter_store.put(["Chapter one", "Kapittel to, ærlig talt"])
+        third, = self.chapter_store.put([""])
+        self.assertEqual(first.read(), "Chapter one")
+        self.assertEqual(second.read(), "Kapittel to, ærlig talt")
+        self.assertEqual(second.length, len("Kapittel to, ærlig talt"))
+        self.assertGreater(second.size, second.length)
+        self.assertEqual(third.read(), "")
+
+    def test_text_ref_is_sent_to_workers(self):
+        text_ref, = self.chapter_store.put(["text"])
+        self.assertEqual(pickle.loads(pickle.dumps(text_ref)).read(), "text")
+        self.assertEqual(get_text(text_ref), "text")
+        self.assertEqual(get_text("plain text"), "plain text")
+
+    def test_close_removes_file(self):
+        path = self.chapter_store.path
+        self.assertTrue(os.path.exists(path))
+        self.chapter_store.close()
+        self.chapter_store.close()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
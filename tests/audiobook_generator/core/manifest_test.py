@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+from audiobook_generator.core.manifest import ConversionManifest, hash_text, STATUS_DONE, STATUS_FAILED
+
+
+class TestConversionManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_folder = self.tmp_dir.name
+        self.chunk_file = os.path.join(self.output_folder, "0001_0001.mp3")
+        with open(self.chunk_file, "wb") as f:
+            f.write(b"audio")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_done_chunk_survives_reopen(self):
+        manifest = ConversionManifest(self.output_folder, {"voice_name": "alloy"})
+        manifest.update_chunk(1, 1, hash_text("text"), self.chunk_file, STATUS_DONE)
+        manifest.close()
+
+        manifest = ConversionManifest(self.output_folder, {"voice_name": "alloy"})
+        self.assertTrue(manifest.is_chunk_done(1, 1, hash_text("text")))
+        self.assertFalse(manifest.is_chunk_done(1, 1, hash_text("other text")))
+        self.assertFalse(manifest.is_chunk_done(1, 2, hash_text("text")))
+        manifest.close()
+
+    def test_changed_params_are_not_done(self):
+        manifest = ConversionManifest(self.output_folder, {"voice_name": "alloy"})
+        manifest.update_chunk(1, 1, hash_text("text"), self.chunk_file, STATUS_DONE)
+        manifest.close()
+
+        manifest = ConversionManifest(self.output_folder, {"voice_name": "echo"})
+        self.assertFalse(manifest.is_chunk_done(1, 1, hash_text("text")))
+        manifest.close()
+
+    def test_corrupt_or_failed_output_is_not_done(self):
+        manifest = ConversionManifest(self.output_folder, {})
+        manifest.update_chapter(1, "title", hash_text("text"), 1, self.chunk_file, STATUS_DONE)
+        self.assertTrue(manifest.is_chapter_done(1, hash_text("text")))
+
+        with open(self.chunk_file, "wb") as f:
+            f.write(b"aud")
+        self.assertFalse(manifest.is_chapter_done(1, hash_text("text")))
+
+        manifest.update_chapter(1, "title", hash_text("text"), 1, self.chunk_file, STATUS_FAILED)
+        self.assertFalse(manifest.is_chapter_done(1, hash_text("text")))
+        manifest.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
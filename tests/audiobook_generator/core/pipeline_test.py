@@ -0,0 +1,120 @@
+import queue
+import tempfile
+import unittest
+
+from audiobook_generator.book_parsers.base_book_parser import select_chapters
+from audiobook_generator.core.chapter_store import ChapterStore, TextRef
+from audiobook_generator.core.manifest import hash_text
+from audiobook_generator.core.pipeline import ChapterProducer, ParsedChapter, END_OF_CHAPTERS
+
+
+class FakeTTSProvider:
+
+    def supports_chunking(self):
+        return True
+
+    def split_chunks(self, text):
+        return text.split()
+
+
+class TestSelectChapters(unittest.TestCase):
+
+    def setUp(self):
+        self.chapters = [("one", "a b"), ("empty", "  \n"), ("two", "c"), ("three", "d e f"), ("four", "g")]
+
+    def test_numbering_skips_empty_chapters(self):
+        self.assertEqual(
+            list(select_chapters(self.chapters, 2, 3)),
+            [(2, "two", "c"), (3, "three", "d e f")],
+        )
+        self.assertEqual(list(select_chapters(self.chapters, 3, -1)), [(3, "three", "d e f"), (4, "four", "g")])
+
+    def test_stops_reading_after_chapter_end(self):
+        read = []
+
+        def chapters():
+            for title, text in self.chapters:
+                read.append(title)
+                yield title, text
+
+        list(select_chapters(chapters(), 1, 2))
+        self.assertEqual(read, ["one", "empty", "two"])
+
+    def test_range_errors(self):
+        with self.assertRaisesRegex(ValueError, "Chapter start index 0 is out of range"):
+            list(select_chapters(self.chapters, 0, -1))
+        with self.assertRaisesRegex(ValueError, "Chapter start index 3 is larger than chapter end index 2"):
+            list(select_chapters(self.chapters, 3, 2))
+        with self.assertRaisesRegex(ValueError, "Chapter start index 5 is out of range"):
+            list(select_chapters(self.chapters, 5, -1))
+        with self.assertRaisesRegex(ValueError, "Chapter end index 6 is out of range"):
+            list(select_chapters(self.chapters, 1, 6))
+
+
+class TestChapterProducer(unittest.TestCase):
+
+    def test_delivers_split_chapters_ahead_of_consumer(self):
+        chapters = [(idx, f"title {idx}", f"text of {idx}") for idx in range(1, 6)]
+        events = queue.Queue()
+        producer = ChapterProducer(iter(chapters), FakeTTSProvider(), events.put, max_chapters_ahead=2)
+        producer.start()
+
+        first, second = events.get(timeout=5), events.get(timeout=5)
+        self.assertEqual(first, ParsedChapter(
+            1, "title 1", "text of 1", hash_text("text of 1"), ["text", "of", "1"],
+            [hash_text("text"), hash_text("of"), hash_text("1")],
+        ))
+        self.assertEqual(second.idx, 2)
+        # No chapter is released yet, so the producer waits
+        with self.assertRaises(queue.Empty):
+            events.get(timeout=0.2)
+
+        received = [first, second]
+        for _ in range(5):
+            producer.release_chapter()
+        while (event := events.get(timeout=5)) is not END_OF_CHAPTERS:
+            received.append(event)
+        producer.join(timeout=5)
+
+        self.assertEqual([chapter.idx for chapter in received], [1, 2, 3, 4, 5])
+        self.assertEqual(producer.total_characters, sum(len(text) for _, _, text in chapters))
+        producer.raise_error()
+
+    def test_spills_texts_to_chapter_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            chapter_store = ChapterStore(tmp_dir)
+            spilled = chapter_store.put(["text of 2"])[0]
+            events = queue.Queue()
+            producer = ChapterProducer(
+                iter([(1, "title 1", "text of 1"), (2, "title 2", spilled)]), FakeTTSProvider(), events.put,
+                chapter_store=chapter_store,
+            )
+            producer.start()
+
+            received = []
+            while (event := events.get(timeout=5)) is not END_OF_CHAPTERS:
+                received.append(event)
+                producer.release_chapter()
+            producer.join(timeout=5)
+            producer.raise_error()
+
+            for idx, chapter in enumerate(received, 1):
+                self.assertIsInstance(chapter.text, TextRef)
+                self.assertEqual(chapter.text.read(), f"text of {idx}")
+                self.assertEqual(chapter.text_hash, hash_text(f"text of {idx}"))
+                self.assertEqual([chunk.read() for chunk in chapter.text_chunks], ["text", "of", str(idx)])
+            self.assertEqual(producer.total_characters, 18)
+            chapter_store.close()
+
+    def test_error_is_raised_in_consumer(self):
+        events = queue.Queue()
+        producer = ChapterProducer(select_chapters([("one", "a")], 2, -1), FakeTTSProvider(), events.put)
+        producer.start()
+
+        self.assertIs(events.get(timeout=5), END_OF_CHAPTERS)
+        with self.assertRaisesRegex(ValueError, "Chapter start index 2 is out of range"):
+            producer.raise_error()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
+import io
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 
+from mutagen.wave import WAVE
+
+from audiobook_generator.core.audio_tags import AudioTags
 from audiobook_generator.tts_providers.azure_tts_provider import AzureTTSProvider
 from audiobook_generator.tts_providers.base_tts_provider import get_tts_provider
+from audiobook_generator.utils.wav_utils import WAVE_FORMAT_ALAW, find_wav_data, make_wav_fmt
 from tests.test_utils import get_azure_config
 
 
@@ -30,6 +37,32 @@ class TestAzureTtsProvider(unittest.TestCase):
         self.assertEqual(tts_provider.config.voice_name, "en-US-GuyNeural")
         self.assertEqual(tts_provider.config.output_format, "audio-24khz-48kbitrate-mono-mp3")
 
+    @patch.dict('os.environ', {'MS_TTS_KEY': 'fake_key', 'MS_TTS_REGION': 'fake_region'})
+    def test_raw_chunks_are_merged_into_a_wav_file(self):
+        config = get_azure_config()
+        config.output_format = "raw-8khz-8bit-mono-alaw"
+        config.use_pydub_merge = False
+        tts_provider = get_tts_provider(config)
+        self.assertEqual(tts_provider.get_output_file_extension(), "wav")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "chapter.wav")
+            tts_provider.merge_chunks([io.BytesIO(b"\xd5" * 80), io.BytesIO(b"\x55" * 40)], output_file,
+                                      AudioTags("Title", "Author", "Book", 1), ["1", "2"])
+            with open(output_file, "rb") as f:
+                data = f.read()
+            self.assertEqual(WAVE(output_file).tags["TIT2"].text, ["Title"])
+        fmt, start, end = find_wav_data(data)
+        self.assertEqual(fmt, make_wav_fmt(WAVE_FORMAT_ALAW, 1, 8000, 8))
+        self.assertEqual(data[start:end], b"\xd5" * 80 + b"\x55" * 40)
+
+    @patch.dict('os.environ', {'MS_TTS_KEY': 'fake_key', 'MS_TTS_REGION': 'fake_region'})
+    def test_truesilk_is_not_merged_as_wav(self):
+        config = get_azure_config()
+        config.output_format = "raw-24khz-16bit-mono-truesilk"
+        tts_provider = get_tts_provider(config)
+        self.assertEqual(tts_provider.get_output_file_extension(), "silk")
+        self.assertIsNone(tts_provider.get_wav_fmt())
+
 
 if __name__ == '__main__':
     unittest.main()
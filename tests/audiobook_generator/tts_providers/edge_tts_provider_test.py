@@ -0,0 +1,65 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from mutagen.mp3 import MP3
+
+from audiobook_generator.core.audio_tags import AudioTags
+from audiobook_generator.tts_providers.base_tts_provider import get_tts_provider
+from audiobook_generator.tts_providers.edge_tts_provider import EdgeTTSProvider
+from audiobook_generator.utils.mp3_utils import make_silence, parse_frame_header
+from tests.test_utils import MP3_FRAME_HEADER, get_edge_config, make_mp3_file, make_mp3_frame
+
+
+class FakeCommunicate:
+    """Stands in for edge_tts.Communicate, streams one mp3 file with a frame per word of the text."""
+
+    def __init__(self, text, voice_name, **kwargs):
+        self.text = text
+
+    async def stream(self):
+        data = make_mp3_file([make_mp3_frame(i + 1) for i in range(len(self.text.split()))])
+        for i in range(0, len(data), 100):
+            yield {"type": "audio", "data": data[i:i + 100]}
+        yield {"type": "WordBoundary"}
+
+
+@patch("edge_tts.Communicate", FakeCommunicate)
+class TestEdgeTtsProvider(unittest.TestCase):
+
+    def setUp(self):
+        self.config = get_edge_config()
+        self.config.break_duration = "100"
+        self.tts_provider = get_tts_provider(self.config)
+        self.assertIsInstance(self.tts_provider, EdgeTTSProvider)
+
+    def test_breaks_are_inserted_as_silent_frames(self):
+        communicate = self.tts_provider.create_communicate("One two three. @BRK#Four five.")
+        audio = asyncio.run(communicate.get_audio_stream()).getvalue()
+        silence = make_silence(parse_frame_header(MP3_FRAME_HEADER), 100)
+        frames = [make_mp3_frame(i) for i in (1, 2, 3)] + [silence] + [make_mp3_frame(i) for i in (1, 2)]
+        self.assertEqual(audio, b"".join(frames))
+
+    def test_chunks_are_merged_without_decoding(self):
+        audio_segments = [
+            asyncio.run(self.tts_provider.create_communicate(text).get_audio_stream())
+            for text in ("One two. @BRK#Three.", "Four five six.")
+        ]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "chapter.mp3")
+            self.tts_provider.merge_chunks(audio_segments, output_file, AudioTags("Title", "Author", "Book", 1),
+                                           ["1", "2"])
+            # 6 frames of speech and a pause of 100 ms rounded up to 5 frames
+            self.assertAlmostEqual(MP3(output_file).info.length, 11 * 576 / 24000)
+
+    def test_pydub_merge_decodes_the_audio(self):
+        self.config.use_pydub_merge = True
+        communicate = self.tts_provider.create_communicate("One two.")
+        self.assertFalse(communicate.keep_mp3_frames)
+
+
+if __name__ == '__main__':
+    unittest.main()
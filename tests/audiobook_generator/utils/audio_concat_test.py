@@ -0,0 +1,117 @@
+import io
+import os
+import tempfile
+import unittest
+import wave
+from unittest.mock import patch
+
+from mutagen.mp3 import MP3
+
+from audiobook_generator.utils import audio_concat
+from audiobook_generator.utils.audio_concat import concat_audio_files
+from audiobook_generator.utils.mp3_utils import find_audio_frames, make_silence, parse_frame_header
+from tests.audiobook_generator.utils.ogg_utils_test import make_opus_file, read_pages
+from tests.audiobook_generator.utils.webm_utils_test import make_webm_file
+from tests.test_utils import make_mp3_file, make_mp3_frame
+
+
+class TestConcatAudioFiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_file(self, name, data):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_mp3_frames_are_concatenated_without_tags(self):
+        first_frames = [make_mp3_frame(1), make_mp3_frame(2)]
+        second_frames = [make_mp3_frame(3)]
+        input_files = [
+            self.write_file("0001.mp3", make_mp3_file(first_frames)),
+            self.write_file("0002.mp3", make_mp3_file(second_frames, info_frame=False)),
+        ]
+        output_file = os.path.join(self.tmp_dir.name, "complete.mp3")
+
+        concat_audio_files(input_files, output_file, "mp3", silence_ms=500)
+
+        silence = make_silence(parse_frame_header(make_mp3_frame()), 500)
+        with open(output_file, "rb") as f:
+            data = f.read()
+        # One info frame for the whole stream, followed by the frames
+        start, end, _ = find_audio_frames(data)
+        self.assertEqual(data[start:end], b"".join(first_frames) + silence + b"".join(second_frames))
+        self.assertEqual(data[:start].count(b"Info"), 1)
+        self.assertAlmostEqual(MP3(output_file).info.length, (3 * 576 + len(silence) // 144 * 576) / 24000)
+
+    def write_wav_file(self, name, frames, sample_rate=24000, trailing_chunk=b""):
+        output = io.BytesIO()
+        with wave.open(output, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(frames)
+        return self.write_file(name, output.getvalue() + trailing_chunk)
+
+    def test_wav_samples_are_concatenated_with_silence(self):
+        input_files = [self.write_wav_file("0001.wav", b"\x01\x00" * 100), self.write_wav_file("0002.wav", b"\x02\x00")]
+        output_file = os.path.join(self.tmp_dir.name, "complete.wav")
+
+        concat_audio_files(input_files, output_file, "wav", silence_ms=10)
+
+        with wave.open(output_file, "rb") as wav_file:
+            self.assertEqual(wav_file.getframerate(), 24000)
+            self.assertEqual(wav_file.readframes(wav_file.getnframes()), b"\x01\x00" * 100 + bytes(480) + b"\x02\x00")
+
+    @patch.object(audio_concat, "WAV_PROBE_SIZE", 64)
+    @patch.object(audio_concat, "PIPE_BLOCK_SIZE", 30)
+    def test_wav_data_is_streamed_from_the_head_and_size(self):
+        # The tags of a chapter are in an "id3 " chunk after its samples, the files are larger than the head read
+        tags = b"id3 " + (10).to_bytes(4, "little") + b"ID3" + bytes(7)
+        input_files = [
+            self.write_wav_file("0001.wav", b"\x01\x00" * 100, trailing_chunk=tags),
+            self.write_wav_file("0002.wav", b"\x02\x00" * 50),
+        ]
+        output_file = os.path.join(self.tmp_dir.name, "complete.wav")
+
+        concat_audio_files(input_files, output_file, "wav", silence_ms=1)
+
+        with wave.open(output_file, "rb") as wav_file:
+            samples = wav_file.readframes(wav_file.getnframes())
+        self.assertEqual(samples, b"\x01\x00" * 100 + bytes(48) + b"\x02\x00" * 50)
+
+    @patch.object(audio_concat, "mediainfo", return_value={"sample_rate": "48000", "channels": "1"})
+    def test_opus_files_are_merged_with_encoded_silence(self, _):
+        input_files = [self.write_file(f"000{i}.opus", make_opus_file(i)) for i in (1, 2)]
+        output_file = os.path.join(self.tmp_dir.name, "complete.opus")
+
+        with patch.object(audio_concat, "get_encoded_silence", return_value=make_opus_file(9)) as get_silence:
+            concat_audio_files(input_files, output_file, "opus", silence_ms=1000, cache_dir="cache")
+
+        get_silence.assert_called_once_with("opus", 48000, 1, 1000, "cache")
+        with open(output_file, "rb") as f:
+            pages = read_pages(f.read())
+        # Headers of the first file, then the 3 audio pages of the first file, the silence and the second file
+        self.assertEqual(len(pages), 2 + 3 * 3)
+        self.assertEqual({page.serial for page in pages}, {1})
+
+    @patch.object(audio_concat, "mediainfo", return_value={"sample_rate": "24000", "channels": "1"})
+    def test_webm_silence_of_another_format_is_re_encoded(self, _):
+        input_files = [self.write_file(f"000{i}.webm", make_webm_file([b"a", b"b"])) for i in (1, 2)]
+        output_file = os.path.join(self.tmp_dir.name, "complete.webm")
+
+        with patch.object(audio_concat, "get_encoded_silence", return_value=make_webm_file([b""], codec=b"A_VORBIS")), \
+                patch.object(audio_concat, "concat_with_ffmpeg") as concat_with_ffmpeg:
+            concat_audio_files(input_files, output_file, "webm", silence_ms=1000)
+
+        concat_with_ffmpeg.assert_called_once_with(input_files, output_file, "webm", 1000)
+        self.assertFalse(os.path.exists(output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
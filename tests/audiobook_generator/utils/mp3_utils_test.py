@@ -0,0 +1,131 @@
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+from mutagen.mp3 import MP3
+
+from audiobook_generator.utils.mp3_utils import (
+    Mp3FrameWriter,
+    find_audio_frames,
+    make_silence,
+    parse_frame_header,
+    MPEG2,
+)
+from audiobook_generator.utils.utils import merge_audio_segments
+from tests.test_utils import MP3_FRAME_HEADER, make_mp3_file, make_mp3_frame
+
+
+class TestMp3Utils(unittest.TestCase):
+
+    def test_parse_frame_header(self):
+        header = parse_frame_header(make_mp3_frame())
+        self.assertEqual(header.version, MPEG2)
+        self.assertEqual(header.sample_rate, 24000)
+        self.assertEqual(header.bitrate, 48000)
+        self.assertEqual(header.frame_length, 144)
+        self.assertEqual(header.samples_per_frame, 576)
+        self.assertIsNone(parse_frame_header(b"ID3\x04"))
+
+    def test_find_audio_frames_skips_tags_and_info_frame(self):
+        frames = [make_mp3_frame(i) for i in range(1, 4)]
+        data = make_mp3_file(frames)
+        start, end, header = find_audio_frames(data)
+        self.assertEqual(data[start:end], b"".join(frames))
+        self.assertEqual(header.frame_length, 144)
+
+    def test_find_audio_frames_without_tags(self):
+        frames = [make_mp3_frame(i) for i in range(1, 4)]
+        data = make_mp3_file(frames, info_frame=False, id3v2=False, id3v1=False)
+        self.assertEqual(find_audio_frames(data)[:2], (0, len(data)))
+
+    def test_make_silence(self):
+        header = parse_frame_header(make_mp3_frame())
+        silence = make_silence(header, 1000)
+        # 24000 samples per second in frames of 576 samples, rounded up
+        self.assertEqual(len(silence), 42 * 144)
+        silent_header = parse_frame_header(silence, 144)
+        self.assertTrue(silent_header.is_compatible(header))
+        self.assertEqual(silence[4:144], bytes(140))
+
+
+
+class TestMp3FrameWriter(unittest.TestCase):
+
+    def test_frames_are_written_after_info_frame(self):
+        frames = [make_mp3_frame(i) for i in range(1, 5)]
+        # Garbage between the frames and a truncated last frame are dropped
+        data = frames[0] + b"\x00\xff\x01" + b"".join(frames[1:]) + frames[0][:100]
+        output = io.BytesIO()
+        writer = Mp3FrameWriter(output, parse_frame_header(frames[0]))
+        self.assertEqual(writer.write_frames(data), 4)
+        mp3_file = make_mp3_file([frames[0]])
+        self.assertEqual(writer.write_frames(mp3_file, *find_audio_frames(mp3_file)[:2]), 1)
+        writer.close()
+
+        info_frame = output.getvalue()[:writer.info_frame_length]
+        self.assertEqual(output.getvalue()[writer.info_frame_length:], b"".join(frames + frames[:1]))
+        self.assertTrue(parse_frame_header(info_frame).is_compatible(parse_frame_header(frames[0])))
+        self.assertEqual(find_audio_frames(output.getvalue())[0], writer.info_frame_length)
+        tag_offset = 4 + 9
+        self.assertEqual(info_frame[tag_offset:tag_offset + 4], b"Info")
+        flags_and_counts = struct.unpack(">III", info_frame[tag_offset + 4:tag_offset + 16])
+        self.assertEqual(flags_and_counts, (7, 5, len(output.getvalue())))
+        toc = info_frame[tag_offset + 16:tag_offset + 116]
+        self.assertEqual(toc[0], writer.info_frame_length * 256 // writer.size)
+        self.assertEqual(list(toc), sorted(toc))
+
+    def test_frames_are_copied_across_blocks(self):
+        frames = [make_mp3_frame(i) for i in range(1, 11)]
+        mp3_file = make_mp3_file(frames)
+        start, end, header = find_audio_frames(mp3_file)
+        output = io.BytesIO()
+        writer = Mp3FrameWriter(output, header)
+        input_file = io.BytesIO(mp3_file)
+        input_file.seek(start)
+        # Blocks of 100 bytes cut every frame
+        self.assertEqual(writer.copy_frames(input_file, end, block_size=100), 10)
+        writer.close()
+        self.assertEqual(output.getvalue()[writer.info_frame_length:], b"".join(frames))
+
+    def test_variable_bitrate_gets_xing_tag(self):
+        # Same format at 64 kbps (frame length 192 bytes)
+        frame_64k = bytes([0xFF, 0xF3, 0x84, 0xC0]) + bytes(188)
+        output = io.BytesIO()
+        writer = Mp3FrameWriter(output, parse_frame_header(frame_64k))
+        self.assertEqual(writer.write_frames(frame_64k + make_mp3_frame() + frame_64k), 3)
+        writer.close()
+        self.assertIn(b"Xing", output.getvalue()[:writer.info_frame_length])
+
+
+class TestMergeAudioSegments(unittest.TestCase):
+
+    def test_mp3_segments_are_merged_into_one_stream(self):
+        segments = [io.BytesIO(make_mp3_file([make_mp3_frame(i)] * 100)) for i in range(1, 4)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "chapter.mp3")
+            merge_audio_segments(segments, output_file, "mp3", ["1", "2", "3"], use_pydub_merge=False)
+            with open(output_file, "rb") as f:
+                data = f.read()
+            self.assertAlmostEqual(MP3(output_file).info.length, 300 * 576 / 24000)
+        # One info frame, the tags and info frames of the segments are dropped
+        self.assertEqual(data.count(b"Info"), 1)
+        self.assertNotIn(b"ID3", data)
+        self.assertNotIn(b"TAG", data)
+        self.assertTrue(data.startswith(MP3_FRAME_HEADER[:2]))
+
+    @unittest.skipUnless(shutil.which("ffmpeg"), "ffmpeg is not installed")
+    def test_pydub_merge_decodes_segments_from_memory(self):
+        header = parse_frame_header(MP3_FRAME_HEADER)
+        segments = [io.BytesIO(make_mp3_file([make_silence(header, 1000)])) for _ in range(3)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, "chapter.mp3")
+            merge_audio_segments(segments, output_file, "mp3", ["1", "2", "3"], use_pydub_merge=True)
+            self.assertAlmostEqual(MP3(output_file).info.length, 3.0, delta=0.2)
+            self.assertEqual(os.listdir(tmp_dir), ["chapter.mp3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+from mutagen.ogg import OggPage
+
+from audiobook_generator.utils.ogg_utils import get_opus_packet_samples, merge_ogg_segments
+
+# CELT packets of 20 ms (960 samples at 48 kHz), one frame
+OPUS_PACKET = bytes([31 << 3]) + bytes(99)
+LONG_OPUS_PACKET = bytes([31 << 3]) + bytes(399)
+
+
+def make_page(packets, serial, position, first=False, last=False, continued=False, complete=True) -> OggPage:
+    page = OggPage()
+    page.packets = packets
+    page.serial = serial
+    page.position = position
+    page.first = first
+    page.last = last
+    page.continued = continued
+    page.complete = complete
+    return page
+
+
+def make_opus_file(serial, channels=1, pre_skip=312, end_trimming=0) -> bytes:
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, channels, pre_skip, 24000, 0, 0)
+    pages = [
+        make_page([head], serial, 0, first=True),
+        make_page([b"OpusTags" + bytes(8)], serial, 0),
+        make_page([OPUS_PACKET] * 3, serial, 3 * 960),
+        # A packet continued on the next page, its first part fills whole lacing segments
+        make_page([OPUS_PACKET, LONG_OPUS_PACKET[:255]], serial, 4 * 960, complete=False),
+        make_page([LONG_OPUS_PACKET[255:], OPUS_PACKET], serial, 6 * 960 - end_trimming, last=True, continued=True),
+    ]
+    for sequence, page in enumerate(pages):
+        page.sequence = sequence
+    return b"".join(page.write() for page in pages)
+
+
+def read_pages(data):
+    fileobj = io.BytesIO(data)
+    pages = []
+    while fileobj.tell() < len(data):
+        pages.append(OggPage(fileobj))
+    return pages
+
+
+class TestOggUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp_dir.name, "chapter.opus")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_opus_packet_samples(self):
+        self.assertEqual(get_opus_packet_samples(OPUS_PACKET), 960)
+        self.assertEqual(get_opus_packet_samples(bytes([0b00001001])), 2 * 960)  # SILK 20 ms, two frames
+        self.assertEqual(get_opus_packet_samples(bytes([(16 << 3) | 3, 5])), 5 * 120)  # CELT 2.5 ms, five frames
+        self.assertEqual(get_opus_packet_samples(b""), 0)
+
+    def test_streams_are_merged_into_one(self):
+        segments = [make_opus_file(1), make_opus_file(2), make_opus_file(3, pre_skip=100, end_trimming=500)]
+        self.assertTrue(merge_ogg_segments(segments, self.output_file))
+        with open(self.output_file, "rb") as f:
+            data = f.read()
+        pages = read_pages(data)
+
+        # Headers of the first stream, then the 3 audio pages of every stream
+        self.assertEqual(len(pages), 2 + 3 * 3)
+        self.assertEqual({page.serial for page in pages}, {1})
+        self.assertEqual([page.sequence for page in pages], list(range(len(pages))))
+        self.assertEqual([page.first for page in pages], [True] + [False] * 10)
+        self.assertEqual([page.last for page in pages], [False] * 10 + [True])
+        self.assertEqual(
+            [page.position for page in pages[2:]],
+            [3 * 960, 4 * 960, 6 * 960, 9 * 960, 10 * 960, 12 * 960, 15 * 960, 16 * 960, 18 * 960 - 500],
+        )
+        audio = b"".join(packet for page in pages[2:] for packet in page.packets)
+        self.assertEqual(audio, (OPUS_PACKET * 4 + LONG_OPUS_PACKET + OPUS_PACKET) * 3)
+        # Pages are written with their CRC
+        self.assertEqual(b"".join(page.write() for page in pages), data)
+
+    def test_different_formats_are_not_merged(self):
+        self.assertFalse(merge_ogg_segments([make_opus_file(1), make_opus_file(2, channels=2)], self.output_file))
+        self.assertFalse(merge_ogg_segments([make_opus_file(1), b"RIFF"], self.output_file))
+        self.assertFalse(os.path.exists(self.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from audiobook_generator.book_parsers import epub_book_parser
+from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
+from audiobook_generator.utils.parse_cache import ParseCache, decode_chapters, encode_chapters, get_parse_cache_key
+from tests.test_utils import get_edge_config
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config = get_edge_config()
+        self.config.parse_cache_dir = os.path.join(self.tmp_dir.name, "parse_cache")
+        self.config.parse_worker_count = 1
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_encode_decode(self):
+        chapters = [("Title", "Some text."), ("", ""), ("Ünïcödé_标题", "文字 " * 1000)]
+        self.assertEqual(decode_chapters(encode_chapters(chapters)), chapters)
+        self.assertEqual(decode_chapters(encode_chapters([])), [])
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.config.parse_cache_dir)
+        cache.put("key", [("Title", "Text")])
+        with open(cache._get_path("key"), "r+b") as f:
+            f.truncate(10)
+        self.assertIsNone(cache.get("key"))
+
+    def test_key_changes_with_options(self):
+        key = get_parse_cache_key(self.config, "   ")
+        self.assertEqual(get_parse_cache_key(self.config, "   "), key)
+        self.assertNotEqual(get_parse_cache_key(self.config, " "), key)
+
+        self.config.newline_mode = "single"
+        self.assertNotEqual(get_parse_cache_key(self.config, "   "), key)
+        self.config.newline_mode = "double"
+
+        search_and_replace_file = os.path.join(self.tmp_dir.name, "search.conf")
+        with open(search_and_replace_file, "w") as f:
+            f.write("Crusoe==Kruso\n")
+        self.config.search_and_replace_file = search_and_replace_file
+        search_and_replace_key = get_parse_cache_key(self.config, "   ")
+        self.assertNotEqual(search_and_replace_key, key)
+        with open(search_and_replace_file, "w") as f:
+            f.write("Crusoe==Crusoe\n")
+        self.assertNotEqual(get_parse_cache_key(self.config, "   "), search_and_replace_key)
+
+    def test_parser_uses_cache(self):
+        chapters = EpubBookParser(self.config).get_chapters("   ")
+
+        with mock.patch.object(epub_book_parser, "parse_document") as parse:
+            parser = EpubBookParser(self.config)
+            self.assertEqual(parser.get_chapters("   "), chapters)
+            self.assertEqual(
+                [idx for idx, _, _ in parser.iter_chapter_range("   ", 2, 4)], [2, 3, 4]
+            )
+        parse.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
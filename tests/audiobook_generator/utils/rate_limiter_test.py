@@ -0,0 +1,93 @@
+import time
+import unittest
+from email.utils import formatdate
+
+import requests
+from aiohttp import ClientResponseError, RequestInfo
+from multidict import CIMultiDict
+
+from audiobook_generator.utils.rate_limiter import RateLimiter, get_throttling, parse_retry_after
+
+
+def make_requests_error(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(response=response)
+
+
+def make_aiohttp_error(status, headers=None):
+    request_info = RequestInfo("https://example.com", "POST", CIMultiDict(), "https://example.com")
+    return ClientResponseError(request_info, (), status=status, headers=CIMultiDict(headers or {}))
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 60, usegmt=True)), 60, delta=2)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_get_throttling(self):
+        self.assertEqual(get_throttling(make_requests_error(429, {"Retry-After": "3"})), (True, 3.0))
+        self.assertEqual(get_throttling(make_aiohttp_error(503)), (True, None))
+        self.assertEqual(get_throttling(make_aiohttp_error(429, {"Retry-After": "7"})), (True, 7.0))
+        self.assertEqual(get_throttling(make_requests_error(500)), (False, None))
+        self.assertEqual(get_throttling(ValueError("not a response")), (False, None))
+        self.assertEqual(get_throttling(None), (False, None))
+
+    def test_concurrency_limit(self):
+        limiter = RateLimiter(4)
+        for _ in range(4):
+            self.assertEqual(limiter.try_acquire(100), 0)
+        self.assertGreater(limiter.try_acquire(100), 0)
+        limiter.release()
+        self.assertEqual(limiter.try_acquire(100), 0)
+
+    def test_aimd(self):
+        limiter = RateLimiter(8)
+        limiter.try_acquire(100)
+        limiter.release(make_requests_error(429, {"Retry-After": "0.2"}))
+        self.assertEqual(limiter.concurrency_limit.value, 4)
+        # all requests wait for Retry-After
+        self.assertAlmostEqual(limiter.try_acquire(100), 0.2, delta=0.05)
+
+        # a burst of throttled responses only halves the limit once
+        limiter.release(make_aiohttp_error(503))
+        self.assertEqual(limiter.concurrency_limit.value, 4)
+
+        # other errors don't change the limit, successes increase it slowly
+        limiter.release(make_requests_error(500))
+        self.assertEqual(limiter.concurrency_limit.value, 4)
+        for _ in range(4):
+            limiter.release()
+        self.assertGreater(limiter.concurrency_limit.value, 4.9)
+        self.assertLess(limiter.concurrency_limit.value, 5.1)
+        for _ in range(100):
+            limiter.release()
+        self.assertEqual(limiter.concurrency_limit.value, 8)
+
+    def test_requests_per_second(self):
+        limiter = RateLimiter(10, requests_per_second=2)
+        self.assertEqual(limiter.try_acquire(100), 0)
+        self.assertEqual(limiter.try_acquire(100), 0)
+        self.assertAlmostEqual(limiter.try_acquire(100), 0.5, delta=0.05)
+
+    def test_chars_per_second(self):
+        limiter = RateLimiter(10, chars_per_second=100)
+        # a request larger than the bucket goes through when the bucket is full
+        self.assertEqual(limiter.try_acquire(300), 0)
+        self.assertAlmostEqual(limiter.try_acquire(10), 2.1, delta=0.05)
+
+    def test_request_context(self):
+        limiter = RateLimiter(2)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            with limiter.request(100):
+                raise make_requests_error(429, {"Retry-After": "0"})
+        self.assertEqual(limiter.in_flight.value, 0)
+        self.assertEqual(limiter.concurrency_limit.value, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
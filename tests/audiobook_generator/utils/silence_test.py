@@ -0,0 +1,80 @@
+import os
+import struct
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from pydub import AudioSegment
+
+from audiobook_generator.utils.mp3_utils import make_silence, parse_frame_header
+from audiobook_generator.utils.silence import (
+    SILENCE_FOLDER, get_encoded_silence, get_mp3_silence, get_pcm_silence, get_wav_silence
+)
+from tests.test_utils import MP3_FRAME_HEADER
+
+# Stands in for ffmpeg: writes its arguments to the output file, and counts its calls next to itself
+FAKE_FFMPEG = f"""#!{sys.executable}
+import sys
+with open(sys.argv[0] + ".calls", "a") as f:
+    f.write("call\\n")
+with open(sys.argv[-1], "w") as f:
+    f.write(" ".join(sys.argv[1:-1]))
+"""
+
+
+def make_fmt(format_tag=1, channels=2, sample_rate=8000, bits=16) -> bytes:
+    block_align = channels * bits // 8
+    return struct.pack("<HHIIHH", format_tag, channels, sample_rate, sample_rate * block_align, block_align, bits)
+
+
+class TestSilence(unittest.TestCase):
+
+    def test_mp3_silence_is_memoized(self):
+        header = parse_frame_header(MP3_FRAME_HEADER)
+        silence = get_mp3_silence(header, 1250)
+        self.assertEqual(silence, make_silence(header, 1250))
+        self.assertIs(get_mp3_silence(header, 1250), silence)
+
+    def test_pcm_silence_matches_pydub(self):
+        self.assertEqual(get_pcm_silence(24000, 1, 1250), AudioSegment.silent(1250, 24000).raw_data)
+        self.assertEqual(get_pcm_silence(8000, 2, 10, sample_width=1), b"\x80" * 160)
+
+    def test_wav_silence(self):
+        self.assertEqual(get_wav_silence(make_fmt(), 100), bytes(8000 // 10 * 4))
+        self.assertEqual(get_wav_silence(make_fmt(format_tag=3, channels=1, bits=32), 100), bytes(8000 // 10 * 4))
+        # mu-law
+        self.assertIsNone(get_wav_silence(make_fmt(format_tag=7, bits=8), 100))
+        self.assertIsNone(get_wav_silence(b"", 100))
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in for ffmpeg is a script")
+    def test_encoded_silence_is_stored_in_the_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            converter = os.path.join(tmp_dir, "ffmpeg")
+            with open(converter, "w") as f:
+                f.write(FAKE_FFMPEG)
+            os.chmod(converter, 0o755)
+            cache_dir = os.path.join(tmp_dir, "cache")
+
+            get_encoded_silence.cache_clear()
+            try:
+                with mock.patch.object(AudioSegment, "converter", converter):
+                    silence = get_encoded_silence("opus", 48000, 1, 1000, cache_dir)
+                    self.assertIs(get_encoded_silence("opus", 48000, 1, 1000, cache_dir), silence)
+                    # Another process (or run) reads it from the disk
+                    get_encoded_silence.cache_clear()
+                    self.assertEqual(get_encoded_silence("opus", 48000, 1, 1000, cache_dir), silence)
+                    # Without a cache directory, it's only memoized
+                    webm_silence = get_encoded_silence("webm", 24000, 2, 500)
+                    self.assertIs(get_encoded_silence("webm", 24000, 2, 500), webm_silence)
+            finally:
+                get_encoded_silence.cache_clear()
+
+            self.assertIn(b"anullsrc=r=48000:cl=1c -t 1.0 -c:a libopus", silence)
+            self.assertEqual(os.listdir(os.path.join(cache_dir, SILENCE_FOLDER)), ["1000ms_48000hz_1ch.opus"])
+            with open(converter + ".calls") as f:
+                self.assertEqual(len(f.readlines()), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from audiobook_generator.utils.tts_cache import TTSCache, get_cache_key
+
+PARAMS = {"tts": "azure", "voice_name": "en-US-GuyNeural", "output_format": "audio-24khz-48kbitrate-mono-mp3"}
+
+
+class TestTTSCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_cache_key(self):
+        self.assertEqual(get_cache_key("Hello  world.\n", PARAMS), get_cache_key("Hello world.", PARAMS))
+        self.assertNotEqual(get_cache_key("Hello world.", PARAMS), get_cache_key("Hello world!", PARAMS))
+        self.assertNotEqual(
+            get_cache_key("Hello world.", PARAMS), get_cache_key("Hello world.", {**PARAMS, "voice_name": "other"})
+        )
+        self.assertEqual(
+            get_cache_key("Hello world.", PARAMS), get_cache_key("Hello world.", {**PARAMS, "use_pydub_merge": True})
+        )
+
+    def test_get_and_put(self):
+        cache = TTSCache(self.tmp_dir.name, 1024, "mp3")
+        self.assertIsNone(cache.get("Hello world.", PARAMS))
+        cache.put("Hello world.", PARAMS, io.BytesIO(b"audio"))
+        self.assertEqual(cache.get("Hello world.", PARAMS).getvalue(), b"audio")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # A new instance sees the entries written before
+        cache = TTSCache(self.tmp_dir.name, 1024, "mp3")
+        self.assertEqual(cache.current_size, 5)
+        self.assertEqual(cache.get("Hello world.", PARAMS).getvalue(), b"audio")
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = TTSCache(self.tmp_dir.name, 250, "mp3")
+        for i in range(3):
+            cache.put(f"text {i}", PARAMS, io.BytesIO(b"x" * 100))
+            # mtime resolution of some file systems is coarse
+            os.utime(cache._get_path(get_cache_key(f"text {i}", PARAMS)), (time.time() + i, time.time() + i))
+        self.assertLessEqual(cache.current_size, 250)
+        self.assertIsNone(cache.get("text 0", PARAMS))
+        self.assertIsNotNone(cache.get("text 2", PARAMS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+import wave
+from unittest import mock
+
+from pydub import AudioSegment
+
+from audiobook_generator.utils.utils import merge_audio_segments, pydub_merge_audio_segments
+
+# Stands in for ffmpeg: "decodes" stdin as 8 kHz mono 16 bit samples to a wav on stdout (with the unknown sizes
+# ffmpeg writes to a pipe), and "encodes" the samples of stdin by writing them to the output file
+FAKE_FFMPEG = f"""#!{sys.executable}
+import struct, sys
+args = sys.argv[1:]
+data = sys.stdin.buffer.read()
+if b"FAIL" in data:
+    sys.stderr.write("Invalid data found when processing input")
+    sys.exit(1)
+if args[-1] == "pipe:1":
+    fmt = struct.pack("<HHIIHH", 1, 1, 8000, 16000, 2, 16)
+    header = b"RIFF" + b"\\xff" * 4 + b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt + b"data" + b"\\xff" * 4
+    sys.stdout.buffer.write(header + data)
+else:
+    assert args[args.index("-i") - 6:args.index("-i")] == ["-f", "s16le", "-ar", "8000", "-ac", "1"], args
+    with open(args[-1], "wb") as f:
+        f.write(data)
+"""
+
+
+def make_wav(frame_rate, channels, frame_count, sample=0x100) -> io.BytesIO:
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(frame_rate)
+        wav_file.writeframes(sample.to_bytes(2, "little") * channels * frame_count)
+    output.seek(0)
+    return output
+
+
+class TestPydubMergeAudioSegments(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_segments_of_different_formats(self):
+        # One second each, merged at the highest sample rate and channel count, without ffmpeg
+        segments = [make_wav(24000, 1, 24000), make_wav(16000, 1, 16000), make_wav(8000, 2, 8000)]
+        output_file = os.path.join(self.tmp_dir.name, "chapter.wav")
+        merge_audio_segments(segments, output_file, "wav", ["1", "2", "3"], use_pydub_merge=False)
+
+        with wave.open(output_file, "rb") as wav_file:
+            self.assertEqual(wav_file.getframerate(), 24000)
+            self.assertEqual(wav_file.getnchannels(), 2)
+            self.assertAlmostEqual(wav_file.getnframes(), 3 * 24000, delta=10)
+            samples = wav_file.readframes(wav_file.getnframes())
+        self.assertEqual(samples[:4], b"\x00\x01\x00\x01")
+        self.assertEqual(samples[-4:], b"\x00\x01\x00\x01")
+
+    @unittest.skipUnless(os.name == "posix", "the stand-in for ffmpeg is a script")
+    def test_segments_are_decoded_and_encoded_through_ffmpeg(self):
+        converter = os.path.join(self.tmp_dir.name, "ffmpeg")
+        with open(converter, "w") as f:
+            f.write(FAKE_FFMPEG)
+        os.chmod(converter, 0o755)
+        output_file = os.path.join(self.tmp_dir.name, "chapter.mp3")
+        segments = [io.BytesIO(bytes([i, 0]) * 800) for i in range(1, 4)]
+
+        with mock.patch.object(AudioSegment, "converter", converter):
+            pydub_merge_audio_segments(segments, output_file, "mp3")
+            with open(output_file, "rb") as f:
+                self.assertEqual(f.read(), b"".join(segment.getvalue() for segment in segments))
+
+            with self.assertRaisesRegex(RuntimeError, "Invalid data found"):
+                pydub_merge_audio_segments([io.BytesIO(b"FAIL")], output_file, "mp3")
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), ["chapter.mp3", "ffmpeg"])
+
+
+if __name__ == '__main__':
+    unittest.main()
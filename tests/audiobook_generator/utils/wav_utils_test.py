@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+import unittest
+import wave
+
+from audiobook_generator.utils.wav_utils import (
+    WAVE_FORMAT_MULAW, find_wav_data, make_wav_fmt, merge_pcm_segments, merge_wav_segments
+)
+
+
+def make_wav_file(frames: bytes, sample_rate=24000, data_size=None) -> bytes:
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames)
+    data = output.getvalue()
+    if data_size is not None:
+        # Size written by a streaming encoder
+        data = data[:40] + data_size.to_bytes(4, "little") + data[44:]
+    return data
+
+
+class TestWavUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp_dir.name, "chapter.wav")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_output(self) -> bytes:
+        with open(self.output_file, "rb") as f:
+            return f.read()
+
+    def test_find_wav_data(self):
+        data = make_wav_file(b"\x01\x02" * 10, data_size=0xFFFFFFFF)
+        fmt, start, end = find_wav_data(data)
+        self.assertEqual(len(fmt), 16)
+        self.assertEqual(data[start:end], b"\x01\x02" * 10)
+
+    def test_samples_are_merged_under_one_header(self):
+        segments = [make_wav_file(b"\x01\x00" * 100), make_wav_file(b"\x02\x00" * 50, data_size=0), b"\x03\x00" * 25]
+        self.assertTrue(merge_wav_segments(segments, self.output_file))
+        with wave.open(self.output_file, "rb") as wav_file:
+            self.assertEqual(wav_file.getframerate(), 24000)
+            self.assertEqual(wav_file.getnframes(), 175)
+            self.assertEqual(wav_file.readframes(175), b"\x01\x00" * 100 + b"\x02\x00" * 50 + b"\x03\x00" * 25)
+
+    def test_different_formats_are_not_merged(self):
+        segments = [make_wav_file(b"\x01\x00"), make_wav_file(b"\x01\x00", sample_rate=16000)]
+        self.assertFalse(merge_wav_segments(segments, self.output_file))
+        self.assertFalse(os.path.exists(self.output_file))
+
+    def test_headerless_segments_are_merged_under_the_default_header(self):
+        fmt = make_wav_fmt(WAVE_FORMAT_MULAW, 1, 8000, 8)
+        segments = [b"\xff" * 101, b"\x7f" * 50]
+        self.assertTrue(merge_wav_segments(segments, self.output_file, fmt))
+        data = self.read_output()
+        self.assertEqual(data[:4], b"RIFF")
+        self.assertEqual(int.from_bytes(data[4:8], "little"), len(data) - 8)
+        self.assertEqual(len(data) % 2, 0)
+        self.assertEqual(find_wav_data(data), (fmt, len(data) - 152, len(data) - 1))
+        self.assertEqual(data[-152:-1], b"\xff" * 101 + b"\x7f" * 50)
+
+    def test_headerless_segments_of_unknown_format_are_not_merged(self):
+        self.assertFalse(merge_wav_segments([b"\xff" * 100, b"\x7f" * 50], self.output_file))
+        self.assertFalse(os.path.exists(self.output_file))
+
+    def test_pcm_segments_drop_wav_headers(self):
+        self.assertTrue(merge_pcm_segments([b"\x01\x00" * 3, make_wav_file(b"\x02\x00" * 2)], self.output_file))
+        self.assertEqual(self.read_output(), b"\x01\x00" * 3 + b"\x02\x00" * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from audiobook_generator.utils.webm_utils import (
+    CLUSTER,
+    CLUSTER_TIMESTAMP,
+    CODEC_ID,
+    CODEC_PRIVATE,
+    EBML_HEADER,
+    INFO,
+    SIMPLE_BLOCK,
+    TIMESTAMP_SCALE,
+    TRACK_ENTRY,
+    TRACK_NUMBER,
+    TRACKS,
+    UNKNOWN_SIZE,
+    encode_element,
+    encode_id,
+    iter_elements,
+    merge_webm_segments,
+    read_webm,
+)
+
+
+def make_block(relative_timestamp: int, payload: bytes) -> bytes:
+    # Track number 1, timestamp relative to the cluster, keyframe flag
+    return encode_element(SIMPLE_BLOCK, b"\x81" + struct.pack(">hB", relative_timestamp, 0x80) + payload)
+
+
+def make_webm_file(payloads, codec=b"A_OPUS") -> bytes:
+    """Streaming WebM with 20 ms blocks, two per cluster, segment and clusters of unknown size."""
+    tracks = encode_element(TRACKS, encode_element(TRACK_ENTRY, (
+        encode_element(TRACK_NUMBER, b"\x01") + encode_element(CODEC_ID, codec)
+        + encode_element(CODEC_PRIVATE, b"OpusHead")
+    )))
+    data = encode_element(EBML_HEADER, b"\x42\x82\x84webm")
+    data += encode_id(0x18538067) + UNKNOWN_SIZE
+    data += encode_element(INFO, encode_element(TIMESTAMP_SCALE, (1000000).to_bytes(3, "big")))
+    data += tracks
+    for i in range(0, len(payloads), 2):
+        data += encode_id(CLUSTER) + UNKNOWN_SIZE + encode_element(CLUSTER_TIMESTAMP, bytes([i * 20]))
+        data += b"".join(make_block(j * 20, payload) for j, payload in enumerate(payloads[i:i + 2]))
+    return data
+
+
+class TestWebmUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp_dir.name, "chapter.webm")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_read_streaming_webm(self):
+        webm_file = read_webm(make_webm_file([b"a", b"b", b"c"]))
+        self.assertEqual(len(webm_file.clusters), 2)
+        self.assertEqual(webm_file.timestamp_scale, 1000000)
+        self.assertIsNone(webm_file.duration)
+        self.assertEqual(webm_file.get_end_timestamp(), 60)
+        self.assertEqual(webm_file.get_track_format(), [(b"A_OPUS", b"OpusHead", 1)])
+        self.assertIsNone(read_webm(b"OggS"))
+
+    def test_clusters_are_shifted_after_the_files_before(self):
+        segments = [make_webm_file([b"a", b"b", b"c"]), make_webm_file([b"d", b"e"])]
+        self.assertTrue(merge_webm_segments(segments, self.output_file))
+        with open(self.output_file, "rb") as f:
+            webm_file = read_webm(f.read())
+
+        self.assertEqual(webm_file.duration, 100)
+        self.assertEqual([webm_file.get_cluster_timestamp(cluster) for cluster in webm_file.clusters], [0, 40, 60])
+        payloads = [
+            webm_file.data[block.content_start + 4:block.end]
+            for cluster in webm_file.clusters
+            for block in iter_elements(webm_file.data, cluster.content_start, cluster.end)
+            if block.id == SIMPLE_BLOCK
+        ]
+        self.assertEqual(payloads, [b"a", b"b", b"c", b"d", b"e"])
+
+    def test_different_formats_are_not_merged(self):
+        segments = [make_webm_file([b"a"]), make_webm_file([b"b"], codec=b"A_VORBIS")]
+        self.assertFalse(merge_webm_segments(segments, self.output_file))
+        self.assertFalse(os.path.exists(self.output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
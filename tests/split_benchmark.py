@@ -0,0 +1,92 @@
+import timeit
+from unittest import mock
+
+from sentencex import segment
+
+from audiobook_generator.utils import utils
+from audiobook_generator.utils.utils import split_text, split_long_sentence, SPLIT_PUNCTUATIONS
+
+
+def legacy_split_long_sentence(sentence, max_chars):
+    """The previous implementation, re-slicing the remaining sentence for every part."""
+    if max_chars < 5:
+        return [sentence[i:i+max_chars] for i in range(0, len(sentence), max_chars)]
+
+    parts = []
+    remaining = sentence
+    while remaining:
+        if len(remaining) <= max_chars:
+            parts.append(remaining)
+            break
+        best_split_idx = -1
+        for punctuation in SPLIT_PUNCTUATIONS:
+            split_idx = remaining[:max_chars].rfind(punctuation)
+            if split_idx != -1:
+                best_split_idx = split_idx + len(punctuation)
+                break
+        if best_split_idx == -1:
+            best_split_idx = max_chars
+        parts.append(remaining[:best_split_idx])
+        remaining = remaining[best_split_idx:]
+    return parts
+
+
+def legacy_join(sentences, max_chars):
+    """The previous sentence accumulation, concatenating strings for every sentence."""
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        space = " " if current_chunk else ""
+        if len(current_chunk) + len(space) + len(sentence) <= max_chars:
+            current_chunk += space + sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = sentence
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def bench(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{name:<55} {seconds * 1000:10.3f} ms")
+    return seconds
+
+
+def main():
+    with open("tests/long_text.txt", "r") as f:
+        text = f.read()
+
+    # A single huge "sentence" without end-of-sentence punctuation, e.g. a badly formatted chapter
+    long_sentence = ", ".join(f"word{i} word{i + 1}" for i in range(200_000))
+    assert split_long_sentence(long_sentence, 3000) == legacy_split_long_sentence(long_sentence, 3000)
+
+    legacy = bench("legacy split_long_sentence (2.6M chars, 3000)",
+                   lambda: legacy_split_long_sentence(long_sentence, 3000), 5)
+    current = bench("split_long_sentence (2.6M chars, 3000)",
+                    lambda: split_long_sentence(long_sentence, 3000), 5)
+    print(f"speedup: {legacy / current:.1f}x")
+
+    # Many tiny sentences accumulated into big chunks, segmentation is done once up front so that
+    # only the chunking itself is measured
+    sentences = ["Short sentence."] * 200_000
+    with mock.patch.object(utils, "segment", lambda language, text: sentences):
+        assert split_text(" ", 100_000, "en-US") == legacy_join(sentences, 100_000)
+        legacy = bench("legacy sentence accumulation (200k sentences, 100000)",
+                       lambda: legacy_join(sentences, 100_000), 5)
+        current = bench("split_text (200k sentences, 100000)",
+                        lambda: split_text(" ", 100_000, "en-US"), 5)
+    print(f"speedup: {legacy / current:.1f}x")
+
+    for language, max_chars in [("zh-CN", 400), ("en-US", 3000)]:
+        sentences = list(segment(language, text))
+        with mock.patch.object(utils, "segment", lambda language, text: sentences):
+            bench(f"split_text long_text.txt ({language}, {max_chars})",
+                  lambda: split_text(text, max_chars, language), 20)
+
+if __name__ == "__main__":
+    main()
+
+# run the benchmark from the repo root
+# python -m tests.split_benchmark
@@ -1,6 +1,6 @@
 import unittest
 import logging
-from audiobook_generator.utils.utils import split_text
+from audiobook_generator.utils.utils import split_text, split_long_sentence
 
 # Configure logging to display logs during test execution
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -25,6 +25,40 @@ class TestSplitText(unittest.TestCase):
         
         # The lengths should be the same
         assert len(chunks_sans_whitespace) == len(original_sans_whitespace), "Content might be lost during splitting"
+
+    def test_input_file_matches_archive(self):
+        """Test that the split result is identical to the archived one."""
+        with open("tests/long_text.txt", "r") as f:
+            text = f.read()
+        with open("tests/split_test.txt", "r") as f:
+            archive = f.read()
+
+        chunks = split_text(text, 400, "zh-CN")
+        result = "".join(
+            f"Chunk {i} of {len(chunks)}, length={len(chunk)}, text=[{chunk}]\n" + "-"*100 + "\n"
+            for i, chunk in enumerate(chunks, 1)
+        )
+        self.assertEqual(result, archive)
+
+    def test_split_long_sentence(self):
+        """Test splitting at the highest priority punctuation mark within max_chars."""
+        self.assertEqual(
+            split_long_sentence("one, two. three, four", 12),
+            ["one, two. ", "three, four"],
+        )
+        self.assertEqual(
+            split_long_sentence("aaaa bbbb cccc", 7),
+            ["aaaa ", "bbbb ", "cccc"],
+        )
+        self.assertEqual(
+            split_long_sentence("abcdefghij", 6),
+            ["abcdef", "ghij"],
+        )
+        self.assertEqual(split_long_sentence("abcdefg", 3), ["abc", "def", "g"])
+        self.assertEqual(
+            split_long_sentence("第一句。第二句，第三句。", 6),
+            ["第一句。", "第二句，", "第三句。"],
+        )
         
 
 if __name__ == "__main__":
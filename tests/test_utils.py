@@ -1,6 +1,10 @@
+import os
+from argparse import Namespace
 from unittest.mock import MagicMock
 from audiobook_generator.config.general_config import GeneralConfig
 
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'examples')
+
 
 def get_azure_config():
     args = MagicMock(
@@ -42,3 +46,50 @@ def get_openai_config():
         speed=1.0
     )
     return GeneralConfig(args)
+
+
+def get_edge_config():
+    # argparse.Namespace instead of MagicMock, so the config can be pickled like in a real run
+    args = Namespace(
+        input_file=os.path.join(EXAMPLES_DIR, 'The_Life_and_Adventures_of_Robinson_Crusoe.epub'),
+        output_folder='output',
+        preview=False,
+        output_text=False,
+        log='INFO',
+        newline_mode='double',
+        title_mode='auto',
+        chapter_start=1,
+        chapter_end=-1,
+        remove_endnotes=False,
+        remove_reference_numbers=False,
+        search_and_replace_file='',
+        worker_count=1,
+        use_pydub_merge=False,
+        tts='edge',
+        language='en-US',
+        voice_name='en-US-GuyNeural',
+        output_format='audio-24khz-48kbitrate-mono-mp3',
+        break_duration='1250',
+    )
+    return GeneralConfig(args)
+
+
+# Header of a MPEG2 layer III frame, 24 kHz, 48 kbps, mono, no CRC (frame length 144 bytes)
+MP3_FRAME_HEADER = bytes([0xFF, 0xF3, 0x64, 0xC0])
+
+
+def make_mp3_frame(fill: int = 0x55) -> bytes:
+    return MP3_FRAME_HEADER + bytes([fill]) * 140
+
+
+def make_mp3_file(frames, info_frame=True, id3v2=True, id3v1=True) -> bytes:
+    data = b""
+    if id3v2:
+        data += b"ID3" + bytes([4, 0, 0, 0, 0, 0, 20]) + bytes(20)
+    if info_frame:
+        # Info tag after the 4 byte header and 9 bytes of side info
+        data += MP3_FRAME_HEADER + bytes(9) + b"Info" + bytes(144 - 17)
+    data += b"".join(frames)
+    if id3v1:
+        data += b"TAG" + bytes(125)
+    return data
@@ -0,0 +1,63 @@
+import argparse
+import itertools
+import re
+import timeit
+
+from audiobook_generator.book_parsers.epub_loader import EpubLoader
+from audiobook_generator.book_parsers.search_and_replace import SearchAndReplaceRules
+from audiobook_generator.book_parsers.text_cleaner import TextCleaner
+from audiobook_generator.book_parsers.text_extractors import extract_text_lxml
+
+EPUB_FILES = ["examples/The_Life_and_Adventures_of_Robinson_Crusoe.epub"]
+# Break strings of the TTS providers
+BREAK_STRINGS = [" @BRK#", "   ", "."]
+
+
+def bench(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{name:<55} {seconds * 1000:10.3f} ms")
+    return seconds
+
+
+def clean_text_legacy(raw, config, break_string):
+    # Cleaning as done before TextCleaner, one re.sub pass per step
+    if config.newline_mode == "single":
+        cleaned_text = re.sub(r"[\n]+", break_string, raw.strip())
+    elif config.newline_mode == "double":
+        cleaned_text = re.sub(r"[\n]{2,}", break_string, raw.strip())
+    else:
+        cleaned_text = re.sub(r"[\n]+", " ", raw.strip())
+    cleaned_text = re.sub(r"\s+", " ", cleaned_text)
+    if config.remove_endnotes:
+        cleaned_text = re.sub(r'(?<=[a-zA-Z.,!?;”")])\d+', "", cleaned_text)
+    if config.remove_reference_numbers:
+        cleaned_text = re.sub(r'\[\d+(\.\d+)?\]', '', cleaned_text)
+    return cleaned_text
+
+
+def main():
+    raws = []
+    for epub_file in EPUB_FILES:
+        raws.extend(extract_text_lxml(document.get_content())[0] for document in EpubLoader(epub_file).get_documents())
+    print(f"{len(raws)} documents, {sum(len(raw) for raw in raws)} characters")
+
+    for newline_mode, remove_numbers in itertools.product(("double", "single", "none"), (False, True)):
+        config = argparse.Namespace(
+            newline_mode=newline_mode, remove_endnotes=remove_numbers, remove_reference_numbers=remove_numbers
+        )
+        text_cleaner = TextCleaner(config, SearchAndReplaceRules([]))
+        for break_string in BREAK_STRINGS:
+            assert [text_cleaner.clean(raw, break_string) for raw in raws] == \
+                [clean_text_legacy(raw, config, break_string) for raw in raws]
+
+        name = f"{newline_mode}, remove numbers: {remove_numbers}"
+        legacy = bench(f"legacy, {name}", lambda: [clean_text_legacy(raw, config, " @BRK#") for raw in raws], 5)
+        current = bench(f"TextCleaner, {name}", lambda: [text_cleaner.clean(raw, " @BRK#") for raw in raws], 5)
+        print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
+
+# run the benchmark from the repo root
+# python -m tests.text_cleaner_benchmark
@@ -0,0 +1,60 @@
+import argparse
+import timeit
+import tracemalloc
+
+from audiobook_generator.book_parsers.epub_book_parser import EpubBookParser
+from audiobook_generator.book_parsers.text_extractors import extract_text_bs4, extract_text_lxml
+from audiobook_generator.config.general_config import GeneralConfig
+
+EPUB_FILE = "examples/The_Life_and_Adventures_of_Robinson_Crusoe.epub"
+
+
+def bench(name, func, number):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"{name:<55} {seconds * 1000:10.3f} ms")
+    return seconds
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def extract_all(extract_text, documents):
+    return [extract_text(document) for document in documents]
+
+
+def get_config(text_extractor):
+    return GeneralConfig(argparse.Namespace(
+        input_file=EPUB_FILE, newline_mode="double", title_mode="auto", text_extractor=text_extractor,
+        remove_endnotes=False, remove_reference_numbers=False, search_and_replace_file="",
+    ))
+
+
+def main():
+    parsers = {name: EpubBookParser(get_config(name)) for name in ("bs4", "lxml")}
+    documents = [item.get_content() for item in parsers["bs4"].book.get_documents()]
+    assert extract_all(extract_text_bs4, documents) == extract_all(extract_text_lxml, documents)
+    assert parsers["bs4"].get_chapters("   ") == parsers["lxml"].get_chapters("   ")
+
+    print(f"{len(documents)} documents, {sum(len(document) for document in documents)} bytes")
+    legacy = bench("extract_text_bs4", lambda: extract_all(extract_text_bs4, documents), 5)
+    current = bench("extract_text_lxml", lambda: extract_all(extract_text_lxml, documents), 5)
+    print(f"speedup: {legacy / current:.1f}x")
+    legacy_peak = peak_memory(lambda: extract_all(extract_text_bs4, documents))
+    current_peak = peak_memory(lambda: extract_all(extract_text_lxml, documents))
+    print(f"peak memory: {legacy_peak / 2**20:.1f} MiB vs {current_peak / 2**20:.1f} MiB")
+
+    legacy = bench("get_chapters, bs4", lambda: parsers["bs4"].get_chapters("   "), 5)
+    current = bench("get_chapters, lxml", lambda: parsers["lxml"].get_chapters("   "), 5)
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
+
+# run the benchmark from the repo root
+# python -m tests.text_extractor_benchmark